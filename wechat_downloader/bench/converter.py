@@ -0,0 +1,80 @@
+import argparse
+import glob
+import os
+import time
+from typing import Callable, List, Tuple
+
+# 公众号文章 URL 模板，夹具文件名（不含扩展名）即文章 ID
+ARTICLE_URL_TEMPLATE = 'https://mp.weixin.qq.com/s/{}'
+
+# 读取夹具目录中的文章页面，返回（文章 ID，HTML）
+def load_fixtures(fixture_dir: str) -> List[Tuple[str, str]]:
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.html'))):
+        article_id, _ = os.path.splitext(os.path.basename(path))
+        with open(path, 'r', encoding='utf-8') as f_html:
+            fixtures.append((article_id, f_html.read()))
+    return fixtures
+
+# 统计耗时并输出
+def report(name: str, timings: List[float], total_chars: int) -> None:
+    if not timings:
+        print(f"{name}: no successful conversions")
+        return
+    timings = sorted(timings)
+    total = sum(timings)
+    p50 = timings[len(timings) // 2]
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name}: {len(timings)} articles, total {total:.3f} s, "
+          f"mean {total / len(timings) * 1000:.1f} ms, p50 {p50 * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+          f"{len(timings) / total:.1f} articles/s, {total_chars} chars")
+
+# 逐篇计时
+def time_each(items: List[Tuple[str, str]], convert: Callable[[str, str], str], runs: int) -> Tuple[List[float], int]:
+    timings, total_chars = [], 0
+    for article_id, payload in items:
+        best, content = None, ''
+        for _ in range(runs):
+            start = time.perf_counter()
+            content = convert(article_id, payload)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if content:
+            timings.append(best)
+            total_chars += len(content)
+    return timings, total_chars
+
+# 主程序入口
+def main():
+    """
+    在本地夹具（保存的公众号文章页面 `<文章 ID>.html`）上对比 native 转换器和 wechatmp2markdown 服务
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the native converter against the wechatmp2markdown service.')
+
+    parser.add_argument('--fixtures', type=str, required=True, help='Directory of saved article pages named <article_id>.html.')
+    parser.add_argument('--downloader-url', type=str, help='wechatmp2markdown service URL; also benchmarks the service and native end-to-end fetching.')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per article for the local conversion, the best one is used (default: 3).')
+
+    args = parser.parse_args()
+
+    from download import convert_article_html, get_article_content, get_article_content_native
+
+    fixtures = load_fixtures(args.fixtures)
+    print(f"Loaded {len(fixtures)} fixtures from '{args.fixtures}'.")
+
+    # native 转换器：只计算本地解析和转换的耗时
+    timings, total_chars = time_each(fixtures, lambda _, html: convert_article_html(html)[1], args.runs)
+    report('native (parse + convert)', timings, total_chars)
+
+    if args.downloader_url:
+        urls = [(article_id, ARTICLE_URL_TEMPLATE.format(article_id)) for article_id, _ in fixtures]
+
+        # 端到端：下载页面并转换
+        timings, total_chars = time_each(urls, lambda _, url: get_article_content_native(url)[1], 1)
+        report('native (fetch + convert)', timings, total_chars)
+
+        timings, total_chars = time_each(urls, lambda _, url: get_article_content(args.downloader_url, url)[1], 1)
+        report('service (fetch + convert)', timings, total_chars)
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,17 @@
-from .download_article import get_article_content
-from .process_article import process_wechat_article
\ No newline at end of file
+from importlib import import_module
+
+# 对外提供的函数及其所在的模块。模块在首次使用时才导入，
+# 避免没有新文章需要下载时也加载 requests 和 bs4
+_EXPORTS = {
+    'get_article_content': '.download_article',
+    'process_wechat_article': '.process_article',
+    'get_article_content_native': '.native_converter',
+    'convert_article_html': '.native_converter',
+    'ImageMirror': '.mirror_images',
+}
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module_name, __name__), name)
\ No newline at end of file
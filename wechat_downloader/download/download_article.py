@@ -1,16 +1,18 @@
 import os
 import re
 import requests
-from cgi import parse_header
+from email.message import Message
+from email.utils import collapse_rfc2231_value
 from bs4 import BeautifulSoup
 from typing import Tuple
+from profiling import stage, record_size
 from .process_article import format_whitespaces, judge_line_sep, convert_markdown_table
 
 # 检查 URL 是否可访问
-def check_url(url):
+def check_url(url, session=None):
     try:
         # 发送 HEAD 请求，获取 URL 的响应
-        response = requests.head(url, timeout=10)
+        response = (session or requests).head(url, timeout=10)
         
         # 判断返回状态码是否是 2xx (表示请求成功)
         if response.status_code // 100 == 2:
@@ -23,6 +25,28 @@ def check_url(url):
         print(f"请求过程中发生错误: {e}")
         return False
 
+# 从 content-disposition 响应头中解析文件名（替代已弃用的 cgi.parse_header）
+def parse_filename(content_disposition: str, default: str = 'article_raw.md') -> str:
+    if not content_disposition:
+        return default
+    message = Message()
+    message['content-disposition'] = content_disposition
+    values = [value for name, value in message.get_params([], header='content-disposition')[1:] if name == 'filename']
+
+    # RFC 2231 编码的 `filename*=` 参数已按声明的字符集解码，优先使用
+    for value in values:
+        if isinstance(value, tuple):
+            return collapse_rfc2231_value(value) or default
+    if not values or not values[0]:
+        return default
+
+    # 普通的 `filename=` 参数：响应头按 latin-1 解码，其中的 UTF-8 文件名需要重新解码（防止编码问题）
+    file_name = values[0]
+    try:
+        return file_name.encode('raw_unicode_escape').decode('utf-8')
+    except UnicodeDecodeError:
+        return file_name
+
 # 格式化文件名为标题（移除扩展名并替换空格为下划线）
 def format_article_title(file_name: str) -> str:
     # 去除文件扩展名
@@ -52,11 +76,13 @@ def process_markdown_content(raw_content: str) -> str:
     return str(soup)
 
 # 获取文章内容
-def get_article_content(server_url: str, article_url: str) -> Tuple[str, str]:
+def get_article_content(server_url: str, article_url: str, session: requests.Session = None) -> Tuple[str, str]:
     print(f"Attempting to fetch article from URL: {article_url}")
 
     # 如果 article_url 不可达，直接返回空字符串
-    if not check_url(article_url):
+    with stage('check_url', 'network'):
+        reachable = check_url(article_url, session)
+    if not reachable:
         print(f"Error: Article URL {article_url} is unreachable or invalid.")
         return "", ""
     
@@ -66,15 +92,14 @@ def get_article_content(server_url: str, article_url: str) -> Tuple[str, str]:
     
     try:
         # 发起 GET 请求获取文章内容
-        response = requests.get(url)
-        response.raise_for_status()  # 如果请求失败，抛出异常
+        with stage('fetch', 'network'):
+            response = (session or requests).get(url)
+            response.raise_for_status()  # 如果请求失败，抛出异常
+            raw_content = response.text
         print(f"Successfully fetched content from {article_url}.")
         
         # 从响应头中解析文件名
-        _, params = parse_header(response.headers.get('content-disposition'))
-        # 处理文件名中的编码问题
-        file_name = params.get('filename', 'article_raw.md')
-        file_name = file_name.encode('raw_unicode_escape').decode('utf-8')  # 防止编码问题
+        file_name = parse_filename(response.headers.get('content-disposition'))
         title = format_article_title(file_name)  # 格式化文件名作为文章标题
         
         # 如果格式化后的标题为空，使用默认标题
@@ -82,14 +107,13 @@ def get_article_content(server_url: str, article_url: str) -> Tuple[str, str]:
             print("Warning: Formatted title is empty, using default title.")
             title = 'article'
         
-        # 获取文章内容
-        raw_content = response.text
-
         # 打印文章内容的长度
         print(f"Fetched content length: {len(raw_content)} characters.")
+        record_size(raw_content)
         
         # 返回标题和处理过的文章内容
-        return title, process_markdown_content(raw_content)
+        with stage('markdown', 'cpu'):
+            return title, process_markdown_content(raw_content)
     
     except requests.exceptions.RequestException as e:
         print(f"Error: Failed to fetch content from {article_url}: {e}")
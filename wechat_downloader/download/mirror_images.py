@@ -0,0 +1,177 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+# Markdown 图片链接模式（与 remove_url 中的模式一致）
+_IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+
+# 已下载图片的清单文件（URL -> 相对路径），用于跨运行续传
+MANIFEST_FILE_NAME = 'manifest.tsv'
+
+# Content-Type 到文件扩展名的映射
+_CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/svg+xml': 'svg',
+    'image/bmp': 'bmp',
+}
+
+# 提取 Markdown 中的远程图片 URL（去重并保持顺序）
+def extract_image_urls(content: str) -> List[str]:
+    urls = []
+    for match in _IMAGE_PATTERN.finditer(content):
+        url = match.group(2).strip()
+        if url.startswith(('http://', 'https://')) and url not in urls:
+            urls.append(url)
+    return urls
+
+# 根据响应头或 URL 中的 wx_fmt 参数判断图片扩展名
+def guess_extension(url: str, content_type: Optional[str]) -> str:
+    if content_type:
+        extension = _CONTENT_TYPE_EXTENSIONS.get(content_type.split(';')[0].strip().lower())
+        if extension:
+            return extension
+    wx_fmt = parse_qs(urlparse(url).query).get('wx_fmt')
+    if wx_fmt and re.fullmatch(r'[a-z]{3,4}', wx_fmt[0].lower()):
+        return 'jpg' if wx_fmt[0].lower() == 'jpeg' else wx_fmt[0].lower()
+    return 'img'
+
+class ImageMirror(object):
+    """
+    将文章中的远程图片下载到本地，并把 Markdown 中的图片链接替换为本地路径。
+
+    - 图片按内容的 SHA-256 保存（`<image_dir>/ab/<sha256>.<ext>`），多篇文章共用的图片只保存一份。
+    - 使用有界线程池并发下载，每个线程复用各自的 requests Session。
+    - 已下载的 URL 记录在清单文件中，再次运行时跳过。
+    - 只保存 Content-Type 为 `image/*` 的响应（HTML 错误页、防盗链页面等视为下载失败，保留远程链接）。
+    """
+
+    def __init__(self, image_dir: str, workers: int = 8, timeout: int = 30):
+        """
+        :param image_dir: 图片保存目录
+        :param workers: 并发下载的线程数
+        :param timeout: 单张图片的下载超时时间（秒）
+        """
+        self.image_dir = image_dir
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, str] = {}
+
+        os.makedirs(image_dir, exist_ok=True)
+        self._manifest_path = os.path.join(image_dir, MANIFEST_FILE_NAME)
+        self._load_manifest()
+
+    # 读取清单文件（只保留本地文件仍然存在的记录）
+    def _load_manifest(self) -> None:
+        if not os.path.exists(self._manifest_path):
+            return
+        with open(self._manifest_path, 'r', encoding='utf-8') as manifest:
+            for line in manifest:
+                url, _, relative_path = line.rstrip('\n').partition('\t')
+                if url and relative_path and os.path.isfile(os.path.join(self.image_dir, relative_path)):
+                    self._manifest[url] = relative_path
+
+    # 每个线程使用各自的 Session，复用连接
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    # 下载单张图片，返回相对于图片目录的路径，失败时返回 None
+    def _download(self, url: str) -> Optional[str]:
+        try:
+            response = self._session().get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error: Failed to download image {url}: {e}")
+            return None
+
+        content_type = response.headers.get('content-type') or ''
+        if not content_type.split(';')[0].strip().lower().startswith('image/'):
+            print(f"Error: Failed to download image {url}: unexpected Content-Type '{content_type}'")
+            return None
+
+        data = response.content
+        digest = hashlib.sha256(data).hexdigest()
+        relative_path = os.path.join(digest[:2], f"{digest}.{guess_extension(url, response.headers.get('content-type'))}")
+        path = os.path.join(self.image_dir, relative_path)
+
+        # 写入失败（例如：磁盘已满）时只记为这张图片下载失败，保留远程链接
+        try:
+            # 相同内容的图片已经保存过，不再重复写入
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=os.path.dirname(path))
+                try:
+                    with os.fdopen(fd, 'wb') as f_image:
+                        f_image.write(data)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+
+            with self._lock:
+                with open(self._manifest_path, 'a', encoding='utf-8') as manifest:
+                    manifest.write(f"{url}\t{relative_path}\n")
+                self._manifest[url] = relative_path
+        except OSError as e:
+            print(f"Error: Failed to save image {url}: {e}")
+            return None
+        return relative_path
+
+    def mirror(self, urls: List[str]) -> Dict[str, str]:
+        """
+        并发下载尚未下载过的图片。
+
+        :param urls: 图片 URL 列表
+        :return: URL 到本地绝对路径的映射（下载失败的图片不包含在内）
+        """
+        pending = {}
+        for url in urls:
+            if url not in self._manifest and url not in pending:
+                pending[url] = self._executor.submit(self._download, url)
+        for future in pending.values():
+            future.result()
+
+        return {url: os.path.join(self.image_dir, self._manifest[url]) for url in urls if url in self._manifest}
+
+    def localize(self, content: str, markdown_dir: str) -> str:
+        """
+        下载 Markdown 中的远程图片，并将图片链接替换为相对于 Markdown 文件所在目录的本地路径。
+
+        :param content: Markdown 内容
+        :param markdown_dir: Markdown 文件所在的目录
+        :return: 替换图片链接后的 Markdown 内容
+        """
+        urls = extract_image_urls(content)
+        if not urls:
+            return content
+
+        local_paths = self.mirror(urls)
+        print(f"Mirrored {len(local_paths)}/{len(urls)} images.")
+
+        def replace(match):
+            local_path = local_paths.get(match.group(2).strip())
+            if local_path is None:
+                return match.group(0)
+            relative_path = os.path.relpath(local_path, markdown_dir).replace(os.sep, '/')
+            return f"![{match.group(1)}]({relative_path})"
+
+        return _IMAGE_PATTERN.sub(replace, content)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
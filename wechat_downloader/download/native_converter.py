@@ -0,0 +1,250 @@
+import re
+import requests
+from typing import List, Tuple
+from profiling import stage, record_size
+from .download_article import format_article_title
+from .process_article import create_markdown_divider_row
+
+# 请求公众号文章页面时使用的浏览器 User-Agent
+_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+               '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# 块级元素，转换时前后各自成段
+_BLOCK_TAGS = {'p', 'div', 'section', 'article', 'header', 'footer', 'figure', 'figcaption',
+               'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'blockquote', 'pre', 'table', 'hr'}
+
+# 忽略的元素
+_SKIP_TAGS = {'script', 'style', 'noscript', 'iframe', 'svg', 'mpvoice', 'mpvideo'}
+
+# 行内强调元素及对应的 Markdown 标记
+_EMPHASIS_TAGS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*'}
+
+# 导入 lxml（只有使用 native 转换器时才需要）
+def _import_lxml_html():
+    try:
+        import lxml.html
+        return lxml.html
+    except ImportError:
+        raise RuntimeError("The native converter requires 'lxml', please install it first (pip install lxml).")
+
+# 规范化行内文本中的空白字符（公众号文章中大量使用 &nbsp;）
+def _normalize_inline(text: str) -> str:
+    return re.sub(r'[ \t\r\n\u00a0\u3000]+', ' ', text)
+
+class _MarkdownRenderer(object):
+    """
+    将 lxml 元素树转换为 Markdown，块级元素各自成段，行内元素合并为一行。
+    """
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self._inline: List[str] = []
+
+    # 结束当前段落
+    def flush(self) -> None:
+        text = ''.join(self._inline)
+        text = re.sub(r' *\n *', '\n', text).strip()
+        if text:
+            self.blocks.append(text)
+        self._inline = []
+
+    def text(self, text: str) -> None:
+        if text:
+            self._inline.append(_normalize_inline(text))
+
+    def children(self, element) -> None:
+        self.text(element.text)
+        for child in element:
+            self.render(child)
+            self.text(child.tail)
+
+    # 渲染子树并返回其中的段落（用于列表项、引用和强调等需要包裹的元素）
+    def _render_nested(self, element) -> List[str]:
+        nested = _MarkdownRenderer()
+        nested.children(element)
+        nested.flush()
+        return nested.blocks
+
+    def render(self, element) -> None:
+        tag = element.tag if isinstance(element.tag, str) else ''
+        tag = tag.lower()
+        if not tag or tag in _SKIP_TAGS:
+            return
+
+        if tag == 'br':
+            self._inline.append('\n')
+        elif tag == 'img':
+            src = element.get('data-src') or element.get('src')
+            if src:
+                self._inline.append(f"![{element.get('alt', '')}]({src})")
+        elif tag == 'a':
+            href = element.get('href', '')
+            blocks = self._render_nested(element)
+            if len(blocks) == 1 and href and not href.startswith('javascript'):
+                self._inline.append(f"[{blocks[0]}]({href})")
+            else:
+                self._append_blocks(blocks)
+        elif tag in _EMPHASIS_TAGS:
+            blocks = self._render_nested(element)
+            marker = _EMPHASIS_TAGS[tag]
+            if len(blocks) == 1 and '\n' not in blocks[0]:
+                self._inline.append(f"{marker}{blocks[0]}{marker}")
+            else:
+                self._append_blocks(blocks)
+        elif tag == 'code':
+            self._inline.append(f"`{element.text_content()}`")
+        elif tag in _BLOCK_TAGS:
+            self.flush()
+            self._render_block(tag, element)
+            self.flush()
+        else:
+            self.children(element)
+
+    # 追加嵌套渲染得到的段落
+    def _append_blocks(self, blocks: List[str]) -> None:
+        if len(blocks) == 1:
+            self._inline.append(blocks[0])
+            return
+        self.flush()
+        self.blocks.extend(blocks)
+
+    def _render_block(self, tag: str, element) -> None:
+        if tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            text = _normalize_inline(element.text_content()).strip()
+            if text:
+                self.blocks.append('#' * int(tag[1]) + ' ' + text)
+        elif tag == 'hr':
+            self.blocks.append('---')
+        elif tag == 'pre':
+            self.blocks.append('```\n' + element.text_content().strip('\n') + '\n```')
+        elif tag == 'table':
+            table = _convert_table(element)
+            if table:
+                self.blocks.append(table)
+        elif tag == 'blockquote':
+            lines = '\n\n'.join(self._render_nested(element)).split('\n')
+            if any(lines):
+                self.blocks.append('\n'.join(('> ' + line) if line else '>' for line in lines))
+        elif tag in ('ul', 'ol'):
+            items = [child for child in element if isinstance(child.tag, str) and child.tag.lower() == 'li']
+            lines = []
+            for index, item in enumerate(items):
+                marker = f"{index + 1}." if tag == 'ol' else '-'
+                text = ' '.join(self._render_nested(item)).replace('\n', ' ')
+                if text:
+                    lines.append(f"{marker} {text}")
+            if lines:
+                self.blocks.append('\n'.join(lines))
+        else:
+            self.children(element)
+
+# 将 HTML 表格直接转换为 Markdown 表格（第一行作为表头）
+def _convert_table(table) -> str:
+    # 单元格内的换行替换为空格
+    for line_break in table.iter('br'):
+        line_break.tail = ' ' + (line_break.tail or '')
+
+    rows = []
+    for row in table.iter('tr'):
+        cells = [_normalize_inline(cell.text_content()).strip() for cell in row if isinstance(cell.tag, str) and cell.tag.lower() in ('td', 'th')]
+        if not cells:
+            continue
+        rows.append('| ' + ' '.join(cell + ' |' for cell in cells))
+        if len(rows) == 1:
+            rows.append(create_markdown_divider_row(len(cells)))
+    return '\n'.join(rows)
+
+# 提取文章标题
+def _extract_title(document) -> str:
+    for xpath in ('//*[@id="activity-name"]', '//h1[contains(@class, "rich_media_title")]'):
+        nodes = document.xpath(xpath)
+        if nodes:
+            title = _normalize_inline(nodes[0].text_content()).strip()
+            if title:
+                return title
+    for xpath in ('//meta[@property="og:title"]/@content', '//meta[@property="twitter:title"]/@content'):
+        values = document.xpath(xpath)
+        if values and values[0].strip():
+            return values[0].strip()
+    titles = document.xpath('//title/text()')
+    return titles[0].strip() if titles else ''
+
+def convert_article_html(html: str) -> Tuple[str, str]:
+    """
+    将公众号文章页面的 HTML 转换为 Markdown（只解析一次，表格直接转换为 Markdown 表格）。
+
+    :param html: 文章页面的 HTML
+    :return: 文章标题和 Markdown 内容；找不到正文（`js_content`）时内容为空字符串，页面为空时标题也为空字符串
+    """
+    lxml_html = _import_lxml_html()
+    try:
+        document = lxml_html.document_fromstring(html)
+    except lxml_html.etree.ParserError:
+        # 空白或只有注释的页面（例如：被删除的文章）
+        return '', ''
+    title = _extract_title(document)
+
+    bodies = document.xpath('//*[@id="js_content"]')
+    if not bodies:
+        return title, ''
+
+    renderer = _MarkdownRenderer()
+    renderer.children(bodies[0])
+    renderer.flush()
+
+    blocks = [f"# {title}"] if title else []
+    blocks.extend(renderer.blocks)
+    return title, '\n\n'.join(blocks) + '\n'
+
+# 下载公众号文章页面
+def fetch_article_html(article_url: str, session: requests.Session = None, timeout: int = 30) -> str:
+    """
+    下载公众号文章页面的 HTML。
+
+    :param article_url: 文章 URL
+    :param session: 复用连接的 requests Session，默认直接请求
+    :param timeout: 超时时间（秒）
+    :return: 文章页面的 HTML
+    :raises requests.exceptions.RequestException: 请求失败
+    """
+    http = session or requests
+    response = http.get(article_url, headers={'User-Agent': _USER_AGENT}, timeout=timeout)
+    response.raise_for_status()
+    # 响应头中没有声明编码时，requests 默认使用 ISO-8859-1，公众号页面实际为 UTF-8
+    if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+        response.encoding = 'utf-8'
+    return response.text
+
+# 使用 native 转换器获取文章内容
+def get_article_content_native(article_url: str, session: requests.Session = None) -> Tuple[str, str]:
+    """
+    直接下载文章页面并在进程内转换为 Markdown，不经过 wechatmp2markdown 服务。
+    返回值与 `get_article_content` 相同。
+
+    :param article_url: 文章 URL
+    :param session: 复用连接的 requests Session，默认直接请求
+    :return: 文章标题和 Markdown 内容，失败时均为空字符串
+    """
+    print(f"Attempting to fetch article from URL: {article_url}")
+
+    try:
+        with stage('fetch', 'network'):
+            html = fetch_article_html(article_url, session)
+    except requests.exceptions.RequestException as e:
+        print(f"Error: Failed to fetch content from {article_url}: {e}")
+        return "", ""
+
+    record_size(html)
+    with stage('convert', 'cpu'):
+        title, content = convert_article_html(html)
+    if not content:
+        print(f"Error: No article content found in {article_url}.")
+        return "", ""
+    print(f"Successfully converted {article_url}, content length: {len(content)} characters.")
+
+    # 与服务返回的文件名（<标题>.md）一样格式化标题
+    title = format_article_title(f"{title}.md")
+    if len(title) == 0:
+        print("Warning: Formatted title is empty, using default title.")
+        title = 'article'
+    return title, content
\ No newline at end of file
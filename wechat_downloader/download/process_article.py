@@ -1,6 +1,7 @@
 import re
 from typing import Tuple
 from bs4 import BeautifulSoup
+from profiling import stage
 
 # 将 HTML 表格内容转换为 Markdown 格式
 def convert_markdown_table(html_content: str, line_sep: str) -> str:
@@ -102,6 +103,8 @@ def purify_markdown_content(texified_content: str) -> str:
 
 # 处理微信公众号文章，返回 Texified 和 Purified 的内容
 def process_wechat_article(raw_content: str) -> Tuple[str, str]:
-    texified_content = texify_markdown_content(raw_content)  # 处理原始内容
-    purified_content = purify_markdown_content(texified_content)  # 进一步净化内容
+    with stage('texify', 'cpu'):
+        texified_content = texify_markdown_content(raw_content)  # 处理原始内容
+    with stage('purify', 'cpu'):
+        purified_content = purify_markdown_content(texified_content)  # 进一步净化内容
     return texified_content, purified_content
\ No newline at end of file
@@ -5,45 +5,49 @@ import csv
 import datetime
 import random
 import time
-from download import get_article_content, process_wechat_article
+import download
+from storage import ArticleStore, LAYOUTS, COMPRESSIONS
+import ingest
+from ingest import strip_compression
+from profiling import Profiler, stage, profile_article
+
+# 下载结果写入文章列表的字段
+RESULT_FIELDS = ['raw_filename', 'download_time', 'article_name']
 
 # 保存内容到指定文件
-def save_content(content: str, dir: str, file: str) -> None:
+def save_content(content: str, store: ArticleStore, file: str) -> None:
     """
-    保存文章内容到指定的目录和文件中
+    保存文章内容到存储后端中（原子写入）
 
     :param content: 文章内容
-    :param dir: 目标目录
+    :param store: 文章存储后端
     :param file: 文件名
     """
     try:
-        # 如果目录不存在，则创建目录
-        if not os.path.exists(dir):
-            os.makedirs(dir)
-        
-        # 生成完整的文件路径
-        file_path = os.path.join(dir, file)
-        
-        # 将内容写入指定文件
-        with open(file_path, 'w', encoding='utf-8') as f_content:
-            f_content.write(content)
-        print(f"Document '{file}' saved to '{dir}'.")
+        with stage('save', 'disk'):
+            file_path = store.write(file, content)
+        print(f"Document '{file}' saved to '{file_path}'.")
     except Exception as e:
         print(f"Error saving document '{file}': {e}")
 
 # 下载并处理公众号文章
-def download_article(downloader_url: str, article_url: str, save_dir: str, save_processed: bool) -> bool:
+def download_article(downloader_url: str, article_url: str, store: ArticleStore, save_processed: bool, image_mirror=None, session=None) -> bool:
     """
     下载并处理微信公众号文章
 
-    :param downloader_url: 文章下载器 URL
+    :param downloader_url: 文章下载器（wechatmp2markdown 服务）URL，为 None 时使用进程内的 native 转换器
     :param article_url: 文章 URL
-    :param save_dir: 保存文章的目录
+    :param store: 保存文章的存储后端
     :param save_processed: 是否保存处理后的文章（Texify 和 Purify）
+    :param image_mirror: 图片镜像（`download.ImageMirror`），为 None 时保留远程图片链接
+    :param session: 复用连接的 requests Session（服务模式），默认每次请求单独建立连接
     :return: raw_filename（下载的原始文件名）和下载时间（字符串）
     """
     # 获取文章内容和标题
-    title, content = get_article_content(downloader_url, article_url)
+    if downloader_url:
+        title, content = download.get_article_content(downloader_url, article_url, session)
+    else:
+        title, content = download.get_article_content_native(article_url, session)
 
     # 如果文章标题或内容为空，返回错误
     if not title or not content:
@@ -56,15 +60,21 @@ def download_article(downloader_url: str, article_url: str, save_dir: str, save_
     
     # 保存原始内容到文件
     raw_filename = f"{article_id}_raw.md"
-    save_content(content, save_dir, raw_filename)
+
+    # 下载文章中的图片，并将图片链接替换为相对于文章文件的本地路径
+    if image_mirror is not None:
+        with stage('images', 'network'):
+            content = image_mirror.localize(content, store.dir_for(raw_filename))
+
+    save_content(content, store, raw_filename)
     
     # 处理文章内容（Texify 和 Purify）
-    texified_content, purified_content = process_wechat_article(content)
+    texified_content, purified_content = download.process_wechat_article(content)
     
     # 根据 `save_processed` 参数决定是否保存处理后的内容
     if save_processed:
-        save_content(texified_content, save_dir, f"{article_id}_texified.md")
-        save_content(purified_content, save_dir, f"{article_id}_purified.txt")
+        save_content(texified_content, store, f"{article_id}_texified.md")
+        save_content(purified_content, store, f"{article_id}_purified.txt")
 
     # 返回 文章名称，raw_filename 和下载时间
     return title, raw_filename, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -72,12 +82,12 @@ def download_article(downloader_url: str, article_url: str, save_dir: str, save_
 # 获取 result 文件名
 def get_result_path(csv_path):
     """
-    根据原始文件路径生成结果文件路径
+    根据原始文件路径生成结果文件路径（压缩或 JSONL 格式的输入，结果文件均为 CSV）
     :param csv_path: 原始 CSV 文件路径
     :return: 结果 CSV 文件路径
     """
-    base, ext = os.path.splitext(csv_path)
-    return base + '_result' + ext
+    base, _ = os.path.splitext(strip_compression(csv_path))
+    return base + '_result.csv'
 
 # 合并 csv 文件
 def merge_results(input_file, result_file):
@@ -87,111 +97,191 @@ def merge_results(input_file, result_file):
     :param input_file: 原始 CSV 文件
     :param result_file: 结果 CSV 文件
     """
-    # 检查结果文件是否存在
-    if os.path.exists(result_file):
-        with open(result_file, 'r', newline='', encoding='utf-8') as resultfile:
-            reader = csv.DictReader(resultfile)
-            result_data = {row['article_url']: row for row in reader}
+    with stage('merge', 'disk'):
+        ingest.merge_results(input_file, result_file, RESULT_FIELDS)
+
+# 下载一行中的文章并更新该行
+def download_row(row, downloader_url, store, save_processed, image_mirror=None):
+    """
+    下载一行中的文章，并将文件名、下载时间和标题更新到该行中。
+    :param row: 文章列表中的一行
+    :param downloader_url: 文章下载器 URL
+    :param store: 保存下载文件的存储后端
+    :param save_processed: 是否保存处理后的文章
+    :param image_mirror: 图片镜像，为 None 时不下载图片
+    """
+    article_url = row['article_url']  # 获取每一行中的 article_url
+    print(f"Downloading article from {article_url}...")
+
+    # 下载并获取文章的文件名和下载时间
+    with profile_article(article_url):
+        title, raw_filename, download_time = download_article(downloader_url, article_url, store, save_processed, image_mirror)
 
-        # 读取原始 CSV 文件
-        with open(input_file, 'r', newline='', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
-            fieldnames = reader.fieldnames
+    # 如果下载成功，更新文件名和下载时间（结果行由 ResultWriter 在文章文件落盘后写入）
+    if raw_filename:
+        row['raw_filename'] = raw_filename  # 更新 raw_filename
+        row['download_time'] = download_time  # 更新 download_time
+        row['article_name'] = title  # 更新 article_name（标题）
+    else:
+        # 如果下载失败，标记为下载失败
+        row['raw_filename'] = "Failed"
+        row['download_time'] = "N/A"
+        row['article_name'] = "N/A"
 
-            # 如果原始文件中没有某些字段，添加到 fieldnames 中
-            for field in ['raw_filename', 'download_time', 'article_name']:
-                if field not in fieldnames:
-                    fieldnames.append(field)
+    # 随机休眠 1 到 5 秒之间
+    sleep_time = random.randint(1, 5)
+    print(f"Sleeping for {sleep_time} seconds...")
+    with stage('sleep', 'sleep'):
+        time.sleep(sleep_time)
+
+# 结果文件的写入器
+class ResultWriter(object):
+    """
+    按 fsync 批次写入结果行：攒够 `store.fsync_batch` 行（不 fsync 时每行）后，先对文章文件执行 fsync，
+    再写入这些行，保证结果文件中记录为已下载的文章都已落盘。
+    """
 
-            original_data = [row for row in reader]
+    def __init__(self, resultfile, store: ArticleStore, fieldnames=None, write_header: bool = True, extrasaction: str = 'raise'):
+        """
+        :param resultfile: 以追加方式打开的结果文件
+        :param store: 文章存储后端
+        :param fieldnames: 结果文件的列，默认使用第一行的列
+        :param write_header: 是否在第一次写入前写入表头
+        :param extrasaction: 行中有多余的列时的处理方式（同 csv.DictWriter）
+        """
+        self._resultfile = resultfile
+        self._store = store
+        self._fieldnames = fieldnames
+        self._write_header = write_header
+        self._extrasaction = extrasaction
+        self._writer = None
+        self._rows = []
 
-            # 更新原始数据为结果文件中的内容
-            for row in original_data:
-                if row['article_url'] in result_data:
-                    row.update(result_data[row['article_url']])  # 更新已有数据
+    def add(self, row: dict) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= max(self._store.fsync_batch, 1):
+            self.flush()
 
-        # 写入合并后的内容到原始文件
-        with open(input_file, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()  # 写入表头
-            writer.writerows(original_data)  # 写入更新后的数据
+    def flush(self) -> None:
+        """
+        对文章文件执行 fsync，然后写入缓存的结果行。
+        """
+        if not self._rows:
+            return
+        with stage('fsync', 'disk'):
+            self._store.flush()
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._resultfile, fieldnames=self._fieldnames or list(self._rows[0].keys()),
+                                          extrasaction=self._extrasaction)
+            if self._write_header:
+                self._writer.writeheader()
+        with stage('write', 'disk'):
+            self._writer.writerows(self._rows)
+            self._resultfile.flush()
+        self._rows = []
 
-        # 清空结果文件
-        open(result_file, 'w').close()
+# 判断一行中的文章是否需要下载
+def needs_download(row):
+    raw_filename = row.get('raw_filename', '')  # 获取当前行的 raw_filename
+    title = row.get('article_name', '')  # 获取当前行的 article_name（文件名）
+    # 如果 raw_filename 为空、显示为 "Failed" 或 title 为空
+    return not raw_filename or raw_filename == "Failed" or title == ".md"
 
 #处理 CSV 文件（文件列表，需要能够多次执行）
-def process_csv(csv_path, downloader_url, save_dir, save_processed):
+def process_csv(csv_path, downloader_url, store, save_processed, result_path=None, input_format=None, image_mirror=None):
     """
     处理 CSV 文件，逐行下载并更新 CSV 中的文章信息，日志实时保存到结果文件。
+    标准输入、gzip 压缩或 JSONL 格式的文章列表无法原地更新，按流式方式处理（见 `process_stream`）。
     :param csv_path: 原始 CSV 文件路径
     :param downloader_url: 文章下载器 URL
-    :param save_dir: 保存下载文件的目录
+    :param store: 保存下载文件的存储后端
     :param save_processed: 是否保存处理后的文章
+    :param result_path: 结果文件路径，默认根据原始文件路径生成
+    :param input_format: 输入格式（'csv' 或 'jsonl'），默认根据扩展名判断
+    :param image_mirror: 图片镜像，为 None 时不下载图片
     """
+    if not ingest.is_rewritable(csv_path) or input_format == 'jsonl':
+        process_stream(csv_path, downloader_url, store, save_processed, result_path, input_format, image_mirror=image_mirror)
+        return
+
     # 动态生成结果文件路径
-    result_path = get_result_path(csv_path)
+    result_path = result_path or get_result_path(csv_path)
 
     # 合并原始文件和结果文件（如果存在）
     merge_results(csv_path, result_path)
 
-    # 打开原始文件进行处理
-    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)  # 读取 CSV 文件中的每一行
-        fieldnames = reader.fieldnames  # 获取 CSV 文件的列名
-
-        # 如果 CSV 文件没有 'raw_filename' 或 'download_time' 列，添加这些列
-        if 'raw_filename' not in fieldnames:
-            fieldnames.append('raw_filename')
-        if 'download_time' not in fieldnames:
-            fieldnames.append('download_time')
-        if 'article_name' not in fieldnames:
-            fieldnames.append('article_name')
-
-        # 打开结果文件进行写入
-        with open(result_path, 'a', newline='', encoding='utf-8') as resultfile:
-            writer = csv.DictWriter(resultfile, fieldnames=fieldnames)
-            # 先写入 header
-            writer.writeheader()
-
+    # 打开结果文件进行写入，只记录本次下载过的行
+    with open(result_path, 'a', newline='', encoding='utf-8') as resultfile:
+        writer = ResultWriter(resultfile, store)
+        try:
             # 逐行读取 CSV 中的每一行
-            for row in reader:
-                article_url = row['article_url']  # 获取每一行中的 article_url
-                raw_filename = row.get('raw_filename', '')  # 获取当前行的 raw_filename
-                title = row.get('article_name', '')  # 获取当前行的 article_name（文件名）
-
-                # 如果 raw_filename 为空、显示为 "Failed" 或 title 为空
-                if not raw_filename or raw_filename == "Failed" or title == ".md":
-                    print(f"Downloading article from {article_url}...")
-
-                    # 下载并获取文章的文件名和下载时间
-                    title, raw_filename, download_time = download_article(downloader_url, article_url, save_dir, save_processed)
-
-                    # 如果下载成功，更新文件名和下载时间
-                    if raw_filename:
-                        row['raw_filename'] = raw_filename  # 更新 raw_filename
-                        row['download_time'] = download_time  # 更新 download_time
-                        row['article_name'] = title  # 更新 article_name（标题）
-                    else:
-                        # 如果下载失败，标记为下载失败
-                        row['raw_filename'] = "Failed"
-                        row['download_time'] = "N/A"
-                        row['article_name'] = "N/A"
-
-                    # 随机休眠 1 到 5 秒之间
-                    sleep_time = random.randint(1, 5)
-                    print(f"Sleeping for {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+            for row in ingest.iter_rows(csv_path):
+                if needs_download(row):
+                    download_row(row, downloader_url, store, save_processed, image_mirror)
+
+                    # 写入更新后的行到结果文件
+                    writer.add(row)
                 else:
                     # 如果文章已经下载过，跳过此行
-                    print(f"Skipping {article_url}, already downloaded.")
-
-                # 写入更新后的行到结果文件
-                writer.writerow(row)
-                resultfile.flush()
+                    print(f"Skipping {row['article_url']}, already downloaded.")
+        finally:
+            writer.flush()
 
     # 合并结果文件
     merge_results(csv_path, result_path)
 
+# 流式处理文章列表
+def process_stream(input_path, downloader_url, store, save_processed, result_path=None, input_format=None, chunk_size=1000, image_mirror=None):
+    """
+    以恒定内存处理文章列表（支持标准输入、gzip 压缩的 CSV/JSONL 文件）。
+    文章列表不会被改写，下载结果追加到结果文件中；结果文件中已下载成功的文章通过紧凑的
+    ID 集合过滤，因此可以多次执行。
+    :param input_path: 文章列表路径，'-' 表示标准输入
+    :param downloader_url: 文章下载器 URL
+    :param store: 保存下载文件的存储后端
+    :param save_processed: 是否保存处理后的文章
+    :param result_path: 结果文件路径，从标准输入读取时必须指定
+    :param input_format: 输入格式（'csv' 或 'jsonl'），默认根据扩展名判断
+    :param chunk_size: 每次读取的行数
+    :param image_mirror: 图片镜像，为 None 时不下载图片
+    """
+    if result_path is None:
+        if input_path == ingest.STDIN:
+            raise ValueError("A result file is required when reading the article list from stdin.")
+        result_path = get_result_path(input_path)
+
+    # 结果文件中已下载成功的文章
+    completed = ingest.CompletedSet()
+    if os.path.exists(result_path) and os.path.getsize(result_path) > 0:
+        completed = ingest.CompletedSet.from_ids(
+            row['article_url'] for row in ingest.iter_rows(result_path) if not needs_download(row))
+    print(f"Found {len(completed)} downloaded articles in '{result_path}'.")
+
+    write_header = not os.path.exists(result_path) or os.path.getsize(result_path) == 0
+    with open(result_path, 'a', newline='', encoding='utf-8') as resultfile:
+        writer = ResultWriter(resultfile, store, ['article_url'] + RESULT_FIELDS, write_header, extrasaction='ignore')
+        try:
+            processed = 0
+            for chunk in ingest.iter_chunks(ingest.iter_rows(input_path, input_format), chunk_size):
+                for row in chunk:
+                    article_url = row.get('article_url', '')
+                    if not article_url or article_url in completed:
+                        continue
+                    # 文章列表中已经记录了下载结果的行
+                    if not needs_download(row):
+                        completed.add(article_url)
+                        continue
+
+                    download_row(row, downloader_url, store, save_processed, image_mirror)
+                    writer.add(row)
+
+                    if not needs_download(row):
+                        completed.add(article_url)
+                processed += len(chunk)
+                print(f"Processed {processed} rows of the article list.")
+        finally:
+            writer.flush()
+
 # 主程序入口
 def main():
     """
@@ -201,16 +291,59 @@ def main():
     parser = argparse.ArgumentParser(description='Batch download and process WeChat articles from a CSV file.')
     
     # 添加命令行参数
-    parser.add_argument('--downloader-url', type=str, required=True, help='WeChat article downloader URL.')
-    parser.add_argument('--csv-file', type=str, required=True, help='Path to the CSV file containing article URLs.')
+    parser.add_argument('--downloader-url', type=str, help='WeChat article downloader URL (required by the service converter).')
+    parser.add_argument('--converter', type=str, default='service', choices=['service', 'native'], help='Convert articles through the wechatmp2markdown service or in-process with lxml (default: service).')
+    parser.add_argument('--csv-file', type=str, required=True, help="Path to the CSV file containing article URLs ('-' for stdin, '.gz' and '.jsonl' are streamed).")
+    parser.add_argument('--input-format', type=str, choices=ingest.INPUT_FORMATS, help='Format of the article list (default: detected from the file extension).')
+    parser.add_argument('--result-file', type=str, help='Path to the result CSV file (required when reading from stdin).')
     parser.add_argument('--dir', type=str, required=True, help='Directory to save the downloaded articles.')
     parser.add_argument('--save-processed', action='store_true', help='Save the processed article in Markdown and Text format.')
+    parser.add_argument('--layout', type=str, choices=LAYOUTS, help='Storage layout of the article directory (default: the existing layout, or flat).')
+    parser.add_argument('--compression', type=str, choices=list(COMPRESSIONS), help='Compression of the saved articles (default: the existing compression, or none).')
+    parser.add_argument('--mirror-images', action='store_true', help='Download the images of each article and link them locally.')
+    parser.add_argument('--image-dir', type=str, help='Directory of the mirrored images, shared across articles (default: <dir>/images).')
+    parser.add_argument('--image-workers', type=int, default=8, help='Number of concurrent image downloads (default: 8).')
+    parser.add_argument('--profile', action='store_true', help='Profile the run: cProfile stats, per-stage network/CPU/disk time and the slowest articles.')
+    parser.add_argument('--profile-dir', type=str, help='Directory of the profile output (default: <dir>/profile).')
+    parser.add_argument('--profile-sample-ms', type=float, default=10, help='Interval of the stack sampler writing collapsed stacks for flame graphs, 0 disables it (default: 10).')
+    parser.add_argument('--profile-top', type=int, default=20, help='Number of slowest articles to report (default: 20).')
+    parser.add_argument('--fsync-batch', type=int, default=0, help='Fsync saved articles every N files; 1 fsyncs each file, 0 disables fsync (default: 0).')
 
     # 解析命令行参数
     args = parser.parse_args()
+    if args.converter == 'service' and not args.downloader_url:
+        parser.error('--downloader-url is required by the service converter.')
+    downloader_url = args.downloader_url if args.converter == 'service' else None
+    if args.csv_file == ingest.STDIN and not args.result_file:
+        parser.error('--result-file is required when reading the article list from stdin.')
+
+    # 打开文章存储后端
+    try:
+        store = ArticleStore.create(args.dir, args.layout, args.compression, fsync_batch=args.fsync_batch)
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    # 图片镜像（可选）
+    image_mirror = None
+    if args.mirror_images:
+        image_mirror = download.ImageMirror(args.image_dir or os.path.join(args.dir, 'images'), args.image_workers)
+
+    # 性能分析（可选）
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile_dir or os.path.join(args.dir, 'profile'), 'downloader',
+                            args.profile_sample_ms / 1000, args.profile_top).start()
 
     # 处理 CSV 文件，下载并更新 CSV 文件
-    process_csv(args.csv_file, args.downloader_url, args.dir, args.save_processed)
+    try:
+        process_csv(args.csv_file, downloader_url, store, args.save_processed, args.result_file, args.input_format, image_mirror)
+    finally:
+        if image_mirror is not None:
+            image_mirror.close()
+        store.close()
+        if profiler is not None:
+            profiler.stop()
 
 # 程序执行入口
 if __name__ == "__main__":
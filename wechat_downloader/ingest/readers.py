@@ -0,0 +1,76 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from typing import Iterable, Iterator, List, Optional
+
+# 支持的输入格式
+INPUT_FORMATS = ['csv', 'jsonl']
+
+# 表示从标准输入读取
+STDIN = '-'
+
+# 去掉压缩扩展名
+def strip_compression(path: str) -> str:
+    return path[:-3] if path.endswith('.gz') else path
+
+# 根据文件扩展名判断输入格式
+def detect_format(path: str) -> str:
+    _, ext = os.path.splitext(strip_compression(path))
+    return 'jsonl' if ext.lower() in ('.jsonl', '.ndjson') else 'csv'
+
+# 判断输入是否为可以原地改写的普通 CSV 文件
+def is_rewritable(path: str) -> bool:
+    return path != STDIN and not path.endswith('.gz') and detect_format(path) == 'csv'
+
+# 以文本方式打开输入（支持标准输入和 gzip 压缩文件）
+def open_text(path: str) -> io.TextIOBase:
+    if path == STDIN:
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', newline='', encoding='utf-8')
+
+# 逐行读取文章列表
+def iter_rows(path: str, input_format: Optional[str] = None) -> Iterator[dict]:
+    """
+    以生成器方式逐行读取文章列表，内存占用与文件大小无关。
+
+    :param path: 文件路径，'-' 表示标准输入，'.gz' 结尾的文件按 gzip 解压
+    :param input_format: 输入格式（'csv' 或 'jsonl'），默认根据扩展名判断
+    :return: 每行对应的字典
+    """
+    input_format = input_format or detect_format(path)
+    with open_text(path) as infile:
+        if input_format == 'jsonl':
+            for line in infile:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(infile)
+
+# 读取 CSV 文件的表头
+def read_fieldnames(path: str) -> List[str]:
+    with open_text(path) as infile:
+        return list(csv.DictReader(infile).fieldnames or [])
+
+# 将行按固定大小分块
+def iter_chunks(rows: Iterable[dict], chunk_size: int) -> Iterator[List[dict]]:
+    """
+    将行迭代器按 chunk_size 分块，每次只在内存中保留一个块。
+
+    :param rows: 行迭代器
+    :param chunk_size: 每块的行数
+    :return: 行列表
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
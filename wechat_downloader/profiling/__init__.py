@@ -0,0 +1 @@
+from .profiler import Profiler, stage, profile_article, record_size, KINDS
@@ -0,0 +1,237 @@
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+
+# 阶段的类型：除 CPU 时间外，阶段内的其余时间计为该类型的等待时间
+KINDS = ['network', 'cpu', 'disk', 'sleep']
+
+# 当前正在运行的分析器（没有开启分析时为 None，此时 stage 等函数没有额外开销）
+_profiler = None
+
+@contextmanager
+def stage(name: str, kind: str = 'cpu') -> Iterator[None]:
+    """
+    记录一个处理阶段的耗时：
+
+        with stage('fetch', 'network'):
+            response = session.get(url)
+
+    阶段可以嵌套，每个阶段只统计自身的时间（不包括嵌套的子阶段）。墙钟时间按线程 CPU 时间拆分为
+    CPU 和等待时间，等待时间按阶段类型计为网络等待、磁盘 I/O 或休眠。
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    profiler._enter(name, kind)
+    try:
+        yield
+    finally:
+        profiler._exit()
+
+@contextmanager
+def profile_article(article_url: str) -> Iterator[None]:
+    """
+    记录单篇文章的总耗时，用于找出最慢的文章。文章大小通过 `record_size` 记录。
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    local = profiler._local
+    local.article = [article_url, 0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler._add_article(time.perf_counter() - start, *local.article)
+        local.article = None
+
+def record_size(content: Union[str, bytes]) -> None:
+    """
+    记录当前线程正在处理的文章的大小（UTF-8 编码后的字节数，与调度器和用量日志的单位一致）。
+    没有开启分析时不编码字符串。
+    """
+    profiler = _profiler
+    if profiler is not None:
+        article = getattr(profiler._local, 'article', None)
+        if article is not None:
+            size = len(content.encode('utf-8')) if isinstance(content, str) else len(content)
+            article[1] = max(article[1], size)
+
+class Profiler(object):
+    """
+    流水线运行的性能分析器：
+
+    - 使用 cProfile 分析主线程，结果保存为 `<prefix>.pstats`（可以用 `python -m pstats` 或 snakeviz 查看）；
+    - 可选的定期栈采样（`sys._current_frames`），覆盖所有线程，保存为折叠栈格式的 `<prefix>.collapsed`，
+      可以直接用 flamegraph.pl 或 speedscope 生成火焰图，每个栈的根为当前的处理阶段；
+    - 按阶段拆分墙钟时间（网络等待、CPU、磁盘 I/O、休眠），以及最慢的若干篇文章和它们的大小，
+      输出到标准输出和 `<prefix>.txt`。
+    """
+
+    def __init__(self, output_dir: str, name: str, sample_interval: float = 0.01, top_n: int = 20):
+        """
+        参数：
+        output_dir (str): 输出目录。
+        name (str): 输出文件名的前缀（后面加上开始时间）。
+        sample_interval (float): 栈采样的间隔（秒），为 0 时不采样。
+        top_n (int): 输出最慢的文章数量。
+        """
+        self.prefix = os.path.join(output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 阶段名 -> [类型, 次数, 墙钟时间, CPU 时间]
+        self._stages: Dict[str, list] = {}
+        # 线程 ID -> 当前的阶段名列表（供采样线程读取）
+        self._thread_stages: Dict[int, list] = {}
+        self._articles = []
+        self._articles_seen = 0
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._cprofile = None
+        self._started = 0.0
+        self._started_cpu = 0.0
+        self.wall = 0.0
+
+    def _enter(self, name: str, kind: str) -> None:
+        local = self._local
+        stack = getattr(local, 'stack', None)
+        if stack is None:
+            stack = local.stack = []
+            local.names = self._thread_stages.setdefault(threading.get_ident(), [])
+        # [阶段名, 类型, 开始时间, 开始 CPU 时间, 子阶段墙钟时间, 子阶段 CPU 时间]
+        stack.append([name, kind, time.perf_counter(), time.thread_time(), 0.0, 0.0])
+        local.names.append(name)
+
+    def _exit(self) -> None:
+        local = self._local
+        name, kind, start, start_cpu, child_wall, child_cpu = local.stack.pop()
+        local.names.pop()
+        wall = time.perf_counter() - start
+        cpu = time.thread_time() - start_cpu
+        if local.stack:
+            parent = local.stack[-1]
+            parent[4] += wall
+            parent[5] += cpu
+        with self._lock:
+            entry = self._stages.get(name)
+            if entry is None:
+                entry = self._stages[name] = [kind, 0, 0.0, 0.0]
+            entry[1] += 1
+            entry[2] += max(wall - child_wall, 0.0)
+            entry[3] += max(min(cpu - child_cpu, wall - child_wall), 0.0)
+
+    def _add_article(self, wall: float, article_url: str, size: int) -> None:
+        with self._lock:
+            self._articles_seen += 1
+            item = (wall, self._articles_seen, article_url, size)
+            if len(self._articles) < self.top_n:
+                heapq.heappush(self._articles, item)
+            elif wall > self._articles[0][0]:
+                heapq.heapreplace(self._articles, item)
+
+    # 定期采样所有线程的栈
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.reverse()
+                stages = [f"[{name}]" for name in self._thread_stages.get(thread_id, ())]
+                self._samples[';'.join(stages + frames)] += 1
+
+    def start(self) -> 'Profiler':
+        """
+        开始分析。
+        """
+        import cProfile
+        global _profiler
+        os.makedirs(os.path.dirname(self.prefix) or '.', exist_ok=True)
+        _profiler = self
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        if self.sample_interval > 0:
+            self._sampler = threading.Thread(target=self._sample, name='profiler-sampler', daemon=True)
+            self._sampler.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+        return self
+
+    def stop(self) -> None:
+        """
+        停止分析，写入结果文件并输出报告。
+        """
+        import pstats
+        global _profiler
+        self._cprofile.disable()
+        self.wall = time.perf_counter() - self._started
+        cpu = time.process_time() - self._started_cpu
+        _profiler = None
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+        self._cprofile.dump_stats(self.prefix + '.pstats')
+        if self._samples:
+            with open(self.prefix + '.collapsed', 'w', encoding='utf-8') as file:
+                for stack, count in sorted(self._samples.items()):
+                    file.write(f"{stack} {count}\n")
+
+        report = self.report(cpu)
+        print(report)
+        with open(self.prefix + '.txt', 'w', encoding='utf-8') as file:
+            file.write(report + '\n\n')
+            pstats.Stats(self._cprofile, stream=file).sort_stats('cumulative').print_stats(40)
+
+    def report(self, cpu: Optional[float] = None) -> str:
+        """
+        阶段耗时和最慢文章的报告。
+        """
+        wall = self.wall or (time.perf_counter() - self._started)
+        lines = [f"Profile: {wall:.2f} s wall" + (f", {cpu:.2f} s process CPU" if cpu is not None else "")]
+
+        # 各阶段自身的时间，按墙钟时间从大到小
+        lines.append(f"{'stage':<16}{'kind':<9}{'calls':>8}{'wall s':>10}{'cpu s':>10}{'network s':>11}{'disk s':>10}{'sleep s':>10}")
+        totals = dict.fromkeys(KINDS, 0.0)
+        staged = 0.0
+        for name, (kind, calls, stage_wall, stage_cpu) in sorted(self._stages.items(), key=lambda item: -item[1][2]):
+            # CPU 类型的阶段中的等待（例如：等待 GIL）只计入该阶段的墙钟时间
+            wait = stage_wall - stage_cpu
+            waits = {other: (wait if other == kind else 0.0) for other in ('network', 'disk', 'sleep')}
+            totals['cpu'] += stage_cpu
+            for other, value in waits.items():
+                totals[other] += value
+            staged += stage_wall
+            lines.append(f"{name:<16}{kind:<9}{calls:>8}{stage_wall:>10.2f}{stage_cpu:>10.2f}"
+                         f"{waits['network']:>11.2f}{waits['disk']:>10.2f}{waits['sleep']:>10.2f}")
+        lines.append("Wall time split: " + ', '.join(f"{kind} {totals[kind]:.2f} s" for kind in KINDS) +
+                     f", outside stages {max(wall - staged, 0.0):.2f} s (stages in worker threads overlap the main thread)")
+
+        # 最慢的文章
+        if self._articles:
+            lines.append(f"Slowest {len(self._articles)} of {self._articles_seen} articles:")
+            lines.append(f"{'wall s':>10}{'bytes':>12}  article_url")
+            for article_wall, _, article_url, size in sorted(self._articles, reverse=True):
+                lines.append(f"{article_wall:>10.2f}{size:>12}  {article_url}")
+
+        outputs = [self.prefix + '.pstats', self.prefix + '.txt']
+        if self._samples:
+            outputs.append(self.prefix + '.collapsed')
+        lines.append("Profile written to " + ', '.join(f"'{path}'" for path in outputs))
+        return '\n'.join(lines)
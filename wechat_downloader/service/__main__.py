@@ -0,0 +1,60 @@
+# __main__.py
+import argparse
+import os
+import download
+from storage import ArticleStore, LAYOUTS, COMPRESSIONS
+from service import JobQueue, DEFAULT_RETENTION, serve
+from service.download_jobs import DownloadJobs
+
+# 主程序入口
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local HTTP/JSON API that downloads submitted WeChat articles.')
+
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on (default: 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8700, help='Port to listen on (default: 8700).')
+    parser.add_argument('--downloader-url', type=str, help='WeChat article downloader URL (required by the service converter).')
+    parser.add_argument('--converter', type=str, default='service', choices=['service', 'native'], help='Convert articles through the wechatmp2markdown service or in-process with lxml (default: service).')
+    parser.add_argument('--dir', type=str, required=True, help='Directory to save the downloaded articles.')
+    parser.add_argument('--save-processed', action='store_true', help='Save the processed article in Markdown and Text format.')
+    parser.add_argument('--result-file', type=str, help='Append download results to this CSV file (same format as the streaming result file).')
+    parser.add_argument('--journal', type=str, help='Job journal used to resume pending jobs (default: <dir>/.download_jobs.jsonl).')
+    parser.add_argument('--workers', type=int, default=1, help='Number of download workers (default: 1).')
+    parser.add_argument('--job-retention', type=int, default=DEFAULT_RETENTION, help=f'Number of finished jobs kept in memory and in the journal (default: {DEFAULT_RETENTION}).')
+    parser.add_argument('--min-interval', type=float, default=1.0, help='Minimum seconds between two downloads of a worker (default: 1).')
+    parser.add_argument('--keywords-url', type=str, help='Keywords service URL, downloaded articles are submitted to it (requires --save-processed).')
+    parser.add_argument('--layout', type=str, choices=LAYOUTS, help='Storage layout of the article directory (default: the existing layout, or flat).')
+    parser.add_argument('--compression', type=str, choices=list(COMPRESSIONS), help='Compression of the saved articles (default: the existing compression, or none).')
+    parser.add_argument('--mirror-images', action='store_true', help='Download the images of each article and link them locally.')
+    parser.add_argument('--image-dir', type=str, help='Directory of the mirrored images, shared across articles (default: <dir>/images).')
+    parser.add_argument('--image-workers', type=int, default=8, help='Number of concurrent image downloads (default: 8).')
+    parser.add_argument('--fsync-batch', type=int, default=0, help='Fsync saved articles every N files; 1 fsyncs each file, 0 disables fsync (default: 0).')
+
+    args = parser.parse_args()
+    if args.converter == 'service' and not args.downloader_url:
+        parser.error('--downloader-url is required by the service converter.')
+    if args.keywords_url and not args.save_processed:
+        parser.error('--keywords-url requires --save-processed, the keywords service reads the texified articles.')
+    downloader_url = args.downloader_url if args.converter == 'service' else None
+
+    try:
+        store = ArticleStore.create(args.dir, args.layout, args.compression, fsync_batch=args.fsync_batch)
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    image_mirror = None
+    if args.mirror_images:
+        image_mirror = download.ImageMirror(args.image_dir or os.path.join(args.dir, 'images'), args.image_workers)
+
+    jobs = DownloadJobs(downloader_url, store, args.save_processed, image_mirror, args.result_file,
+                        args.keywords_url, args.min_interval)
+    job_queue = JobQueue(jobs, args.journal or os.path.join(args.dir, '.download_jobs.jsonl'), args.workers, args.job_retention)
+    try:
+        serve(job_queue, args.host, args.port)
+    finally:
+        if image_mirror is not None:
+            image_mirror.close()
+        store.close()
+
+if __name__ == "__main__":
+    main()
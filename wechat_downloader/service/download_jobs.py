@@ -0,0 +1,92 @@
+import csv
+import json
+import os
+import threading
+import time
+import requests
+from downloader import download_article, RESULT_FIELDS
+from storage import ArticleStore
+
+# 转发到关键词服务的超时时间（秒）
+_FORWARD_TIMEOUT = 10
+
+class DownloadJobs(object):
+    """
+    服务模式下处理下载任务：复用每个工作线程的 requests Session，
+    下载结果追加到结果文件中（格式与批量模式的流式结果文件相同），并可转发到关键词服务。
+    """
+
+    def __init__(self, downloader_url: str, store: ArticleStore, save_processed: bool, image_mirror=None,
+                 result_path: str = None, keywords_url: str = None, min_interval: float = 1.0):
+        """
+        :param downloader_url: 文章下载器 URL，为 None 时使用 native 转换器
+        :param store: 保存文章的存储后端
+        :param save_processed: 是否保存处理后的文章
+        :param image_mirror: 图片镜像，为 None 时不下载图片
+        :param result_path: 结果 CSV 文件路径（可以为 None）
+        :param keywords_url: 关键词服务 URL，下载成功后提交分类任务（可以为 None）
+        :param min_interval: 同一工作线程两次下载之间的最小间隔（秒），避免请求过于频繁
+        """
+        self.downloader_url = downloader_url
+        self.store = store
+        self.save_processed = save_processed
+        self.image_mirror = image_mirror
+        self.result_path = result_path
+        self.keywords_url = keywords_url.rstrip('/') if keywords_url else None
+        self.min_interval = min_interval
+        self._local = threading.local()
+        self._result_lock = threading.Lock()
+
+    # 每个工作线程使用各自的 Session，保持连接
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    # 追加一行到结果文件
+    def _append_result(self, row: dict) -> None:
+        with self._result_lock:
+            write_header = not os.path.exists(self.result_path) or os.path.getsize(self.result_path) == 0
+            with open(self.result_path, 'a', newline='', encoding='utf-8') as resultfile:
+                writer = csv.DictWriter(resultfile, fieldnames=['article_url'] + RESULT_FIELDS)
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(row)
+
+    # 提交分类任务到关键词服务
+    def _forward(self, article_url: str, priority: int) -> str:
+        body = json.dumps({'article_url': article_url, 'priority': priority})
+        response = self._session().post(f"{self.keywords_url}/jobs", data=body,
+                                        headers={'Content-Type': 'application/json'}, timeout=_FORWARD_TIMEOUT)
+        response.raise_for_status()
+        return response.json()['jobs'][0]['id']
+
+    def __call__(self, job: dict) -> dict:
+        # 与上一次下载保持最小间隔
+        elapsed = time.monotonic() - getattr(self._local, 'last_download', 0.0)
+        if elapsed < self.min_interval:
+            time.sleep(self.min_interval - elapsed)
+        self._local.last_download = time.monotonic()
+
+        article_url = job['article_url']
+        title, raw_filename, download_time = download_article(
+            self.downloader_url, article_url, self.store, self.save_processed, self.image_mirror, self._session())
+        if not raw_filename:
+            raise RuntimeError(f"Failed to retrieve article: {article_url}")
+        # 返回结果前，确保文章文件已经落盘
+        self.store.flush()
+
+        row = {'article_url': article_url, 'raw_filename': raw_filename,
+               'download_time': download_time, 'article_name': title}
+        if self.result_path:
+            self._append_result(row)
+
+        result = dict(row)
+        if self.keywords_url:
+            try:
+                result['keywords_job'] = self._forward(article_url, job['priority'])
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                print(f"Error: Failed to submit {article_url} to the keywords service: {e}")
+        return result
@@ -0,0 +1,151 @@
+import json
+import queue
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .job_queue import JobQueue, FINISHED_STATES
+
+# 流式接口等待状态变化的超时时间（秒），超时后写入心跳（空行）检查连接是否仍然可用
+_STREAM_POLL_SECONDS = 15
+
+# 心跳行：NDJSON 客户端应忽略空行
+_HEARTBEAT = b'\n'
+
+_JOB_PATH = re.compile(r'^/jobs/([0-9a-f]{32})(/stream)?$')
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    本地 HTTP/JSON 接口：
+
+    - POST /jobs: 提交任务，请求体为 `{"article_url": ..., "priority": 0, "options": {}}`，
+      或通过 `article_urls` 一次提交多篇文章。
+    - GET /jobs/<id>: 查询任务状态。
+    - GET /jobs/<id>/stream: 以 NDJSON 流式返回任务状态，任务结束后关闭连接。
+    - GET /stream: 以 NDJSON 流式返回所有任务的状态变化。
+
+    流式接口在没有状态变化时定期写入空行作为心跳，客户端断开后处理线程随之结束；
+    订阅者因消费过慢被移除时，返回已缓存的状态后关闭连接。
+    - GET /stats: 各状态的任务数量。
+    """
+
+    server_version = 'WeChatArticleService/1.0'
+
+    @property
+    def job_queue(self) -> JobQueue:
+        return self.server.job_queue
+
+    def _send_json(self, status: int, body) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            article_urls = body.get('article_urls') or [body['article_url']]
+            priority = int(body.get('priority', 0))
+            options = body.get('options') or {}
+            if not isinstance(article_urls, list) or not isinstance(options, dict) or \
+                    not all(isinstance(url, str) and url for url in article_urls):
+                raise ValueError('invalid request')
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._send_json(400, {'error': f"Bad request: {e}"})
+            return
+
+        jobs = [self.job_queue.submit(article_url, priority, options) for article_url in article_urls]
+        self._send_json(202, {'jobs': jobs})
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.job_queue.stats())
+            return
+        if self.path == '/stream':
+            self._stream(None)
+            return
+
+        match = _JOB_PATH.match(self.path)
+        if not match:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        if match.group(2):
+            self._stream(match.group(1))
+            return
+
+        job = self.job_queue.get(match.group(1))
+        if job is None:
+            self._send_json(404, {'error': f"Unknown job: {match.group(1)}"})
+        else:
+            self._send_json(200, job)
+
+    # 以 NDJSON 流式返回任务状态（job_id 为 None 时返回所有任务）
+    def _stream(self, job_id) -> None:
+        # 先订阅再读取当前状态，避免遗漏两者之间的变化
+        subscriber = self.job_queue.subscribe()
+        try:
+            if job_id is not None:
+                job = self.job_queue.get(job_id)
+                if job is None:
+                    self._send_json(404, {'error': f"Unknown job: {job_id}"})
+                    return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+            self.end_headers()
+
+            if job_id is not None:
+                self._write_line(job)
+                if job['status'] in FINISHED_STATES:
+                    return
+
+            while True:
+                try:
+                    job = subscriber.get(timeout=_STREAM_POLL_SECONDS)
+                except queue.Empty:
+                    if not self.job_queue.is_subscribed(subscriber):
+                        return
+                    # 对端已断开时写入失败（BrokenPipeError），结束处理线程
+                    self.wfile.write(_HEARTBEAT)
+                    self.wfile.flush()
+                    continue
+                if job_id is not None and job['id'] != job_id:
+                    continue
+                self._write_line(job)
+                if job_id is not None and job['status'] in FINISHED_STATES:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.job_queue.unsubscribe(subscriber)
+
+    def _write_line(self, job: dict) -> None:
+        self.wfile.write((json.dumps(job, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+# 启动 HTTP 服务（阻塞，直到 KeyboardInterrupt）
+def serve(job_queue: JobQueue, host: str, port: int) -> None:
+    """
+    启动任务队列的工作线程和 HTTP 服务。
+
+    :param job_queue: 任务队列
+    :param host: 监听地址
+    :param port: 监听端口
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.job_queue = job_queue
+    job_queue.start()
+    print(f"Serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        server.server_close()
+        job_queue.stop()
@@ -0,0 +1,2 @@
+from .article_store import ArticleStore, LAYOUTS, COMPRESSIONS
+from .migrate import migrate_store
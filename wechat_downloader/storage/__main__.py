@@ -0,0 +1,23 @@
+# __main__.py
+import argparse
+from storage import migrate_store, LAYOUTS, COMPRESSIONS
+
+# 主程序入口
+def main():
+    """
+    将已有的文章目录迁移到新的存储布局
+    """
+    parser = argparse.ArgumentParser(description='Migrate downloaded articles to another storage layout.')
+
+    parser.add_argument('--dir', type=str, required=True, help='Directory containing the downloaded articles.')
+    parser.add_argument('--layout', type=str, default='sharded', choices=LAYOUTS, help='Target storage layout (default: sharded).')
+    parser.add_argument('--compression', type=str, default='none', choices=list(COMPRESSIONS), help='Target compression (default: none).')
+    parser.add_argument('--shard-depth', type=int, default=2, help='Number of hashed subdirectory levels (default: 2).')
+    parser.add_argument('--fsync-batch', type=int, default=64, help='Fsync every N migrated files (default: 64).')
+
+    args = parser.parse_args()
+
+    migrate_store(args.dir, args.layout, args.compression, args.shard_depth, args.fsync_batch)
+
+if __name__ == "__main__":
+    main()
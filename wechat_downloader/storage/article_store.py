@@ -0,0 +1,349 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import List, Optional
+
+# 目录布局描述文件，读写双方据此解析文章文件的实际路径
+LAYOUT_FILE_NAME = '.layout.json'
+
+# 支持的目录布局
+LAYOUTS = ['flat', 'sharded']
+
+# 支持的压缩方式及对应的文件扩展名
+COMPRESSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# 当前进程的 umask（首次打开存储时读取），临时文件默认权限为 0600，替换前恢复为普通文件的权限
+_umask = None
+_umask_lock = threading.Lock()
+
+# 文章文件名的模式（<id>_raw.md、<id>_texified.md、<id>_purified.txt，可能带压缩扩展名）
+ARTICLE_FILE_PATTERN = re.compile(r'^(.+)_(raw\.md|texified\.md|purified\.txt)(\.gz|\.zst)?$')
+
+# 从文章文件名中取出文章 ID（例如：kXAQdC0xxVQqfljamNPTQQ_raw.md -> kXAQdC0xxVQqfljamNPTQQ）
+def article_id_of(file_name: str) -> str:
+    return file_name.rsplit('_', 1)[0] if '_' in file_name else file_name
+
+# 读取当前进程的 umask：优先从 /proc 读取；否则只能通过 os.umask 设置再恢复，只在首次调用时执行一次
+def process_umask() -> int:
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            try:
+                with open('/proc/self/status', 'r') as status:
+                    _umask = next(int(line.split()[1], 8) for line in status if line.startswith('Umask:'))
+            except (OSError, StopIteration, ValueError, IndexError):
+                _umask = os.umask(0o022)
+                os.umask(_umask)
+        return _umask
+
+# 压缩内容
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    if compression == 'zstd':
+        return _import_zstandard().ZstdCompressor(level=3).compress(data)
+    return data
+
+# 解压内容
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == 'gzip':
+        return gzip.decompress(data)
+    if compression == 'zstd':
+        return _import_zstandard().ZstdDecompressor().decompress(data)
+    return data
+
+# 导入 zstandard（仅在使用 zstd 压缩时才需要）
+def _import_zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression requires 'zstandard', please install it first (pip install zstandard).")
+
+class ArticleStore(object):
+    """
+    文章文件的存储后端。
+
+    - flat: 所有文件直接保存在 base_dir 下（原有布局）。
+    - sharded: 按文章 ID 的哈希分散到多级子目录（如 `ab/cd/<id>_raw.md`），避免单个目录过大。
+
+    文件先写入同目录下的临时文件，再通过 `os.replace` 原子替换；fsync 可以按批执行。
+    同一个存储可以由多个线程同时写入和 flush。
+    布局参数保存在 base_dir 下的 `.layout.json` 中，读取方通过 `ArticleStore.open` 自动识别。
+    迁移过程中描述文件还记录迁移前的布局（`previous`），尚未迁移的文件按迁移前的布局查找。
+    """
+
+    def __init__(self, base_dir: str, layout: str = 'flat', compression: str = 'none', shard_depth: int = 2,
+                 fsync_batch: int = 0, previous: Optional['ArticleStore'] = None):
+        """
+        :param base_dir: 文章保存目录
+        :param layout: 目录布局（'flat' 或 'sharded'）
+        :param compression: 压缩方式（'none'、'gzip' 或 'zstd'）
+        :param shard_depth: sharded 布局的子目录层数（每层 256 个目录）
+        :param fsync_batch: 每写入多少个文件执行一次 fsync；1 表示每个文件替换前 fsync，0 表示不 fsync
+        :param previous: 迁移尚未完成时迁移前的存储布局
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unsupported storage layout: {layout}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.base_dir = base_dir
+        self.layout = layout
+        self.compression = compression
+        self.shard_depth = shard_depth
+        self.fsync_batch = fsync_batch
+        self.previous = previous
+        self._file_mode = 0o666 & ~process_umask()
+        self._created_dirs = set()
+        self._pending_fsync: List[str] = []
+        # _lock 保护 _created_dirs 和 _pending_fsync；_flush_lock 保证 flush 返回时之前写入的文件都已 fsync
+        # （包括其他线程正在 fsync 的文件）
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, base_dir: str, fsync_batch: int = 0) -> 'ArticleStore':
+        """
+        按 base_dir 下的布局描述文件打开存储；没有描述文件时视为 flat 布局。
+        """
+        layout = read_layout(base_dir)
+        if layout is None:
+            return cls(base_dir, fsync_batch=fsync_batch)
+        return cls.from_layout(base_dir, layout, fsync_batch)
+
+    @classmethod
+    def from_layout(cls, base_dir: str, layout: dict, fsync_batch: int = 0) -> 'ArticleStore':
+        """
+        根据布局描述（`describe` 的返回值）创建存储。
+        """
+        previous = layout.get('previous')
+        if previous is not None:
+            previous = cls(base_dir, previous['layout'], previous['compression'], previous['shard_depth'])
+        return cls(base_dir, layout['layout'], layout['compression'], layout['shard_depth'], fsync_batch, previous)
+
+    @classmethod
+    def create(cls, base_dir: str, layout: Optional[str] = None, compression: Optional[str] = None, shard_depth: int = 2,
+               fsync_batch: int = 0) -> 'ArticleStore':
+        """
+        打开用于写入的存储。未指定布局时沿用目录中已有的布局；指定的布局与已有布局不一致时报错，
+        需要先使用 `python -m storage` 迁移。
+
+        :raises ValueError: 布局与目录中已有的文件不一致
+        """
+        existing = read_layout(base_dir)
+        if existing is None:
+            store = cls(base_dir, layout or 'flat', compression or 'none', shard_depth, fsync_batch)
+            if store.layout == 'flat' and store.compression == 'none':
+                # 原有的 flat 目录不需要布局描述文件
+                return store
+            if has_flat_articles(base_dir):
+                raise ValueError(f"'{base_dir}' contains articles in the flat layout, migrate it first: python -m storage --dir {base_dir} --layout {store.layout} --compression {store.compression}")
+            write_layout(store)
+            return store
+
+        store = cls.from_layout(base_dir, existing, fsync_batch)
+        if (layout and layout != store.layout) or (compression and compression != store.compression):
+            raise ValueError(f"'{base_dir}' uses the {store.layout} layout with {store.compression} compression, migrate it first: python -m storage --dir {base_dir} --layout {layout or store.layout} --compression {compression or store.compression}")
+        return store
+
+    def describe(self) -> dict:
+        description = {'layout': self.layout, 'compression': self.compression, 'shard_depth': self.shard_depth}
+        if self.previous is not None:
+            description['previous'] = self.previous.describe()
+        return description
+
+    # 文件所在的目录
+    def dir_for(self, file_name: str) -> str:
+        if self.layout == 'flat':
+            return self.base_dir
+        digest = hashlib.sha1(article_id_of(file_name).encode('utf-8')).hexdigest()
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return os.path.join(self.base_dir, *shards)
+
+    def path_for(self, file_name: str) -> str:
+        """
+        文件在当前布局下的实际路径（包含压缩扩展名）。
+        """
+        return os.path.join(self.dir_for(file_name), file_name + COMPRESSIONS[self.compression])
+
+    def resolve(self, file_name: str) -> Optional[str]:
+        """
+        查找文件的实际路径。当前布局下不存在时，回退查找迁移前的布局和 flat 布局下的文件
+        （迁移尚未完成的目录中可能同时存在两种布局）。
+
+        :return: 文件路径，不存在时返回 None
+        """
+        candidates = [self.path_for(file_name)]
+        dirs = [self.dir_for(file_name)]
+        if self.previous is not None:
+            dirs.append(self.previous.dir_for(file_name))
+        dirs.append(self.base_dir)
+        for directory in dirs:
+            for suffix in COMPRESSIONS.values():
+                candidates.append(os.path.join(directory, file_name + suffix))
+        for path in candidates:
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def exists(self, file_name: str) -> bool:
+        return self.resolve(file_name) is not None
+
+    def read(self, file_name: str) -> str:
+        """
+        读取并解压文件内容。
+
+        :raises FileNotFoundError: 文件不存在
+        """
+        path = self.resolve(file_name)
+        if path is None:
+            raise FileNotFoundError(f"Article file '{file_name}' not found in '{self.base_dir}'.")
+        with open(path, 'rb') as f_content:
+            data = f_content.read()
+        return decompress(data, compression_of(path)).decode('utf-8')
+
+    def content_size(self, file_name: str) -> int:
+        """
+        文件内容（解压后）的大小（字节），不需要解压：gzip 读取文件末尾记录的原始大小，zstd 读取帧头中的内容大小。
+
+        :return: 大小，文件不存在时返回 0
+        """
+        path = self.resolve(file_name)
+        if path is None:
+            return 0
+        compression = compression_of(path)
+        if compression == 'none':
+            return os.path.getsize(path)
+
+        size = -1
+        if os.path.getsize(path) >= 18:
+            with open(path, 'rb') as f_content:
+                if compression == 'gzip':
+                    # ISIZE：原始大小对 2^32 取模
+                    f_content.seek(-4, os.SEEK_END)
+                    size = int.from_bytes(f_content.read(4), 'little')
+                else:
+                    size = _import_zstandard().frame_content_size(f_content.read(18))
+        # 很小的文件或帧头中没有记录内容大小时，解压后计算
+        return size if size >= 0 else len(self.read(file_name).encode('utf-8'))
+
+    def write(self, file_name: str, content: str) -> str:
+        """
+        原子写入文件：先写临时文件，再通过 os.replace 替换目标文件。
+
+        :return: 文件的实际路径
+        """
+        target_dir = self.dir_for(file_name)
+        with self._lock:
+            created = target_dir in self._created_dirs
+        if not created:
+            os.makedirs(target_dir, exist_ok=True)
+            with self._lock:
+                self._created_dirs.add(target_dir)
+
+        path = self.path_for(file_name)
+        data = compress(content.encode('utf-8'), self.compression)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{file_name}.", suffix='.tmp', dir=target_dir)
+        try:
+            os.fchmod(fd, self._file_mode)
+            with os.fdopen(fd, 'wb') as f_content:
+                f_content.write(data)
+                if self.fsync_batch == 1:
+                    f_content.flush()
+                    os.fsync(f_content.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if self.fsync_batch > 1:
+            with self._lock:
+                self._pending_fsync.append(path)
+                full = len(self._pending_fsync) >= self.fsync_batch
+            if full:
+                self.flush()
+        elif self.fsync_batch == 1:
+            _fsync_dir(target_dir)
+        return path
+
+    def remove(self, file_name: str) -> None:
+        path = self.resolve(file_name)
+        if path is not None:
+            os.remove(path)
+
+    def flush(self) -> None:
+        """
+        对尚未 fsync 的文件及其所在目录执行 fsync。
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending_fsync = self._pending_fsync, []
+            dirs = set()
+            for path in pending:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                dirs.add(os.path.dirname(path))
+            for directory in dirs:
+                _fsync_dir(directory)
+
+    def close(self) -> None:
+        self.flush()
+
+# 根据扩展名判断文件的压缩方式
+def compression_of(path: str) -> str:
+    for compression, suffix in COMPRESSIONS.items():
+        if suffix and path.endswith(suffix):
+            return compression
+    return 'none'
+
+# 对目录执行 fsync，保证目录项（rename）落盘
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+# 判断目录下是否直接存放着文章文件（flat 布局）
+def has_flat_articles(base_dir: str) -> bool:
+    if not os.path.isdir(base_dir):
+        return False
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if ARTICLE_FILE_PATTERN.match(entry.name) and entry.is_file():
+                return True
+    return False
+
+# 读取目录布局描述文件
+def read_layout(base_dir: str) -> Optional[dict]:
+    path = os.path.join(base_dir, LAYOUT_FILE_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as layout_file:
+        return json.load(layout_file)
+
+# 写入目录布局描述文件
+def write_layout(store: ArticleStore) -> None:
+    os.makedirs(store.base_dir, exist_ok=True)
+    path = os.path.join(store.base_dir, LAYOUT_FILE_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as layout_file:
+        json.dump(store.describe(), layout_file)
+    os.replace(tmp_path, path)
@@ -0,0 +1,153 @@
+import os
+import re
+from typing import Iterator, Tuple
+from .article_store import ArticleStore, ARTICLE_FILE_PATTERN, LAYOUT_FILE_NAME, compression_of, decompress, write_layout
+
+# 分片目录名（sha1 的两位十六进制）
+_SHARD_DIR_PATTERN = re.compile(r'^[0-9a-f]{2}$')
+
+# Markdown 图片链接模式（与 download.mirror_images 中的模式一致）
+_IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+
+# 写入中断时留下的临时文件（`ArticleStore.write` 的 `.<文件名>.<随机串>.tmp` 和布局描述文件的临时文件）
+_TEMP_FILE_PATTERN = re.compile(r'^\..+_(raw\.md|texified\.md|purified\.txt)\..+\.tmp$')
+
+# 遍历 base_dir 顶层以及分片子目录中的文件
+def _iter_files(base_dir: str, shard_depth: int) -> Iterator[os.DirEntry]:
+    def walk(directory: str, depth: int) -> Iterator[os.DirEntry]:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry
+                elif depth < shard_depth and entry.is_dir() and _SHARD_DIR_PATTERN.match(entry.name):
+                    yield from walk(entry.path, depth + 1)
+
+    if os.path.isdir(base_dir):
+        yield from walk(base_dir, 0)
+
+# 遍历目录中所有文章文件，返回（文件名，实际路径）
+def iter_article_files(base_dir: str, shard_depth: int) -> Iterator[Tuple[str, str]]:
+    """
+    遍历 base_dir 顶层以及分片子目录中的文章文件。
+
+    :param base_dir: 文章保存目录
+    :param shard_depth: 需要遍历的分片目录层数
+    :return: （不带压缩扩展名的文件名，实际路径）
+    """
+    for entry in _iter_files(base_dir, shard_depth):
+        match = ARTICLE_FILE_PATTERN.match(entry.name)
+        if match:
+            yield f"{match.group(1)}_{match.group(2)}", entry.path
+
+# 文章移动到其他目录后，重写 Markdown 中的本地图片链接（`--mirror-images` 写入的相对路径）
+def relink_images(content: str, old_dir: str, new_dir: str) -> str:
+    """
+    将 Markdown 中相对于 old_dir 的本地图片链接改写为相对于 new_dir 的路径，远程链接和绝对路径保持不变。
+
+    :param content: Markdown 内容
+    :param old_dir: 文章原来所在的目录
+    :param new_dir: 文章新的目录
+    :return: 改写后的内容
+    """
+    if os.path.normpath(old_dir) == os.path.normpath(new_dir):
+        return content
+
+    def replace(match):
+        link = match.group(2).strip()
+        if not link or '://' in link or link.startswith(('/', '#', 'data:')):
+            return match.group(0)
+        target = os.path.normpath(os.path.join(old_dir, link))
+        return f"![{match.group(1)}]({os.path.relpath(target, new_dir).replace(os.sep, '/')})"
+
+    return _IMAGE_PATTERN.sub(replace, content)
+
+# 删除写入或迁移中断时留下的临时文件
+def remove_temp_files(base_dir: str, shard_depth: int) -> int:
+    """
+    删除 base_dir 顶层以及分片子目录中写入中断时留下的临时文件。
+
+    :param base_dir: 文章保存目录
+    :param shard_depth: 需要遍历的分片目录层数
+    :return: 删除的文件数量
+    """
+    paths = [entry.path for entry in _iter_files(base_dir, shard_depth)
+             if _TEMP_FILE_PATTERN.match(entry.name) or entry.name == LAYOUT_FILE_NAME + '.tmp']
+    for path in paths:
+        os.remove(path)
+    return len(paths)
+
+# 删除迁移后留下的空分片目录
+def remove_empty_shards(base_dir: str, shard_depth: int) -> None:
+    def prune(directory: str, depth: int) -> None:
+        with os.scandir(directory) as entries:
+            subdirs = [entry.path for entry in entries if entry.is_dir() and _SHARD_DIR_PATTERN.match(entry.name)]
+        for subdir in subdirs:
+            if depth + 1 < shard_depth:
+                prune(subdir, depth + 1)
+            if not os.listdir(subdir):
+                os.rmdir(subdir)
+
+    if shard_depth > 0 and os.path.isdir(base_dir):
+        prune(base_dir, 0)
+
+# 迁移文章目录到新的存储布局
+def migrate_store(base_dir: str, layout: str, compression: str, shard_depth: int = 2, fsync_batch: int = 64) -> int:
+    """
+    将目录中已有的文章文件（flat 或其他分片/压缩方式）迁移到指定的存储布局。
+    迁移可以中断后重复执行：布局描述文件先写入（同时记录迁移前的布局），尚未迁移的文件仍可通过回退路径读取，
+    全部迁移完成后再去掉迁移前的布局。
+    原文件在新文件 fsync 之后才删除（每批至少 fsync 一次，fsync_batch 为 0 时按 1 处理），
+    中断时不会丢失文章；开始前删除上次写入或迁移中断时留下的临时文件。
+    移动到其他目录的 Markdown 文件中的本地图片链接改写为相对于新目录的路径。
+
+    :param base_dir: 文章保存目录
+    :param layout: 目标布局（'flat' 或 'sharded'）
+    :param compression: 目标压缩方式（'none'、'gzip' 或 'zstd'）
+    :param shard_depth: 目标分片目录层数
+    :param fsync_batch: 每迁移多少个文件执行一次 fsync（并删除这批文件的原文件）
+    :return: 迁移的文件数量
+    """
+    old_store = ArticleStore.open(base_dir)
+    # 上次迁移中断时，剩余的文件可能仍在更早的布局中
+    previous = old_store.previous or old_store
+    fsync_batch = max(fsync_batch, 1)
+    new_store = ArticleStore(base_dir, layout, compression, shard_depth, fsync_batch, previous)
+
+    # 先收集文件列表，避免遍历过程中看到新写入的文件
+    old_depth = max(store.shard_depth if store.layout == 'sharded' else 0 for store in (old_store, previous))
+    removed = remove_temp_files(base_dir, max(old_depth, new_store.shard_depth if layout == 'sharded' else 0))
+    if removed:
+        print(f"Removed {removed} temporary files left by an interrupted write.")
+    files = [(name, path) for name, path in iter_article_files(base_dir, old_depth)
+             if path != new_store.path_for(name)]
+
+    write_layout(new_store)
+
+    # 新文件 fsync 之后再删除原文件，避免断电时文章在两种布局中都不存在
+    def remove_migrated() -> None:
+        new_store.flush()
+        for source in migrated:
+            os.remove(source)
+        migrated.clear()
+
+    count = 0
+    migrated = []
+    for name, path in files:
+        with open(path, 'rb') as f_content:
+            content = decompress(f_content.read(), compression_of(path)).decode('utf-8')
+        if name.endswith('.md'):
+            content = relink_images(content, os.path.dirname(path), new_store.dir_for(name))
+        new_store.write(name, content)
+        migrated.append(path)
+        if len(migrated) >= fsync_batch:
+            remove_migrated()
+        count += 1
+        if count % 1000 == 0:
+            print(f"Migrated {count}/{len(files)} files...")
+
+    remove_migrated()
+    new_store.previous = None
+    write_layout(new_store)
+    remove_empty_shards(base_dir, old_depth)
+    print(f"Migrated {count} files in '{base_dir}' to the {layout} layout with {compression} compression.")
+    return count
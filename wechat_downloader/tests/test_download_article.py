@@ -0,0 +1,17 @@
+import pytest
+from download.download_article import parse_filename
+
+@pytest.mark.parametrize('header, expected', [
+    (None, 'article_raw.md'),
+    ('attachment', 'article_raw.md'),
+    ('attachment; filename="abc def.md"', 'abc def.md'),
+    # 普通的 filename= 参数：UTF-8 文件名被按 latin-1 解码
+    ('attachment; filename="' + '标题.md'.encode('utf-8').decode('latin-1') + '"', '标题.md'),
+    # 不是 UTF-8 字节的 latin-1 文件名保持不变
+    ('attachment; filename="caf\xe9.md"', 'caf\xe9.md'),
+    # RFC 2231 编码的 filename*= 参数已经解码，不能再次处理
+    ("attachment; filename*=UTF-8''%E6%A0%87%E9%A2%98.md", '标题.md'),
+    ("attachment; filename=\"fallback.md\"; filename*=UTF-8''%E6%A0%87%E9%A2%98.md", '标题.md'),
+])
+def test_parse_filename(header, expected):
+    assert parse_filename(header) == expected
@@ -0,0 +1,42 @@
+import csv
+import json
+import pytest
+import downloader
+from storage import ArticleStore
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    downloaded = []
+
+    def download_article(downloader_url, article_url, store, save_processed, image_mirror=None, session=None):
+        downloaded.append(article_url)
+        if 'bad' in article_url:
+            return None, None, None
+        article_id = article_url.rsplit('/', 1)[-1]
+        store.write(f"{article_id}_raw.md", article_url)
+        return f"title {article_id}", f"{article_id}_raw.md", '2025-01-01 00:00:00'
+
+    monkeypatch.setattr(downloader, 'download_article', download_article)
+    monkeypatch.setattr(downloader.time, 'sleep', lambda seconds: None)
+    return downloaded
+
+def test_process_stream_skips_downloaded_rows(tmp_path, fake_download):
+    rows = [{'article_url': 'https://mp.weixin.qq.com/s/a'},
+            {'article_url': 'https://mp.weixin.qq.com/s/b', 'raw_filename': 'b_raw.md', 'article_name': 'b'},
+            {'article_url': 'https://mp.weixin.qq.com/s/bad'},
+            {'article_url': 'https://mp.weixin.qq.com/s/a'}]
+    input_path = tmp_path / 'list.jsonl'
+    input_path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+    store = ArticleStore(str(tmp_path / 'articles'), fsync_batch=2)
+
+    downloader.process_csv(str(input_path), None, store, False)
+    # 已记录下载结果的行和重复的行不再下载
+    assert fake_download == ['https://mp.weixin.qq.com/s/a', 'https://mp.weixin.qq.com/s/bad']
+    with open(tmp_path / 'list_result.csv', newline='', encoding='utf-8') as file:
+        results = list(csv.DictReader(file))
+    assert [(row['article_url'], row['raw_filename']) for row in results] == \
+           [('https://mp.weixin.qq.com/s/a', 'a_raw.md'), ('https://mp.weixin.qq.com/s/bad', 'Failed')]
+
+    # 再次执行时只重试失败的文章
+    downloader.process_csv(str(input_path), None, store, False)
+    assert fake_download[2:] == ['https://mp.weixin.qq.com/s/bad']
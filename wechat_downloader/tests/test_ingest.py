@@ -0,0 +1,75 @@
+import csv
+import gzip
+import json
+import os
+import ingest
+from ingest import CompletedSet, merge_results
+
+def write_csv(path, fieldnames, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+def test_completed_set():
+    completed = CompletedSet.from_ids(f"u{index}" for index in list(range(1000)) + [1, 2, 3])
+    assert len(completed) == 1000
+    assert 'u0' in completed and 'u999' in completed and 'u1000' not in completed
+    completed.add('u1000')
+    completed.add('u1000')
+    assert 'u1000' in completed and len(completed) == 1001
+    assert 'x' not in CompletedSet() and len(CompletedSet()) == 0
+
+def test_iter_rows_formats(tmp_path):
+    rows = [{'article_url': 'u1', 'category': 'a'}, {'article_url': 'u2', 'category': ''}]
+    write_csv(tmp_path / 'list.csv', ['article_url', 'category'], rows)
+    with gzip.open(tmp_path / 'list.jsonl.gz', 'wt', encoding='utf-8') as file:
+        file.write('\n'.join(json.dumps(row) for row in rows) + '\n\n')
+    assert list(ingest.iter_rows(str(tmp_path / 'list.csv'))) == rows
+    assert list(ingest.iter_rows(str(tmp_path / 'list.jsonl.gz'))) == rows
+    assert ingest.is_rewritable(str(tmp_path / 'list.csv'))
+    assert not ingest.is_rewritable(str(tmp_path / 'list.jsonl.gz')) and not ingest.is_rewritable(ingest.STDIN)
+    assert [len(chunk) for chunk in ingest.iter_chunks(range(5), 2)] == [2, 2, 1]
+
+def test_merge_results_in_lockstep_and_out_of_order(tmp_path):
+    input_file, result_file = str(tmp_path / 'list.csv'), str(tmp_path / 'list_result.csv')
+    write_csv(input_file, ['article_url', 'title'], [{'article_url': f"u{index}", 'title': f"t{index}"} for index in range(6)])
+    # u1、u3 按顺序写入；u0 在 u3 之后（顺序不一致），并带有重复写入的表头
+    with open(result_file, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerows([['article_url', 'raw_filename'], ['u1', 'f1'], ['u3', 'f3'],
+                          ['article_url', 'raw_filename'], ['u0', 'f0']])
+
+    merge_results(input_file, result_file, ['raw_filename', 'download_time'])
+    rows = read_csv(input_file)
+    assert [row['article_url'] for row in rows] == [f"u{index}" for index in range(6)]
+    assert [row['raw_filename'] for row in rows] == ['f0', 'f1', '', 'f3', '', '']
+    assert list(rows[0]) == ['article_url', 'title', 'raw_filename', 'download_time']
+    assert [row['title'] for row in rows] == [f"t{index}" for index in range(6)]
+
+    # 结果文件被清空，再次合并不改变原始文件
+    assert (tmp_path / 'list_result.csv').read_text() == ''
+    merge_results(input_file, result_file, ['raw_filename', 'download_time'])
+    assert read_csv(input_file) == rows
+
+def test_merged_file_is_fsynced_before_replacing_the_input(tmp_path, monkeypatch):
+    input_file, result_file = str(tmp_path / 'list.csv'), str(tmp_path / 'list_result.csv')
+    write_csv(input_file, ['article_url'], [{'article_url': 'u0'}, {'article_url': 'u1'}])
+    write_csv(result_file, ['article_url', 'raw_filename'], [{'article_url': 'u1', 'raw_filename': 'f1'},
+                                                             {'article_url': 'u0', 'raw_filename': 'f0'}])
+    events = []
+    fsync, replace = os.fsync, os.replace
+    monkeypatch.setattr(os, 'fsync', lambda fd: events.append(('fsync', os.path.basename(os.readlink(f"/proc/self/fd/{fd}"))))
+                        or fsync(fd))
+    monkeypatch.setattr(os, 'replace', lambda source, target: events.append(('replace', os.path.basename(source)))
+                        or replace(source, target))
+    merge_results(input_file, result_file, ['raw_filename'])
+
+    # 每次替换之前，临时文件已经 fsync；最后对目录 fsync 后才清空结果文件
+    assert events == [('fsync', 'list.csv.merging'), ('fsync', 'list.csv.merging.2'), ('replace', 'list.csv.merging.2'),
+                      ('replace', 'list.csv.merging'), ('fsync', tmp_path.name)]
+    assert [row['raw_filename'] for row in read_csv(input_file)] == ['f0', 'f1']
@@ -0,0 +1,76 @@
+import errno
+import hashlib
+import os
+import pytest
+import requests
+from download.mirror_images import ImageMirror, extract_image_urls, guess_extension
+
+class FakeResponse(object):
+    def __init__(self, content, status_code=200, content_type='image/png'):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {'content-type': content_type}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+class FakeSession(object):
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        return self.responses[url]
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    session = FakeSession({'https://img/a': FakeResponse(b'a'), 'https://img/b': FakeResponse(b'a'),
+                           'https://img/missing': FakeResponse(b'', 404), 'https://img/full': FakeResponse(b'full'),
+                           'https://img/blocked': FakeResponse(b'<html>', content_type='text/html; charset=utf-8')})
+    monkeypatch.setattr(ImageMirror, '_session', lambda self: session)
+    mirror = ImageMirror(str(tmp_path / 'images'), workers=2)
+    mirror.session = session
+    yield mirror
+    mirror.close()
+
+def test_extract_and_guess_extension():
+    content = '![a](https://img/a) ![b]( https://img/a ) ![c](local.png) ![d](http://img/d)'
+    assert extract_image_urls(content) == ['https://img/a', 'http://img/d']
+    assert guess_extension('https://img/x?wx_fmt=jpeg', None) == 'jpg'
+    assert guess_extension('https://img/x', 'image/webp; q=1') == 'webp'
+    assert guess_extension('https://img/x', None) == 'img'
+
+def test_localize_deduplicates_and_resumes(mirror, tmp_path):
+    markdown_dir = str(tmp_path / 'articles')
+    content = mirror.localize('![x](https://img/a)\n![y](https://img/b)\n![z](https://img/missing)', markdown_dir)
+    digest = hashlib.sha256(b'a').hexdigest()
+    assert content == (f"![x](../images/{digest[:2]}/{digest}.png)\n![y](../images/{digest[:2]}/{digest}.png)\n"
+                       "![z](https://img/missing)")
+
+    # 清单文件中已下载的图片不再请求
+    resumed = ImageMirror(mirror.image_dir)
+    assert resumed.mirror(['https://img/a', 'https://img/b']) == mirror.mirror(['https://img/a', 'https://img/b'])
+    resumed.close()
+    assert sorted(mirror.session.requested) == ['https://img/a', 'https://img/b', 'https://img/missing']
+
+def test_write_errors_fail_only_the_image(mirror, monkeypatch):
+    replace = os.replace
+    full = hashlib.sha256(b'full').hexdigest()
+
+    def failing_replace(source, target):
+        if full in target:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        replace(source, target)
+
+    monkeypatch.setattr(os, 'replace', failing_replace)
+    local_paths = mirror.mirror(['https://img/full', 'https://img/a'])
+    assert list(local_paths) == ['https://img/a']
+    assert not any(name.endswith('.tmp') for _, _, names in os.walk(mirror.image_dir) for name in names)
+
+def test_non_image_responses_are_not_saved(mirror):
+    assert mirror.mirror(['https://img/blocked', 'https://img/a']) == mirror.mirror(['https://img/a'])
+    assert 'https://img/blocked' not in mirror.mirror(['https://img/blocked'])
+    html = hashlib.sha256(b'<html>').hexdigest()
+    assert not any(html in name for _, _, names in os.walk(mirror.image_dir) for name in names)
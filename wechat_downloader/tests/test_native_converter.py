@@ -0,0 +1,18 @@
+import pytest
+from download.native_converter import convert_article_html
+
+@pytest.mark.parametrize('html', ['', '   \n\t', '<!-- deleted -->'])
+def test_empty_pages(html):
+    assert convert_article_html(html) == ('', '')
+
+def test_page_without_content():
+    assert convert_article_html('<html><head><title>T</title></head><body></body></html>') == ('T', '')
+
+def test_article_with_table():
+    html = ('<html><body><h1 id="activity-name"> 标题 </h1><div id="js_content">'
+            '<p>第一段&nbsp;文字</p><table><tr><th>a</th><th>b</th></tr><tr><td>1</td><td>2<br>3</td></tr></table>'
+            '</div></body></html>')
+    title, content = convert_article_html(html)
+    assert title == '标题'
+    assert content.startswith('# 标题\n\n第一段 文字\n\n| a | b |\n')
+    assert '| 1 | 2 3 |' in content
@@ -0,0 +1,175 @@
+import io
+import os
+import stat
+import threading
+from storage import ArticleStore, migrate_store
+from storage.article_store import process_umask, read_layout, write_layout
+import downloader
+
+def test_file_mode_follows_umask(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    path = store.write('a_raw.md', 'content')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~process_umask()
+    assert store.read('a_raw.md') == 'content'
+
+def test_interrupted_migration_resolves_both_layouts(tmp_path):
+    base_dir = str(tmp_path)
+    sharded = ArticleStore.create(base_dir, 'sharded', 'gzip')
+    names = [f"id{index}_raw.md" for index in range(10)]
+    for name in names:
+        sharded.write(name, name)
+
+    # 模拟迁移到 flat 布局时中断：描述文件已改写，只有一半的文件被迁移
+    flat = ArticleStore(base_dir, 'flat', 'none', previous=sharded)
+    write_layout(flat)
+    for name in names[:5]:
+        flat.write(name, sharded.read(name))
+        os.remove(sharded.path_for(name))
+
+    store = ArticleStore.open(base_dir)
+    assert store.layout == 'flat' and store.previous.layout == 'sharded'
+    assert all(store.read(name) == name for name in names)
+
+    # 再次执行迁移完成剩余的文件，并去掉迁移前的布局
+    assert migrate_store(base_dir, 'flat', 'none') == 5
+    store = ArticleStore.open(base_dir)
+    assert store.previous is None and 'previous' not in read_layout(base_dir)
+    assert all(store.read(name) == name for name in names)
+    assert sorted(os.listdir(base_dir)) == sorted(names + ['.layout.json'])
+
+def test_migrate_flat_to_sharded(tmp_path):
+    base_dir = str(tmp_path)
+    flat = ArticleStore(base_dir)
+    for index in range(5):
+        flat.write(f"id{index}_texified.md", str(index))
+    assert migrate_store(base_dir, 'sharded', 'gzip', shard_depth=1) == 5
+    store = ArticleStore.open(base_dir)
+    assert (store.layout, store.compression, store.shard_depth) == ('sharded', 'gzip', 1)
+    assert [store.read(f"id{index}_texified.md") for index in range(5)] == ['0', '1', '2', '3', '4']
+    assert all(store.resolve(f"id{index}_texified.md").endswith('.gz') for index in range(5))
+
+def test_sources_are_removed_only_after_the_new_files_are_fsynced(tmp_path, monkeypatch):
+    base_dir = str(tmp_path)
+    flat = ArticleStore(base_dir)
+    for index in range(5):
+        flat.write(f"id{index}_raw.md", str(index))
+
+    unsynced_sources = []
+    flush = ArticleStore.flush
+    def checked_flush(self):
+        # fsync 之前，尚未落盘的新文件对应的原文件必须仍然存在
+        for path in self._pending_fsync:
+            source = os.path.join(base_dir, os.path.basename(path)[:-len('.gz')])
+            if not os.path.exists(source):
+                unsynced_sources.append(source)
+        flush(self)
+    monkeypatch.setattr(ArticleStore, 'flush', checked_flush)
+    monkeypatch.setattr(os, 'fsync', lambda fd: None)
+
+    assert migrate_store(base_dir, 'sharded', 'gzip', shard_depth=1, fsync_batch=2) == 5
+    assert unsynced_sources == []
+    assert not any(name.endswith('.md') for name in os.listdir(base_dir))
+
+def test_migration_removes_leftover_temp_files(tmp_path):
+    base_dir = str(tmp_path)
+    store = ArticleStore.create(base_dir, 'sharded', 'none', shard_depth=1)
+    path = store.write('id_raw.md', 'content')
+    leftover = os.path.join(os.path.dirname(path), '.id2_raw.md.k3j_x9.tmp')
+    with open(leftover, 'w') as file:
+        file.write('partial')
+    with open(os.path.join(base_dir, '.layout.json.tmp'), 'w') as file:
+        file.write('{')
+
+    assert migrate_store(base_dir, 'flat', 'none') == 1
+    assert sorted(os.listdir(base_dir)) == ['.layout.json', 'id_raw.md']
+
+def test_migration_rewrites_local_image_links(tmp_path):
+    base_dir = str(tmp_path)
+    content = '![a](images/ab/abc.png) ![b](https://img/b) ![c](/abs/c.png)'
+    ArticleStore(base_dir).write('id_raw.md', content)
+
+    migrate_store(base_dir, 'sharded', 'none', shard_depth=2)
+    store = ArticleStore.open(base_dir)
+    assert store.read('id_raw.md') == '![a](../../images/ab/abc.png) ![b](https://img/b) ![c](/abs/c.png)'
+
+    migrate_store(base_dir, 'sharded', 'none', shard_depth=1)
+    assert ArticleStore.open(base_dir).read('id_raw.md') == '![a](../images/ab/abc.png) ![b](https://img/b) ![c](/abs/c.png)'
+    migrate_store(base_dir, 'flat', 'gzip')
+    assert ArticleStore.open(base_dir).read('id_raw.md') == content
+
+class CountingStore(ArticleStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += bool(self._pending_fsync)
+        super().flush()
+
+def test_result_rows_follow_fsync_batches(tmp_path):
+    store = CountingStore(str(tmp_path), fsync_batch=3)
+    resultfile = io.StringIO()
+    writer = downloader.ResultWriter(resultfile, store, ['article_url', 'raw_filename'])
+    written = []
+    for index in range(7):
+        store.write(f"id{index}_raw.md", str(index))
+        writer.add({'article_url': f"u{index}", 'raw_filename': f"id{index}_raw.md"})
+        written.append(resultfile.getvalue().count('\n'))
+    # 结果行按批写入（表头 + 每批 3 行），写入时对应的文章文件都已经 fsync
+    assert written == [0, 0, 4, 4, 4, 7, 7]
+    writer.flush()
+    assert resultfile.getvalue().count('\n') == 8
+    assert store._pending_fsync == []
+    # 每批 fsync 一次，而不是每篇文章一次
+    assert store.flushes == 3
+
+def test_content_size_of_compressed_files(tmp_path):
+    content = '内容' * 1000 + 'x'
+    for compression in ('none', 'gzip', 'zstd'):
+        store = ArticleStore(str(tmp_path / compression), 'sharded', compression)
+        store.write('id_texified.md', content)
+        store.write('empty_texified.md', '')
+        assert store.content_size('id_texified.md') == len(content.encode('utf-8'))
+        assert store.content_size('empty_texified.md') == 0
+        assert store.content_size('missing_texified.md') == 0
+
+def test_concurrent_writes_and_flushes(tmp_path, monkeypatch):
+    store = ArticleStore(str(tmp_path), 'sharded', fsync_batch=3)
+    synced = []
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd))
+
+    def work(worker):
+        for index in range(50):
+            store.write(f"w{worker}-{index}_raw.md", str(index))
+            store.flush()
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store._pending_fsync == []
+    assert all(store.read(f"w{worker}-49_raw.md") == '49' for worker in range(8))
+
+def test_flush_waits_for_files_fsynced_by_another_thread(tmp_path, monkeypatch):
+    store = ArticleStore(str(tmp_path), fsync_batch=2)
+    started, release = threading.Event(), threading.Event()
+    fsync = os.fsync
+    def slow_fsync(fd):
+        started.set()
+        release.wait(5)
+        fsync(fd)
+    monkeypatch.setattr(os, 'fsync', slow_fsync)
+
+    store.write('a_raw.md', 'a')
+    first = threading.Thread(target=store.flush)
+    first.start()
+    started.wait(5)
+    # 另一个线程的 flush 没有待 fsync 的文件，但必须等待正在 fsync 的文件落盘后才返回
+    second = threading.Thread(target=store.flush)
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+    release.set()
+    first.join()
+    second.join()
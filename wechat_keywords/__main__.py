@@ -1,5 +1,5 @@
 # __main__.py
-from data_processory import main
+from data_processor import main
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
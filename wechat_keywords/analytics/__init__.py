@@ -0,0 +1,3 @@
+from .analyze import analyze, KeywordAnalytics
+from .normalize import cluster_keywords, normalize_keyword, load_synonyms, KEYWORD_SUFFIXES
+from .vocabulary import Vocabulary, KeywordTable, load_keyword_table
@@ -0,0 +1,25 @@
+# __main__.py
+import argparse
+from analytics import analyze
+
+# 主程序入口
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate keywords of processed articles per category and month.")
+
+    parser.add_argument('--base_path', type=str, required=True, help="Base path of csv file.")
+    parser.add_argument('--csv_file_name', type=str, required=True, help="Csv file name ('.gz' and '.jsonl' are supported).")
+    parser.add_argument('--output_dir', type=str, required=True, help="Directory to write the analytics tables to.")
+    parser.add_argument('--top_n', type=int, default=20, help="Number of keywords per category (default: 20).")
+    parser.add_argument('--synonyms', type=str, help="File of comma separated synonyms per line, the first one is the canonical form.")
+    parser.add_argument('--no_normalize', action='store_true', help="Do not merge near-duplicate keywords.")
+
+    args = parser.parse_args()
+
+    try:
+        analyze(args.base_path, args.csv_file_name, args.output_dir, args.top_n, not args.no_normalize, args.synonyms)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
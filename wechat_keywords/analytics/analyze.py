@@ -0,0 +1,195 @@
+import csv
+import os
+import time
+from typing import Dict, List, Optional
+from .normalize import cluster_keywords, load_synonyms
+from .vocabulary import KeywordTable, import_numeric, load_keyword_table
+
+class KeywordAnalytics(object):
+    """
+    关键词的语料级统计。基于文章×关键词的稀疏矩阵（每篇文章中的关键词只计一次）计算：
+
+    - keyword_category: 关键词×分类的文章数矩阵；
+    - keyword_month: 关键词×月份（`download_time`）的文章数矩阵；
+    - cooccurrence: 关键词共现矩阵（同时出现在一篇文章中的文章数，对角线为 0）。
+
+    开启归一化时，近似重复的关键词先聚类为规范形式（见 `cluster_keywords`），矩阵的列为规范形式。
+    """
+
+    def __init__(self, table: KeywordTable, normalize: bool = True, synonyms: Optional[Dict[str, str]] = None):
+        """
+        参数：
+        table (KeywordTable): 整数编码的关键词表。
+        normalize (bool): 是否聚类近似重复的关键词。
+        synonyms (Dict[str, str], 可选): `load_synonyms` 返回的同义词映射。
+        """
+        np, sparse = import_numeric()
+        self._np = np
+
+        indices = np.asarray(table.indices, dtype=np.int32)
+        indptr = np.asarray(table.indptr, dtype=np.int64)
+        raw_counts = np.bincount(indices, minlength=len(table.keywords))
+
+        # 关键词编号 -> 规范形式编号
+        if normalize:
+            mapping, self.keywords = cluster_keywords(table.keywords, raw_counts, synonyms)
+            mapping = np.asarray(mapping, dtype=np.int32)
+        else:
+            mapping, self.keywords = np.arange(len(table.keywords), dtype=np.int32), list(table.keywords)
+        self._mapping = mapping
+        self._raw_keywords = table.keywords
+        self._raw_counts = raw_counts
+
+        # 文章×关键词（合并为规范形式后，同一篇文章中重复的关键词只计一次）
+        articles = len(table)
+        matrix = sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), mapping[indices], indptr),
+                                   shape=(articles, len(self.keywords)))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        keyword_articles = matrix.T.tocsr()
+
+        # 文章×分类、文章×月份（未知月份的文章不计入趋势）
+        rows = np.arange(articles)
+        categories = np.asarray(table.categories, dtype=np.int32)
+        self.categories = list(table.category_names)
+        category_matrix = sparse.csr_matrix((np.ones(articles, dtype=np.int32), (rows, categories)),
+                                            shape=(articles, len(self.categories)))
+
+        months = np.asarray(table.months, dtype=np.int32)
+        known = months >= 0
+        # 月份按时间顺序排列
+        order = np.asarray(sorted(range(len(table.month_names)), key=table.month_names.__getitem__), dtype=np.int32)
+        self.months = [table.month_names[index] for index in order]
+        month_columns = np.empty(len(order), dtype=np.int32)
+        month_columns[order] = np.arange(len(order), dtype=np.int32)
+        month_matrix = sparse.csr_matrix((np.ones(int(known.sum()), dtype=np.int32), (rows[known], month_columns[months[known]])),
+                                         shape=(articles, len(self.months)))
+
+        self.articles = articles
+        self.counts = np.asarray(matrix.sum(axis=0)).ravel()
+        self.category_sizes = np.bincount(categories, minlength=len(self.categories))
+        self.keyword_category = (keyword_articles @ category_matrix).tocsc()
+        self.keyword_month = (keyword_articles @ month_matrix).tocsr()
+
+        cooccurrence = (keyword_articles @ matrix).tocsr()
+        cooccurrence.setdiag(0)
+        cooccurrence.eliminate_zeros()
+        self.cooccurrence = cooccurrence
+
+    # 数组中最大的 n 个值的下标（按值从大到小）
+    def _top(self, values, n: int):
+        np = self._np
+        if n < len(values):
+            candidates = np.argpartition(-values, n)[:n]
+        else:
+            candidates = np.arange(len(values))
+        return candidates[np.lexsort((candidates, -values[candidates]))]
+
+    def top_by_category(self, top_n: int = 20) -> List[dict]:
+        """
+        每个分类中出现最多的关键词。
+
+        返回：
+        List[dict]: 每行包含 category、rank、keyword、count（文章数）和 share（占该分类文章数的比例）。
+        """
+        results = []
+        for column, category in enumerate(self.categories):
+            start, end = self.keyword_category.indptr[column], self.keyword_category.indptr[column + 1]
+            keywords = self.keyword_category.indices[start:end]
+            counts = self.keyword_category.data[start:end]
+            for rank, position in enumerate(self._top(counts, top_n), 1):
+                count = int(counts[position])
+                results.append({'category': category, 'rank': rank, 'keyword': self.keywords[keywords[position]],
+                                'count': count, 'share': round(count / self.category_sizes[column], 4)})
+        return results
+
+    def trends(self, top_n: int = 50) -> List[dict]:
+        """
+        出现最多的关键词每月出现的文章数。
+
+        返回：
+        List[dict]: 每行包含 keyword、total 以及每个月份（`YYYY-MM`）的文章数。
+        """
+        results = []
+        for keyword in self._top(self.counts, top_n):
+            row = {'keyword': self.keywords[keyword], 'total': int(self.counts[keyword])}
+            row.update(zip(self.months, self.keyword_month[keyword].toarray().ravel().tolist()))
+            results.append(row)
+        return results
+
+    def top_pairs(self, top_n: int = 50) -> List[dict]:
+        """
+        共现次数最多的关键词对。
+
+        返回：
+        List[dict]: 每行包含 keyword_a、keyword_b 和 count（同时出现的文章数）。
+        """
+        np = self._np
+        upper = self.cooccurrence.tocoo()
+        mask = upper.row < upper.col
+        rows, columns, counts = upper.row[mask], upper.col[mask], upper.data[mask]
+        return [{'keyword_a': self.keywords[rows[position]], 'keyword_b': self.keywords[columns[position]],
+                 'count': int(counts[position])} for position in self._top(np.asarray(counts), top_n)]
+
+    def clusters(self) -> List[dict]:
+        """
+        被合并的近似重复关键词（只包含多于一个关键词的类）。
+
+        返回：
+        List[dict]: 每行包含 canonical（规范形式）、keyword 和 count（合并前出现的文章数）。
+        """
+        np = self._np
+        sizes = np.bincount(self._mapping, minlength=len(self.keywords))
+        merged = np.flatnonzero(sizes[self._mapping] > 1)
+        merged = merged[np.lexsort((-self._raw_counts[merged], self._mapping[merged]))]
+        return [{'canonical': self.keywords[self._mapping[index]], 'keyword': self._raw_keywords[index],
+                 'count': int(self._raw_counts[index])} for index in merged]
+
+# 将统计结果写入 CSV 文件
+def write_table(path: str, rows: List[dict], fieldnames: List[str]) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def analyze(base_path: str, csv_file_name: str, output_dir: str, top_n: int = 20, normalize: bool = True,
+            synonyms_path: Optional[str] = None) -> KeywordAnalytics:
+    """
+    统计文章列表中的关键词，在输出目录中生成：
+
+    - category_keywords.csv: 每个分类出现最多的 top_n 个关键词；
+    - keyword_trends.csv: 出现最多的关键词每月出现的文章数；
+    - keyword_pairs.csv: 共现次数最多的关键词对；
+    - keyword_clusters.csv: 被合并的近似重复关键词及其规范形式。
+
+    参数：
+    base_path (str): CSV 文件所在的目录。
+    csv_file_name (str): CSV 文件名（支持 gzip 压缩和 JSONL 格式）。
+    output_dir (str): 输出目录。
+    top_n (int): 每个分类输出的关键词数量（趋势表和关键词对为其 5 倍）。
+    normalize (bool): 是否聚类近似重复的关键词。
+    synonyms_path (str, 可选): 同义词文件。
+
+    返回：
+    KeywordAnalytics: 统计结果。
+    """
+    start = time.perf_counter()
+    table = load_keyword_table(os.path.join(base_path, csv_file_name))
+    loaded = time.perf_counter()
+    print(f"Parsed {len(table)} articles with {len(table.keywords)} distinct keywords in {loaded - start:.1f} s.")
+
+    synonyms = load_synonyms(synonyms_path) if synonyms_path else None
+    analytics = KeywordAnalytics(table, normalize, synonyms)
+    print(f"Built matrices of {len(analytics.keywords)} keywords, {len(analytics.categories)} categories and "
+          f"{len(analytics.months)} months in {time.perf_counter() - loaded:.1f} s.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    write_table(os.path.join(output_dir, 'category_keywords.csv'), analytics.top_by_category(top_n),
+                ['category', 'rank', 'keyword', 'count', 'share'])
+    write_table(os.path.join(output_dir, 'keyword_trends.csv'), analytics.trends(top_n * 5),
+                ['keyword', 'total'] + analytics.months)
+    write_table(os.path.join(output_dir, 'keyword_pairs.csv'), analytics.top_pairs(top_n * 5),
+                ['keyword_a', 'keyword_b', 'count'])
+    write_table(os.path.join(output_dir, 'keyword_clusters.csv'), analytics.clusters(), ['canonical', 'keyword', 'count'])
+    print(f"Wrote keyword analytics to '{output_dir}' in {time.perf_counter() - start:.1f} s.")
+    return analytics
@@ -0,0 +1,125 @@
+import re
+import unicodedata
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+# 泛化后缀及去掉后缀后至少保留的字符数：去掉后缀后仍在词表中的关键词视为同一个关键词
+# （例如：人工智能领域 -> 人工智能，高血压病 -> 高血压）。
+# 病、症去掉后，两个字的词干通常是另一个概念（心脏病 -> 心脏，强迫症 -> 强迫），因此要求词干至少三个字
+# （阿尔茨海默病 -> 阿尔茨海默）；系统、技术等后缀去掉后可能改变词义（操作系统 -> 操作），不合并，
+# 需要时写在同义词文件中
+KEYWORD_SUFFIXES = {'领域': 2, '行业': 2, '产业': 2, '病': 3, '症': 3}
+
+# 归一化时去掉的空白和连接符
+_SEPARATOR_PATTERN = re.compile(r'[\s\-_·•/]+')
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    关键词的归一化形式：全角转半角（NFKC）、英文转小写、去掉空白和连接符。
+    """
+    return _SEPARATOR_PATTERN.sub('', unicodedata.normalize('NFKC', keyword).lower())
+
+def load_synonyms(path: str) -> Dict[str, str]:
+    """
+    读取同义词文件：每行为逗号分隔的一组同义词，第一个为规范形式，`#` 开头的行为注释。
+
+    返回：
+    Dict[str, str]: 同义词（归一化形式）到规范形式的映射。
+    """
+    synonyms = {}
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            words = [word.strip() for word in line.split(',') if word.strip()]
+            for word in words:
+                synonyms[normalize_keyword(word)] = words[0]
+    return synonyms
+
+def cluster_keywords(keywords: Sequence[str], counts: Sequence[int], synonyms: Optional[Dict[str, str]] = None,
+                     suffixes: Mapping[str, int] = KEYWORD_SUFFIXES) -> Tuple[List[int], List[str]]:
+    """
+    将近似重复的关键词聚类为规范形式。以下关键词归为一类：
+
+    - 归一化形式相同（例如：`GPT-4` 和 `gpt4`）；
+    - 去掉泛化后缀或英文复数后与另一个关键词相同，且去掉后的关键词出现的文章数不少于原关键词
+      （例如：`人工智能领域` 和 `人工智能`，`高血压病` 和 `高血压`，`LLMs` 和 `LLM`）；
+    - 在同义词文件的同一行中。
+
+    每类的规范形式为同义词文件中指定的形式，否则为出现次数最多的关键词。
+
+    参数：
+    keywords (Sequence[str]): 词表（按编号排列的关键词）。
+    counts (Sequence[int]): 每个关键词出现的文章数。
+    synonyms (Dict[str, str], 可选): `load_synonyms` 返回的同义词映射。
+    suffixes (Mapping[str, int], 可选): 泛化后缀及去掉后缀后至少保留的字符数。
+
+    返回：
+    Tuple[List[int], List[str]]: 每个关键词所属类的编号，以及每类的规范形式。
+    """
+    parent = list(range(len(keywords)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def union(a: int, b: int) -> None:
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    # 归一化形式相同
+    normalized = [normalize_keyword(keyword) for keyword in keywords]
+    first = {}
+    for index, form in enumerate(normalized):
+        union(index, first.setdefault(form, index))
+
+    # 归一化形式的文章数（合并前）
+    form_counts = {}
+    for index, form in enumerate(normalized):
+        form_counts[form] = form_counts.get(form, 0) + counts[index]
+
+    # 去掉后缀或英文复数后相同，且去掉后的形式更常见（避免 news -> new 之类偶然的合并）
+    for index, form in enumerate(normalized):
+        bases = [form[:-len(suffix)] for suffix, min_length in suffixes.items()
+                 if form.endswith(suffix) and len(form) - len(suffix) >= min_length]
+        if form.isascii() and form.endswith('s') and len(form) > 3:
+            bases.append(form[:-1])
+        for base_form in bases:
+            base = first.get(base_form)
+            if base is not None and form_counts[base_form] >= form_counts[form]:
+                union(index, base)
+
+    # 同义词
+    names = {}
+    if synonyms:
+        groups = {}
+        for index, form in enumerate(normalized):
+            canonical = synonyms.get(form)
+            if canonical is not None:
+                union(index, groups.setdefault(canonical, index))
+        for canonical, index in groups.items():
+            names[find(index)] = canonical
+
+    # 每类的规范形式：出现次数最多的关键词（相同时取较短的）
+    best = {}
+    for index in range(len(keywords)):
+        root = find(index)
+        current = best.get(root)
+        if current is None or (-counts[index], len(keywords[index]), keywords[index]) < \
+                (-counts[current], len(keywords[current]), keywords[current]):
+            best[root] = index
+
+    cluster_ids = {}
+    canonical_names = []
+    mapping = []
+    for index in range(len(keywords)):
+        root = find(index)
+        cluster = cluster_ids.get(root)
+        if cluster is None:
+            cluster = cluster_ids[root] = len(canonical_names)
+            canonical_names.append(names.get(root) or keywords[best[root]])
+        mapping.append(cluster)
+    return mapping, canonical_names
@@ -0,0 +1,162 @@
+import importlib.util
+import re
+from array import array
+from typing import Iterable, List, Optional
+from keywords import parse_keywords
+from ingest.readers import detect_format
+import ingest
+
+# `download_time` 中的月份（例如：2025-01-02 10:00:00 -> 2025-01）
+_MONTH_PATTERN = re.compile(r'^(\d{4}-\d{2})')
+
+# 使用 pyarrow 读取时需要的列
+_COLUMNS = ['keywords', 'category', 'download_time']
+
+# 导入 numpy 和 scipy.sparse（仅在统计关键词时才需要）
+def import_numeric():
+    try:
+        import numpy
+        import scipy.sparse
+        return numpy, scipy.sparse
+    except ImportError:
+        raise RuntimeError("Keyword analytics requires 'numpy' and 'scipy', please install them first (pip install numpy scipy).")
+
+class Vocabulary(object):
+    """
+    字符串到连续整数编号的映射（驻留表），编号按首次出现的顺序分配。
+    """
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._ids = {}
+        self.values: List[str] = []
+        for value in values:
+            self.add(value)
+
+    def add(self, value: str) -> int:
+        """
+        返回字符串的编号，不存在时分配新的编号。
+        """
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def get(self, value: str, default: int = -1) -> int:
+        return self._ids.get(value, default)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._ids
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+class KeywordTable(object):
+    """
+    整数编码的文章关键词表（CSR 格式，只包含有关键词的文章）：
+
+    - 第 i 篇文章的关键词编号为 `indices[indptr[i]:indptr[i + 1]]`，对应 `keywords` 中的关键词；
+    - 分类编号为 `categories[i]`，对应 `category_names`；
+    - 月份编号为 `months[i]`（`download_time` 未知时为 -1），对应 `month_names`。
+    """
+
+    def __init__(self, keywords: List[str], indices, indptr, category_names: List[str], categories,
+                 month_names: List[str], months):
+        self.keywords = keywords
+        self.indices = indices
+        self.indptr = indptr
+        self.category_names = category_names
+        self.categories = categories
+        self.month_names = month_names
+        self.months = months
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+# 逐行解析文章列表（支持所有输入格式）
+def _load_rows(rows: Iterable[dict]) -> KeywordTable:
+    keywords, categories, months = Vocabulary(), Vocabulary(), Vocabulary()
+    indptr, indices = array('q', [0]), array('i')
+    category_ids, month_ids = array('i'), array('i')
+    add_keyword = keywords.add
+
+    for row in rows:
+        values = parse_keywords(row.get('keywords', ''))
+        if not values:
+            continue
+        # 同一篇文章中重复的关键词只计一次
+        indices.extend({add_keyword(value): None for value in values})
+        indptr.append(len(indices))
+        category_ids.append(categories.add((row.get('category') or '').strip()))
+        match = _MONTH_PATTERN.match(row.get('download_time') or '')
+        month_ids.append(months.add(match.group(1)) if match else -1)
+
+    return KeywordTable(keywords.values, indices, indptr, categories.values, category_ids, months.values, month_ids)
+
+# 使用 pyarrow 按列解析 CSV 文件（多线程读取，关键词数组按字符串整列切分后字典编码）
+def _load_csv_with_arrow(path: str) -> KeywordTable:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    np, _ = import_numeric()
+
+    table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+        include_columns=_COLUMNS, include_missing_columns=True, column_types={column: pa.string() for column in _COLUMNS}))
+
+    # 去掉写入时添加的外层引号；不含转义字符的字符串数组直接切分，其余的（很少）逐个解析
+    values = pc.utf8_trim(pc.fill_null(table['keywords'].combine_chunks(), ''), '"')
+    simple = pc.and_(pc.and_(pc.starts_with(values, '["'), pc.ends_with(values, '"]')),
+                     pc.invert(pc.match_substring(values, '\\')))
+    other = pc.and_(pc.invert(simple), pc.greater(pc.utf8_length(values), 2))
+    parts = [(table.filter(simple), pc.split_pattern_regex(pc.utf8_slice_codeunits(pc.filter(values, simple), 2, -2), r'"\s*,\s*"'))]
+    if pc.any(other).as_py():
+        parts.append((table.filter(other), pa.array([parse_keywords(value) for value in pc.filter(values, other).to_pylist()],
+                                                     type=pa.list_(pa.string()))))
+    table = pa.concat_tables([part for part, _ in parts])
+    lists = pa.concat_arrays([part_lists for _, part_lists in parts])
+
+    # 展开为（文章，关键词）对，去掉空关键词和同一篇文章中重复的关键词
+    flat = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+    parents = pc.list_parent_indices(lists)
+    keep = pc.not_equal(flat, '')
+    encoded = pc.dictionary_encode(pc.filter(flat, keep))
+    indices = encoded.indices.to_numpy().astype(np.int32)
+    parents = pc.filter(parents, keep).to_numpy().astype(np.int64)
+    size = max(len(encoded.dictionary), 1)
+    pairs = np.sort(parents * size + indices)
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])] if len(pairs) else pairs
+    parents, indices = pairs // size, (pairs % size).astype(np.int32)
+
+    # 只保留有关键词的文章
+    lengths = np.bincount(parents, minlength=len(table))
+    rows = np.flatnonzero(lengths)
+    indptr = np.concatenate([[0], np.cumsum(lengths[rows])]).astype(np.int64)
+
+    categories = pc.dictionary_encode(pc.utf8_trim_whitespace(pc.fill_null(table['category'].combine_chunks(), '')))
+    download_time = pc.fill_null(table['download_time'].combine_chunks(), '')
+    months = pc.dictionary_encode(pc.if_else(pc.match_substring_regex(download_time, _MONTH_PATTERN.pattern),
+                                             pc.utf8_slice_codeunits(download_time, 0, 7), pa.scalar(None, pa.string())))
+
+    return KeywordTable(encoded.dictionary.to_pylist(), indices, indptr,
+                        categories.dictionary.to_pylist(), categories.indices.to_numpy().astype(np.int32)[rows],
+                        months.dictionary.to_pylist(), pc.fill_null(months.indices, -1).to_numpy().astype(np.int32)[rows])
+
+def load_keyword_table(path: str, input_format: Optional[str] = None) -> KeywordTable:
+    """
+    解析文章列表中所有文章的 `keywords` 列，构建整数编码的关键词表。
+    安装了 pyarrow 时按列读取 CSV 文件，否则逐行解析（JSONL 格式和标准输入也逐行解析）。
+
+    参数：
+    path (str): 文章列表路径（支持 gzip 压缩，'-' 表示标准输入）。
+    input_format (str, 可选): 输入格式（'csv' 或 'jsonl'），默认根据扩展名判断。
+
+    返回：
+    KeywordTable: 关键词表。
+    """
+    input_format = input_format or detect_format(path)
+    if path != ingest.STDIN and input_format == 'csv' and importlib.util.find_spec('pyarrow') is not None:
+        return _load_csv_with_arrow(path)
+    return _load_rows(ingest.iter_rows(path, input_format))
@@ -1,3 +1,40 @@
+from importlib import import_module
 from .base import LLMApi, same
-from .ollama import OllamaApi
-from .openai import OpenAIApi
+from .usage import track_usage, record_usage, new_usage, add_usage
+
+# LLM API 类型及其实现（模块名，类名）。具体实现在首次使用时才导入，
+# 避免每次启动都加载 openai 和 ollama 两个 SDK
+API_TYPES = {
+    'openai': ('.openai', 'OpenAIApi'),
+    'ollama': ('.ollama', 'OllamaApi'),
+}
+
+# 按类名延迟导入具体实现（from api import OpenAIApi 仍然可用）
+def __getattr__(name: str):
+    for module_name, class_name in API_TYPES.values():
+        if class_name == name:
+            return getattr(import_module(module_name, __name__), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def create_llm_api(api_type: str, api_url: str, api_key: str, model: str, keep_alive: str = None) -> LLMApi:
+    """
+    根据 api_type 创建对应的 LLM API 实例，只导入所选后端的 SDK。
+
+    参数：
+    api_type (str): LLM API 类型（'openai' 或 'ollama'）。
+    api_url (str): LLM API 的 URL。
+    api_key (str): LLM API 的 API 密钥（ollama 不需要）。
+    model (str): 使用的模型名称。
+    keep_alive (str, 可选): 模型在服务器内存中保留的时间（仅 ollama 支持）。
+
+    返回：
+    LLMApi: LLM API 实例。
+    """
+    if api_type not in API_TYPES:
+        raise ValueError(f"Unsupported LLM API type: {api_type}")
+
+    module_name, class_name = API_TYPES[api_type]
+    api_class = getattr(import_module(module_name, __name__), class_name)
+    if api_type == 'ollama':
+        return api_class(api_url, model, keep_alive)
+    return api_class(api_url, api_key, model)
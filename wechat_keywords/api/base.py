@@ -1,3 +1,4 @@
+import threading
 from typing import Callable
 
 class LLMApi(object):
@@ -5,7 +6,9 @@ class LLMApi(object):
     一个简化的 LLM API 类，用于生成基于输入提示的文本输出。
 
     方法：
-    - generate(prompt: str, handle_output: Callable[[str], str]) -> str: 发送生成请求并处理输出。
+    - generate(prompt: str, handle_output: Callable[[str], str], options: dict) -> str: 发送生成请求并处理输出。
+    - last_response -> dict: 当前线程最近一次请求的响应信息。
+    - warm_up() -> None: 预先加载模型（服务模式启动时调用）。
     """
     
     def __init__(self, api_url: str, api_key: str, model: str):
@@ -20,14 +23,28 @@ class LLMApi(object):
         self.api_url = api_url
         self.api_key = api_key
         self.model = model
+        self._local = threading.local()
 
-    def generate(self, prompt: str, handle_output: Callable[[str], str]) -> str:
+    @property
+    def last_response(self) -> dict:
+        """
+        当前线程最近一次请求的响应信息，例如 `token_logprobs`（输出中每个 token 及其对数概率的列表，
+        未请求或服务器不支持时为 None）、`prompt_tokens`、`completion_tokens` 和 `seconds`。
+        """
+        return getattr(self._local, 'response', {})
+
+    # 记录当前线程最近一次请求的响应信息
+    def _record_response(self, **info) -> None:
+        self._local.response = info
+
+    def generate(self, prompt: str, handle_output: Callable[[str], str], options: dict = None) -> str:
         """
         发送生成请求并处理输出。
 
         参数：
         prompt (str): 发送给 LLM 的输入文本，通常是用户的请求或文章内容。
         handle_output (Callable[[str], str]): 用于处理 API 响应输出的回调函数。
+        options (dict, 可选): 采样参数：`temperature`、`seed`，以及是否返回 `logprobs`。
 
         返回：
         str: 经过处理的输出结果。
@@ -41,6 +58,12 @@ class LLMApi(object):
         # 使用 `handle_output` 回调函数处理模型输出
         return handle_output(model_output)
 
+    def warm_up(self) -> None:
+        """
+        预先加载模型，避免第一篇文章承担模型加载的耗时。默认不做任何事情。
+        """
+        pass
+
 def same(model_output: str) -> str:
     """
     一个简单的处理函数，直接返回传入的模型输出。
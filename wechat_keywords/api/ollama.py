@@ -1,46 +1,73 @@
 from ollama import Client
+import time
 from typing import Callable
 from .base import LLMApi, same
+from .usage import record_usage
 
 class OllamaApi(LLMApi):
     """
     一个与 Ollama API 交互的类，继承自 LLMApi。
     
     方法：
-    - generate(prompt: str, handle_output: Callable[[str], str]) -> str: 向 Ollama API 发送请求并处理响应。
+    - generate(prompt: str, handle_output: Callable[[str], str], options: dict) -> str: 向 Ollama API 发送请求并处理响应。
     """
     
-    def __init__(self, host: str, model: str):
+    def __init__(self, host: str, model: str, keep_alive: str = None):
         """
         初始化 OllamaApi 实例，连接 Ollama 客户端。
 
         参数：
         host (str): Ollama API 服务器的主机地址（如：`http://localhost:11411`）。
         model (str): 使用的模型名称或 ID。
+        keep_alive (str, 可选): 模型在服务器内存中保留的时间（如：`30m`，`-1` 表示一直保留），默认使用服务器的设置。
         """
         super().__init__(api_url=host, api_key=None, model=model)
         self._client = Client(host=host)  # 创建 Ollama 客户端实例，连接到指定的主机
         self._model = model  # 模型名称，指定使用哪个模型
+        self._keep_alive = keep_alive  # 模型在内存中保留的时间
     
-    def generate(self, prompt: str, handle_output: Callable[[str], str] = same) -> str:
+    def generate(self, prompt: str, handle_output: Callable[[str], str] = same, options: dict = None) -> str:
         """
         向 Ollama API 发送生成请求，并处理输出。
 
         参数：
         prompt (str): 向模型发送的提示文本。
         handle_output (Callable[[str], str], 可选): 用于处理 API 输出的回调函数，默认使用 `same` 函数。
+        options (dict, 可选): 采样参数：`temperature`、`seed`，以及是否返回 `logprobs`。
 
         返回：
         str: 处理后的模型输出。
         """
+        options = options or {}
+        sampling = {key: options[key] for key in ('temperature', 'seed') if key in options}
+        # 只在需要时传入 logprobs，兼容不支持该参数的旧版本客户端
+        extra = {'logprobs': True} if options.get('logprobs') else {}
+
         # 向 Ollama 客户端发送请求，获取响应
+        start = time.perf_counter()
         response = self._client.chat(
             model=self._model,
             messages=[
                 {'role': 'user', 'content': prompt}
             ],  # 将提示作为用户的消息发送
-            stream=False
+            stream=False,
+            keep_alive=self._keep_alive,
+            options=sampling or None,
+            **extra
         )
+        elapsed = time.perf_counter() - start
+
+        # 记录用量（prompt_eval_count 为输入 token 数，命中缓存时可能为空；eval_count 为输出 token 数）
+        logprobs = getattr(response, 'logprobs', None)
+        self._record_response(token_logprobs=[(item.token, item.logprob) for item in logprobs] if logprobs else None,
+                              prompt_tokens=response.prompt_eval_count, completion_tokens=response.eval_count, seconds=elapsed)
+        record_usage(self.model, response.prompt_eval_count, response.eval_count, elapsed)
 
         # 使用回调函数处理响应内容并返回
         return handle_output(response.message.content)
+
+    def warm_up(self) -> None:
+        """
+        发送空的生成请求，让 Ollama 将模型加载到内存中。
+        """
+        self._client.generate(model=self._model, prompt='', keep_alive=self._keep_alive)
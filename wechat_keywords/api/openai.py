@@ -1,13 +1,15 @@
 from openai import OpenAI
+import time
 from typing import Callable
 from .base import LLMApi, same
+from .usage import record_usage
 
 class OpenAIApi(LLMApi):
     """
     一个与 OpenAI API 交互的类，继承自 LLMApi。
     
     方法：
-    - generate(prompt: str, handle_output: Callable[[str], str]) -> str: 向 OpenAI API 发送请求并处理响应。
+    - generate(prompt: str, handle_output: Callable[[str], str], options: dict) -> str: 向 OpenAI API 发送请求并处理响应。
     """
     
     def __init__(self, base_url: str, api_key: str, model: str):
@@ -23,25 +25,43 @@ class OpenAIApi(LLMApi):
         self._client = OpenAI(base_url=base_url, api_key=api_key)  # 创建 OpenAI 客户端实例
         self._model = model  # 模型名称，指定要使用的 OpenAI 模型
     
-    def generate(self, prompt: str, handle_output: Callable[[str], str] = same) -> str:
+    def generate(self, prompt: str, handle_output: Callable[[str], str] = same, options: dict = None) -> str:
         """
         向 OpenAI API 发送生成请求，并处理输出。
 
         参数：
         prompt (str): 向模型发送的提示文本。
         handle_output (Callable[[str], str], 可选): 用于处理 API 输出的回调函数，默认使用 `same` 函数。
+        options (dict, 可选): 采样参数：`temperature`、`seed`，以及是否返回 `logprobs`。
 
         返回：
         str: 处理后的模型输出。
         """
+        options = options or {}
+        sampling = {key: options[key] for key in ('temperature', 'seed') if key in options}
+        if options.get('logprobs'):
+            sampling['logprobs'] = True
+
         # 向 OpenAI 客户端发送请求，获取响应
+        start = time.perf_counter()
         response = self._client.chat.completions.create(
             model=self._model,
             messages=[
                 {'role': 'user', 'content': prompt} # 将提示作为用户的消息发送
             ],  
-            stream=False
+            stream=False,
+            **sampling
         )
+        elapsed = time.perf_counter() - start
+
+        # 记录用量（部分兼容 OpenAI 接口的服务器不返回 usage）
+        choice = response.choices[0]
+        logprobs = choice.logprobs.content if choice.logprobs and choice.logprobs.content else None
+        prompt_tokens = response.usage.prompt_tokens if response.usage else None
+        completion_tokens = response.usage.completion_tokens if response.usage else None
+        self._record_response(token_logprobs=[(token.token, token.logprob) for token in logprobs] if logprobs else None,
+                              prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, seconds=elapsed)
+        record_usage(self.model, prompt_tokens, completion_tokens, elapsed)
 
         # 使用回调函数处理响应内容并返回
-        return handle_output(response.choices[0].message.content)
\ No newline at end of file
+        return handle_output(choice.message.content)
\ No newline at end of file
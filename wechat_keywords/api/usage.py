@@ -0,0 +1,51 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# 当前线程中正在统计的用量（可以嵌套，例如单篇文章嵌套在整次运行中）
+_local = threading.local()
+
+# 创建空的用量统计
+def new_usage() -> dict:
+    return {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'seconds': 0.0, 'models': {}}
+
+# 将一份用量累加到另一份中
+def add_usage(total: dict, usage: dict) -> None:
+    for key in ('calls', 'prompt_tokens', 'completion_tokens', 'seconds'):
+        total[key] += usage[key]
+    for model, tokens in usage['models'].items():
+        total['models'][model] = total['models'].get(model, 0) + tokens
+
+@contextmanager
+def track_usage() -> Iterator[dict]:
+    """
+    统计代码块中当前线程所有 LLM 请求的用量：
+
+        with track_usage() as usage:
+            classify_by_llm(content, llm_api)
+        print(usage['prompt_tokens'], usage['completion_tokens'])
+
+    用量包括请求次数、输入/输出 token 数、请求耗时（秒），以及每个模型使用的 token 数。
+    """
+    usage = new_usage()
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(usage)
+    try:
+        yield usage
+    finally:
+        stack.remove(usage)
+
+def record_usage(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int], seconds: float) -> None:
+    """
+    记录一次 LLM 请求的用量（服务器没有返回 token 数时按 0 计）。
+    """
+    prompt_tokens = prompt_tokens or 0
+    completion_tokens = completion_tokens or 0
+    for usage in getattr(_local, 'stack', ()):
+        usage['calls'] += 1
+        usage['prompt_tokens'] += prompt_tokens
+        usage['completion_tokens'] += completion_tokens
+        usage['seconds'] += seconds
+        usage['models'][model] = usage['models'].get(model, 0) + prompt_tokens + completion_tokens
@@ -0,0 +1,100 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# 被测的入口模块
+DEFAULT_MODULE = 'data_processor'
+
+# 启动时不应导入的模块（LLM 后端的 SDK 只在创建对应的 API 实例时导入，pyarrow 只在读写列式文件时导入）
+FORBIDDEN_MODULES = ['openai', 'ollama', 'pyarrow']
+
+# 入口模块的导入时间预算（毫秒）
+DEFAULT_BUDGET_MS = 50.0
+
+# 应用所在目录（即 PYTHONPATH）
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 解析 -X importtime 的输出，返回（模块名，缩进层级，累计耗时微秒）
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), level, int(cumulative)))
+    return imports
+
+# 在新的解释器中导入模块，测量导入时间
+def measure_import_time(module: str) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """
+    使用 `python -X importtime` 在新进程中导入模块。
+
+    :param module: 被测的模块
+    :return: 模块的累计导入耗时（微秒），以及由它引入的模块的（模块名，缩进层级，累计耗时微秒）
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=_APP_DIR, capture_output=True, text=True, check=True)
+    imports = parse_importtime(result.stderr)
+
+    # 被测模块是最后一个顶层导入，它之前连续的非顶层导入都是由它引入的
+    end = max(index for index, (name, level, _) in enumerate(imports) if name == module and level == 0)
+    start = end
+    while start > 0 and imports[start - 1][1] > 0:
+        start -= 1
+    return imports[end][2], imports[start:end + 1]
+
+# 检查启动时间是否超出预算
+def check_startup(module: str, budget_ms: float, runs: int, top: int) -> bool:
+    """
+    多次测量入口模块的导入时间（取最小值），检查是否超出预算以及是否导入了不应导入的模块。
+
+    :param module: 被测的模块
+    :param budget_ms: 导入时间预算（毫秒）
+    :param runs: 测量次数
+    :param top: 输出耗时最多的模块数量
+    :return: 是否通过检查
+    """
+    best_us, best_imports = None, []
+    for _ in range(runs):
+        total_us, imports = measure_import_time(module)
+        if best_us is None or total_us < best_us:
+            best_us, best_imports = total_us, imports
+
+    print(f"Import time of '{module}': {best_us / 1000:.1f} ms (best of {runs}, budget {budget_ms:.1f} ms)")
+    print("Slowest imports:")
+    for name, _, cumulative in sorted(best_imports, key=lambda item: item[2], reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    passed = True
+    imported = {name for name, _, _ in best_imports}
+    forbidden = [name for name in FORBIDDEN_MODULES if name in imported]
+    if forbidden:
+        print(f"Error: '{module}' imports {', '.join(forbidden)} at startup.")
+        passed = False
+    if best_us / 1000 > budget_ms:
+        print(f"Error: import time of '{module}' exceeds the budget of {budget_ms:.1f} ms.")
+        passed = False
+    return passed
+
+# 主程序入口
+def main():
+    """
+    启动时间基准测试，超出预算时以非零状态退出，可作为回归测试使用
+    """
+    parser = argparse.ArgumentParser(description='Measure the startup (import) time of the CLI entry point.')
+
+    parser.add_argument('--module', type=str, default=DEFAULT_MODULE, help=f'Entry point module to import (default: {DEFAULT_MODULE}).')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help=f'Import time budget in milliseconds (default: {DEFAULT_BUDGET_MS}).')
+    parser.add_argument('--runs', type=int, default=5, help='Number of measurements, the best one is used (default: 5).')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to show (default: 10).')
+
+    args = parser.parse_args()
+
+    if not check_startup(args.module, args.budget_ms, args.runs, args.top):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
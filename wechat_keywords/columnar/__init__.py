@@ -0,0 +1,2 @@
+from .export_corpus import export_corpus, CORPUS_COLUMNS, EXPORT_FORMATS
+from .read_corpus import ColumnarCorpus
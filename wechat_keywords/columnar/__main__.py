@@ -0,0 +1,20 @@
+# __main__.py
+import argparse
+from columnar import export_corpus, EXPORT_FORMATS
+
+# 主程序入口
+def main():
+    parser = argparse.ArgumentParser(description="Export processed articles into partitioned Parquet/Arrow files.")
+
+    parser.add_argument('--base_path', type=str, required=True, help="Base path of csv file and article files.")
+    parser.add_argument('--csv_file_name', type=str, required=True, help="Csv file name.")
+    parser.add_argument('--output_dir', type=str, required=True, help="Directory to write the columnar corpus to.")
+    parser.add_argument('--format', type=str, default='parquet', choices=list(EXPORT_FORMATS), help="Columnar file format (default: parquet).")
+    parser.add_argument('--row_group_size', type=int, default=256, help="Maximum number of articles per row group (default: 256).")
+
+    args = parser.parse_args()
+
+    export_corpus(args.base_path, args.csv_file_name, args.output_dir, args.format, args.row_group_size)
+
+if __name__ == "__main__":
+    main()
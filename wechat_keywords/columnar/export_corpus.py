@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional
+from urllib.parse import quote
+from keywords import parse_keywords
+from storage import ArticleStore
+import ingest
+
+# 导出的列：文章 ID、元数据、分类、关键词以及三种文章内容
+CORPUS_COLUMNS = ['article_id', 'article_url', 'article_name', 'download_time',
+                  'category', 'keywords', 'raw', 'texified', 'purified']
+
+# 支持的导出格式及对应的文件扩展名
+EXPORT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# 索引文件：记录文章 ID 到分区文件和 row group 的映射
+INDEX_FILE_NAME = '_index.json'
+
+# 没有分类的文章所在的分区
+_UNCATEGORIZED = '__uncategorized__'
+
+# 版本目录：每次导出写入新的版本目录，最后原子替换索引文件
+_VERSION_PATTERN = re.compile(r'^v(\d{6})$')
+
+# 导入 pyarrow（仅在导出/读取列式文件时才需要）
+def import_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise RuntimeError("Columnar export requires 'pyarrow', please install it first (pip install pyarrow).")
+
+# 构建导出使用的 schema
+def corpus_schema(pa):
+    fields = []
+    for column in CORPUS_COLUMNS:
+        if column == 'keywords':
+            fields.append(pa.field(column, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+# 提取文章 URL 中的文章 ID（例如：https://mp.weixin.qq.com/s/kXAQdC0xxVQqfljamNPTQQ 最后一部分）
+def get_article_id(article_url: str) -> str:
+    match = re.search(r"s/([^/]+)", article_url)
+    return match.group(1) if match else ''
+
+# 读取文章文件，不存在时返回 None
+def read_optional(store: ArticleStore, file_name: str) -> Optional[str]:
+    if not file_name or not store.exists(file_name):
+        return None
+    return store.read(file_name)
+
+# 将分类转换为分区目录名（百分号编码路径中不能使用的字符，不同的分类不会对应同一个目录）
+def partition_name(category: str) -> str:
+    category = (category or '').strip() or _UNCATEGORIZED
+    return f"category={quote(category, safe='')}"
+
+class _PartitionWriter(object):
+    """
+    单个分区（分类）的写入器，缓存行并按 row group 批量写入。
+    """
+
+    def __init__(self, pa, output_dir: str, partition: str, export_format: str):
+        self._pa = pa
+        self._format = export_format
+        self.relative_path = os.path.join(partition, f"part-00000{EXPORT_FORMATS[export_format]}")
+        self._path = os.path.join(output_dir, self.relative_path)
+        self._writer = None
+        self._sink = None
+        self.rows: List[Dict] = []
+        self.buffered_bytes = 0
+        self.row_groups = 0
+
+    def write_row_group(self, schema) -> List[str]:
+        """
+        将缓存的行作为一个 row group（Arrow 格式中为一个 record batch）写入文件。
+
+        :return: 本次写入的文章 ID 列表（按行顺序）
+        """
+        if not self.rows:
+            return []
+
+        pa = self._pa
+        batch = pa.RecordBatch.from_pylist(self.rows, schema=schema)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            if self._format == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._path, schema, compression='zstd')
+            else:
+                import pyarrow.ipc
+                self._sink = pa.OSFile(self._path, 'wb')
+                self._writer = pyarrow.ipc.new_file(self._sink, schema)
+
+        if self._format == 'parquet':
+            # 一次写入一个 row group，保证索引中的 row group 编号与文件一致
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(self.rows))
+        else:
+            self._writer.write_batch(batch)
+
+        article_ids = [row['article_id'] for row in self.rows]
+        self.rows = []
+        self.buffered_bytes = 0
+        self.row_groups += 1
+        return article_ids
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+# 导出文章库为分区的列式文件
+def export_corpus(base_path: str, csv_file_name: str, output_dir: str, export_format: str = 'parquet',
+                  row_group_size: int = 256, max_buffer_bytes: int = 64 * 1024 * 1024) -> int:
+    """
+    将 CSV 中的文章元数据、分类、关键词以及原始/Texified/Purified 内容按分类分区导出为
+    Parquet 或 Arrow IPC 文件，并生成文章 ID 到 row group 的索引。
+
+    分区文件写入新的版本目录（`v000001/category=.../part-00000.parquet`），全部写完后再原子替换索引文件，
+    读取方不会看到新索引与旧文件（或相反）的组合。上一个版本保留给仍在读取的进程，更早的版本被删除。
+
+    参数：
+    base_path (str): 文章文件和 CSV 文件所在的目录。
+    csv_file_name (str): CSV 文件名。
+    output_dir (str): 导出目录。
+    export_format (str): 导出格式（'parquet' 或 'arrow'）。
+    row_group_size (int): 每个 row group 的最大行数。
+    max_buffer_bytes (int): 内存中缓存的文章内容上限，超过后立即写出所有分区。
+
+    返回：
+    int: 导出的文章数量。
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    pa = import_pyarrow()
+    schema = corpus_schema(pa)
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(base_path, csv_file_name)
+    store = ArticleStore.open(base_path)
+
+    index_path = os.path.join(output_dir, INDEX_FILE_NAME)
+    previous = None
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            previous = json.load(index_file).get('version')
+    numbers = [int(match.group(1)) for match in map(_VERSION_PATTERN.match, os.listdir(output_dir)) if match]
+    version = f"v{max(numbers, default=0) + 1:06d}"
+
+    partitions: Dict[str, _PartitionWriter] = {}
+    files: List[str] = []
+    articles: Dict[str, List[int]] = {}
+    buffered_bytes = 0
+    count = 0
+
+    # 写出一个分区的缓存，并登记索引
+    def flush(writer: _PartitionWriter) -> None:
+        nonlocal buffered_bytes
+        buffered_bytes -= writer.buffered_bytes
+        row_group = writer.row_groups
+        article_ids = writer.write_row_group(schema)
+        if not article_ids:
+            return
+        if writer.relative_path not in files:
+            files.append(writer.relative_path)
+        file_index = files.index(writer.relative_path)
+        for row_index, article_id in enumerate(article_ids):
+            articles[article_id] = [file_index, row_group, row_index]
+
+    for row in ingest.iter_rows(csv_path):
+        article_url = row.get('article_url', '')
+        article_id = get_article_id(article_url)
+        if not article_id:
+            continue
+
+        raw_filename = row.get('raw_filename', '')
+        if raw_filename == 'Failed':
+            raw_filename = ''
+        record = {
+            'article_id': article_id,
+            'article_url': article_url,
+            'article_name': row.get('article_name') or None,
+            'download_time': row.get('download_time') or None,
+            'category': row.get('category') or None,
+            'keywords': parse_keywords(row.get('keywords', '')),
+            'raw': read_optional(store, raw_filename),
+            'texified': read_optional(store, f"{article_id}_texified.md"),
+            'purified': read_optional(store, f"{article_id}_purified.txt"),
+        }
+
+        partition = partition_name(row.get('category', ''))
+        writer = partitions.get(partition)
+        if writer is None:
+            writer = _PartitionWriter(pa, output_dir, os.path.join(version, partition), export_format)
+            partitions[partition] = writer
+        record_bytes = sum(len(record[column] or '') for column in ('raw', 'texified', 'purified'))
+        writer.rows.append(record)
+        writer.buffered_bytes += record_bytes
+        buffered_bytes += record_bytes
+        count += 1
+
+        # 单个分区满一个 row group 时写出
+        if len(writer.rows) >= row_group_size:
+            flush(writer)
+
+        # 缓存的内容过多时，写出所有分区，保证内存占用有上限
+        if buffered_bytes >= max_buffer_bytes:
+            for pending in partitions.values():
+                flush(pending)
+
+    for writer in partitions.values():
+        flush(writer)
+        writer.close()
+
+    # 写入索引文件
+    index = {
+        'format': export_format,
+        'version': version,
+        'columns': CORPUS_COLUMNS,
+        'files': files,
+        'articles': articles,
+    }
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+    # 删除更早的版本、中断的导出以及旧版本的导出中直接写在导出目录下的分区
+    for name in os.listdir(output_dir):
+        if (_VERSION_PATTERN.match(name) and name not in (version, previous)) or name.startswith('category='):
+            shutil.rmtree(os.path.join(output_dir, name))
+
+    print(f"Exported {count} articles to '{output_dir}' ({export_format}, {len(files)} files).")
+    return count
@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+from .export_corpus import INDEX_FILE_NAME, import_pyarrow, partition_name
+
+# 缓存最近解码的 row group 数量：按文章列表顺序读取时，相邻的文章通常在同一个 row group 中
+_ROW_GROUP_CACHE_SIZE = 8
+
+class ColumnarCorpus(object):
+    """
+    以内存映射方式读取 `export_corpus` 导出的列式文章库。
+
+    方法：
+    - get_article(article_id: str, columns: List[str]) -> dict: 通过索引定位 row group，只读取需要的列
+      （最近解码的若干个 row group 会被缓存，连续读取同一 row group 中的文章时不重复解压）。
+    - iter_batches(columns: List[str], category: str) -> Iterator: 按 row group 逐批读取指定的列。
+    """
+
+    def __init__(self, corpus_dir: str):
+        """
+        初始化文章库，加载文章 ID 索引。
+
+        参数：
+        corpus_dir (str): 导出目录（包含 `_index.json`）。
+        """
+        self._pa = import_pyarrow()
+        self.corpus_dir = corpus_dir
+        with open(os.path.join(corpus_dir, INDEX_FILE_NAME), 'r', encoding='utf-8') as index_file:
+            index = json.load(index_file)
+        self.format = index['format']
+        self.columns = index['columns']
+        self.files = index['files']
+        self._articles = index['articles']
+        self._handles: Dict[int, object] = {}
+        self._row_groups: 'OrderedDict[tuple, object]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self._articles
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    # 打开（并缓存）分区文件，使用内存映射避免整文件读入
+    def _open(self, file_index: int):
+        with self._lock:
+            handle = self._handles.get(file_index)
+            if handle is None:
+                path = os.path.join(self.corpus_dir, self.files[file_index])
+                if self.format == 'parquet':
+                    import pyarrow.parquet as pq
+                    handle = pq.ParquetFile(path, memory_map=True)
+                else:
+                    import pyarrow.ipc
+                    handle = pyarrow.ipc.open_file(self._pa.memory_map(path, 'r'))
+                self._handles[file_index] = handle
+            return handle
+
+    # 读取 row group（使用最近解码的 row group 的缓存）
+    def _cached_row_group(self, file_index: int, row_group: int, columns: Optional[List[str]]):
+        key = (file_index, row_group, tuple(columns) if columns else None)
+        with self._lock:
+            data = self._row_groups.get(key)
+            if data is not None:
+                self._row_groups.move_to_end(key)
+                return data
+        data = self._read_row_group(file_index, row_group, columns)
+        with self._lock:
+            self._row_groups[key] = data
+            while len(self._row_groups) > _ROW_GROUP_CACHE_SIZE:
+                self._row_groups.popitem(last=False)
+        return data
+
+    # 读取一个 row group 中的指定列
+    def _read_row_group(self, file_index: int, row_group: int, columns: Optional[List[str]]):
+        handle = self._open(file_index)
+        if self.format == 'parquet':
+            return handle.read_row_group(row_group, columns=columns)
+        batch = handle.get_batch(row_group)
+        return batch.select(columns) if columns else batch
+
+    def get_article(self, article_id: str, columns: Optional[List[str]] = None) -> Optional[dict]:
+        """
+        读取单篇文章的指定列。
+
+        参数：
+        article_id (str): 文章 ID。
+        columns (List[str], 可选): 需要读取的列，默认读取全部列。
+
+        返回：
+        dict: 列名到值的映射；文章不存在时返回 None。
+        """
+        location = self._articles.get(article_id)
+        if location is None:
+            return None
+        file_index, row_group, row_index = location
+        data = self._cached_row_group(file_index, row_group, columns)
+        return data.slice(row_index, 1).to_pylist()[0]
+
+    def iter_batches(self, columns: Optional[List[str]] = None, category: Optional[str] = None) -> Iterator:
+        """
+        按 row group 逐批读取指定的列，内存占用只与单个 row group 相关。
+
+        参数：
+        columns (List[str], 可选): 需要读取的列，默认读取全部列。
+        category (str, 可选): 只读取该分类所在的分区。
+
+        返回：
+        Iterator: pyarrow Table（Parquet）或 RecordBatch（Arrow IPC）。
+        """
+        partition = partition_name(category) if category is not None else None
+
+        for file_index, relative_path in enumerate(self.files):
+            if partition and os.path.basename(os.path.dirname(relative_path)) != partition:
+                continue
+            handle = self._open(file_index)
+            if self.format == 'parquet':
+                row_groups = handle.num_row_groups
+            else:
+                row_groups = handle.num_record_batches
+            for row_group in range(row_groups):
+                yield self._read_row_group(file_index, row_group, columns)
@@ -1,12 +1,22 @@
 import os
 import argparse
-import re
 import csv
 import random
 import time
-from api import OpenAIApi, OllamaApi
+from api import create_llm_api, API_TYPES, track_usage
 from keywords import extract_by_llm
 from keywords import classify_by_llm
+from keywords import compute_fingerprint, format_fingerprint, parse_fingerprint, stale_stages
+from keywords import CascadeApi, CONFIDENCE_METHODS
+from columnar import ColumnarCorpus, export_corpus
+from columnar.export_corpus import get_article_id
+from scheduler import BudgetScheduler, SCHEDULES, parse_deadline, UsageLog
+from profiling import Profiler, stage, profile_article, record_size
+from storage import ArticleStore
+import ingest
+
+# 处理结果写入文章列表的字段
+RESULT_FIELDS = ['category', 'keywords', 'fingerprint']
 
 # 合并 csv 文件
 def merge_results(input_file, result_file):
@@ -16,50 +26,192 @@ def merge_results(input_file, result_file):
     :param input_file: 原始 CSV 文件
     :param result_file: 结果 CSV 文件
     """
-    # 检查结果文件是否存在
-    if os.path.exists(result_file):
-        with open(result_file, 'r', newline='', encoding='utf-8') as resultfile:
-            reader = csv.DictReader(resultfile)
-            result_data = {row['article_url']: row for row in reader}
-
-        # 读取原始 CSV 文件
-        with open(input_file, 'r', newline='', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
-            fieldnames = reader.fieldnames
-
-            # 如果原始文件中没有某些字段，添加到 fieldnames 中
-            for field in ['category', 'keywords']:
-                if field not in fieldnames:
-                    fieldnames.append(field)
-
-            original_data = [row for row in reader]
-
-            # 更新原始数据为结果文件中的内容
-            for row in original_data:
-                if row['article_url'] in result_data:
-                    row.update(result_data[row['article_url']])  # 更新已有数据
-
-        # 写入合并后的内容到原始文件
-        with open(input_file, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()  # 写入表头
-            writer.writerows(original_data)  # 写入更新后的数据
-
-        # 清空结果文件
-        open(result_file, 'w').close()
+    with stage('merge', 'disk'):
+        ingest.merge_results(input_file, result_file, RESULT_FIELDS)
 
 # 获取 result 文件名
 def get_result_path(csv_path):
     """
-    根据原始文件路径生成结果文件路径
+    根据原始文件路径生成结果文件路径（压缩或 JSONL 格式的输入，结果文件均为 CSV）
     :param csv_path: 原始 CSV 文件路径
     :return: 结果 CSV 文件路径
     """
-    base, ext = os.path.splitext(csv_path)
-    return base + '_result' + ext
+    base, _ = os.path.splitext(ingest.strip_compression(csv_path))
+    return base + '_result.csv'
+
+# 获取用量文件名
+def get_usage_path(path):
+    """
+    根据文章列表（或结果文件）路径生成 LLM 用量文件路径
+    :param path: 文章列表或结果文件路径
+    :return: 用量 JSONL 文件路径
+    """
+    base, _ = os.path.splitext(ingest.strip_compression(path))
+    return base + '_usage.jsonl'
+
+# 文章 texified 内容（解压后）的大小（字节），用于估算 token 用量，文件不存在时返回 0
+def texified_size(article_id: str, store: ArticleStore) -> int:
+    return store.content_size(f"{article_id}_texified.md") if article_id else 0
+
+# 判断一行是否已经处理完成（分类成功，且非 none 的文章已提取关键词）
+def is_completed(row: dict) -> bool:
+    category = row.get('category', '')
+    return bool(category) and (category == 'none' or bool(row.get('keywords', '')))
+
+# 读取 texified 文章内容：优先从列式文章库读取，否则从存储后端读取 texified 文件
+def read_texified(article_id: str, store: ArticleStore, corpus: ColumnarCorpus = None) -> str:
+    """
+    读取文章的 texified 内容。
+
+    参数：
+    article_id (str): 文章 ID。
+    store (ArticleStore): 文章存储后端（与下载时使用的布局一致）。
+    corpus (ColumnarCorpus, 可选): 列式文章库，只读取其中的 `texified` 列。
+
+    返回：
+    str: texified 内容。
+    """
+    content = None
+    with stage('read', 'disk'):
+        if corpus is not None and article_id in corpus:
+            article = corpus.get_article(article_id, ['texified'])
+            if article and article['texified'] is not None:
+                content = article['texified']
+
+        if content is None:
+            content = store.read(f"{article_id}_texified.md")
+    record_size(content)
+    return content
+
+# 分类并提取单篇文章的关键词
+def process_article(row: dict, article_id: str, llm_api, store: ArticleStore, corpus: ColumnarCorpus, keyword_count: int,
+                    reprocess_stale: bool = False, classify_api=None) -> bool:
+    """
+    对单篇文章进行分类和关键词提取，并更新 row 中的 category、keywords 和 fingerprint。
+
+    参数：
+    row (dict): CSV 中的一行。
+    article_id (str): 文章 ID。
+    llm_api (LLMApi): LLM API 实例。
+    store (ArticleStore): 文章存储后端。
+    corpus (ColumnarCorpus): 列式文章库（可以为 None）。
+    keyword_count (int): 需要提取的关键词数量。
+    reprocess_stale (bool): 是否重新处理输入（内容、提示模板、标签列表、模型）已变化的文章。
+    classify_api (LLMApi): 用于分类的 LLM API 实例（如级联分类），默认使用 llm_api。
+
+    返回：
+    bool: 是否调用了 LLM API。
+    """
+    article_url = row['article_url']
+    # 获取当前行的 category
+    category = previous_category = row.get('category', '')
+    # 获取当前行的 keywords
+    keywords = row.get('keywords', '')
+
+    classify_needed = not category
+    keywords_needed = not keywords
+    texified_content = None
+    fingerprint = None
+    # 指纹中的模型：级联分类时为级联的描述（包含最后一级模型）
+    classify_api = classify_api or llm_api
+    model = classify_api.model
+
+    # 根据指纹判断已有结果是否过期
+    if reprocess_stale and not classify_needed:
+        texified_content = read_texified(article_id, store, corpus)
+        with stage('fingerprint', 'cpu'):
+            fingerprint = compute_fingerprint(texified_content, model, keyword_count)
+        classify_stale, keywords_stale = stale_stages(parse_fingerprint(row.get('fingerprint', '')), fingerprint)
+        if classify_stale:
+            print(f"Classification of {article_url} is stale, reprocessing...")
+        elif keywords_stale and category != 'none':
+            print(f"Keywords of {article_url} are stale, reprocessing...")
+        classify_needed = classify_stale
+        keywords_needed = keywords_needed or keywords_stale
+
+    # 如果 category 为空（或已过期）
+    if classify_needed:
+        print(f"Start text classification of {article_url}...")
+        # 读取文章内容
+        if texified_content is None:
+            texified_content = read_texified(article_id, store, corpus)
+
+        # 调用 LLM API 分类
+        try:
+            with stage('classify', 'network'):
+                category = classify_by_llm(texified_content, classify_api)
+        except Exception as e:
+            print(f"An error occurred while classifying text: {e}")
+            category = ""
+
+        print(f"Tag extracted: {category}")
+
+        # 如果分类成功
+        if category:
+            row['category'] = category  # 更新 category
+        else:
+            row['category'] = ""
+
+        # 重新分类失败、分类发生变化或分类为 none 时，旧的关键词不再对应当前分类
+        if row.get('keywords') and ((previous_category and category != previous_category) or category == 'none'):
+            row['keywords'] = ""
+            keywords_needed = True
+    else:
+        # 如果文章已经分类过，跳过分类
+        print(f"Skipping classification of {article_url}, already processed.")
+
+    # 使用 LLM API 提取关键词
+    keywords_extracted = False
+    if category and category != 'none' and keywords_needed:
+        # 已分类的文章此前没有读取内容
+        if texified_content is None:
+            texified_content = read_texified(article_id, store, corpus)
+
+        # 调用 LLM API 提取关键词
+        try:
+            with stage('extract', 'network'):
+                keywords = extract_by_llm(texified_content, keyword_count, llm_api)
+        except Exception as e:
+            print(f"An error occurred while extracting keywords from text: {e}")
+            keywords = ""
+
+        print(f"Keywords extracted: {keywords}")
+        keywords_extracted = True
+
+        #如果提取关键字成功
+        if keywords:
+            row['keywords'] = f'"{keywords}"'  # 转义
+        else:
+            row['keywords'] = ""
+
+    llm_called = classify_needed or keywords_extracted
+    if not llm_called:
+        return False
+
+    # 记录本次结果的指纹（分类和关键词都基于当前输入时才记录，否则清空，下次视为过期）
+    if fingerprint is None:
+        with stage('fingerprint', 'cpu'):
+            fingerprint = compute_fingerprint(texified_content, model, keyword_count)
+    completed = row.get('category') and (row['category'] == 'none' or row.get('keywords'))
+    if classify_needed:
+        row['fingerprint'] = format_fingerprint(fingerprint) if completed else ""
+    else:
+        # 只重新提取了关键词：沿用分类时的指纹，更新关键词相关的输入
+        old_fingerprint = parse_fingerprint(row.get('fingerprint', ''))
+        if completed and old_fingerprint.get('content') == fingerprint['content']:
+            old_fingerprint.update({key: fingerprint[key] for key in ('keyword_prompt', 'keyword_count')})
+            row['fingerprint'] = format_fingerprint(old_fingerprint)
+        else:
+            row['fingerprint'] = ""
+
+    return True
 
 # 处理文章内容
-def data_process(base_path: str, csv_file_name: str, api_type: str, api_url: str, api_key: str, llm_model: str, keyword_count: int) -> None:
+def data_process(base_path: str, csv_file_name: str, api_type: str, api_url: str, api_key: str, llm_model: str, keyword_count: int,
+                 corpus_dir: str = None, reprocess_stale: bool = False, result_path: str = None, input_format: str = None,
+                 cascade_models: list = None, cascade_threshold: float = 0.8, cascade_method: str = 'votes',
+                 cascade_samples: int = 3, schedule: str = 'input', max_tokens_per_hour: int = None,
+                 deadline: float = None) -> None:
     """
     处理文章内容并提取关键词。
     
@@ -70,115 +222,203 @@ def data_process(base_path: str, csv_file_name: str, api_type: str, api_url: str
     api_key (str): LLM API 的 API 密钥。
     llm_model (str): 要使用的 LLM 模型。
     keyword_count (int): 需要提取的关键词数量。
+    corpus_dir (str, 可选): 列式文章库目录，存在时从中读取 texified 内容。
+    reprocess_stale (bool, 可选): 是否重新处理指纹已过期的文章（没有指纹的旧结果视为过期）。
+    result_path (str, 可选): 结果文件路径，默认根据文章列表路径生成；从标准输入读取时必须指定。
+    input_format (str, 可选): 文章列表格式（'csv' 或 'jsonl'），默认根据扩展名判断。
+    cascade_models (list, 可选): 级联分类时先尝试的小模型（从小到大），置信度不足时才使用 llm_model。
+    cascade_threshold (float, 可选): 级联分类的置信度阈值。
+    cascade_method (str, 可选): 级联分类的置信度计算方式（'votes' 或 'logprobs'）。
+    cascade_samples (int, 可选): votes 方式下每级模型的最大采样次数。
+    schedule (str, 可选): 待处理文章的处理顺序（'input'、'shortest' 或 'priority'）。
+    max_tokens_per_hour (int, 可选): 每小时的 token 预算，超过时等待。
+    deadline (float, 可选): 截止时间的时间戳，预计无法在截止时间前完成的文章不再处理。
     """
 
-    # 1. 根据 api_type 选择对应的 LLM API 实例
-    if api_type == 'openai':
-        llm_api = OpenAIApi(api_url, api_key, llm_model)
-    elif api_type == 'ollama':
-        llm_api = OllamaApi(api_url, llm_model)
-    else:
-        print(f"Unsupported LLM API type: {api_type}")
+    # 1. 根据 api_type 选择对应的 LLM API 实例（只导入所选后端的 SDK）
+    try:
+        llm_api = create_llm_api(api_type, api_url, api_key, llm_model)
+        # 级联分类：小模型在前，llm_model 作为最后一级（关键词仍由 llm_model 提取）
+        classify_api = llm_api
+        if cascade_models:
+            tiers = [create_llm_api(api_type, api_url, api_key, model) for model in cascade_models]
+            classify_api = CascadeApi(tiers + [llm_api], cascade_threshold, cascade_method, cascade_samples)
+    except ValueError as e:
+        print(e)
         exit(1)
 
-    # 2. 输入文件的绝对路径
-    csv_path = os.path.join(base_path, csv_file_name)
+    # 文章存储后端（根据目录中的布局描述文件识别 flat/sharded 布局和压缩方式）
+    store = ArticleStore.open(base_path)
+
+    # 列式文章库（可选）
+    corpus = ColumnarCorpus(corpus_dir) if corpus_dir else None
 
-    # 2. 动态生成结果文件路径，用于记录执行结果
-    result_path = get_result_path(csv_path)
+    # 2. 输入文件的绝对路径，'-' 表示从标准输入读取
+    csv_path = csv_file_name if csv_file_name == ingest.STDIN else os.path.join(base_path, csv_file_name)
 
-    # 3. 合并原始文件和结果文件（如果存在）,这种一般是执行一半退出，而没有将结果合并到输入文件中
-    merge_results(csv_path, result_path)
+    # 每篇文章和整次运行的 LLM 用量写入 `<文章列表>_usage.jsonl`
+    usage_log = UsageLog(get_usage_path(result_path if csv_path == ingest.STDIN else csv_path))
 
-    # 打开原始文件进行处理
-    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)  # 读取 CSV 文件中的每一行
-        fieldnames = reader.fieldnames  # 获取 CSV 文件的列名
+    # 按 token 预算和截止时间调度待处理的文章
+    scheduler = BudgetScheduler(lambda row: texified_size(get_article_id(row.get('article_url', '')), store),
+                                schedule, max_tokens_per_hour, deadline)
+
+    # 处理单篇文章，返回是否调用过 LLM API
+    def handle_row(row: dict) -> bool:
+        # 获取每一行中的 article_url, 作为 ID
+        article_url = row['article_url']
+
+        # 提取文章 URL 中的文章 ID（例如：https://mp.weixin.qq.com/s/kXAQdC0xxVQqfljamNPTQQ 最后一部分）
+        article_id = get_article_id(article_url)
 
-        # 如果原始文件中没有某些字段，添加到 fieldnames 中
-        for field in ['category', 'keywords']:
-            if field not in fieldnames:
-                fieldnames.append(field)
         try:
-        # 打开结果文件进行写入
+            with track_usage() as usage, profile_article(article_url):
+                llm_called = process_article(row, article_id, llm_api, store, corpus, keyword_count, reprocess_stale, classify_api)
+        except FileNotFoundError:
+            print(f"Error: The texified file of '{article_url}' does not exist. Skipping...")
+            scheduler.done(row)
+            return False
+
+        # 调用过 LLM API 后，记录用量，并随机休眠 1 到 5 秒之间
+        if llm_called:
+            usage_log.write_article(article_url, usage, scheduler.size(row))
+            sleep_time = random.randint(1, 5)
+            print(f"Sleeping for {sleep_time} seconds...")
+            with stage('sleep', 'sleep'):
+                time.sleep(sleep_time)
+            # 休眠时间不计入文章的处理耗时
+            scheduler.record(row, usage, pause=sleep_time)
+        else:
+            # 指纹仍然有效的文章
+            scheduler.done(row)
+        return llm_called
+
+    try:
+        # 标准输入、gzip 压缩或 JSONL 格式的文章列表无法原地更新，按流式方式处理
+        if not ingest.is_rewritable(csv_path) or input_format == 'jsonl':
+            process_stream(csv_path, handle_row, result_path, input_format, scheduler=scheduler, reprocess_stale=reprocess_stale)
+            return
+
+        # 2. 动态生成结果文件路径，用于记录执行结果
+        result_path = result_path or get_result_path(csv_path)
+
+        # 3. 合并原始文件和结果文件（如果存在）,这种一般是执行一半退出，而没有将结果合并到输入文件中
+        merge_results(csv_path, result_path)
+
+        try:
+            # 打开结果文件进行写入，只记录本次处理过的行
             with open(result_path, 'a', newline='', encoding='utf-8') as resultfile:
-                writer = csv.DictWriter(resultfile, fieldnames=fieldnames)
-                # 先写入 header
-                writer.writeheader()
-                # 逐行读取 CSV 中的每一行
-                for row in reader:
-                    # 获取每一行中的 article_url, 作为 ID
-                    article_url = row['article_url']  # 
-                    # 获取当前行的 category
-                    category = row.get('category', '')
-                    # 获取当前行的 keywords
-                    keywords = row.get('keywords', '')  
-
-                    # 提取文章 URL 中的文章 ID（例如：https://mp.weixin.qq.com/s/kXAQdC0xxVQqfljamNPTQQ 最后一部分）
-                    match = re.search(r"s/([^/]+)", article_url)
-                    article_id = match.group(1) if match else ''
-
-                    # 拼装 texified 路径
-                    texified_path = os.path.join(base_path, f"{article_id}_texified.md")
-
-                    # 如果 category 为空
-                    if not category:
-                        print(f"Start text classification of {article_url}...")
-                        # 打开文件并读取内容
-                        with open(texified_path, 'r', encoding='utf-8') as file:
-                            texified_content = file.read()
-
-                        # 调用 LLM API 分类
-                        try:
-                            category = classify_by_llm(texified_content, llm_api)
-                        except Exception as e:
-                            print(f"An error occurred while classifying text: {e}")
-                            category = ""
-                        
-                        print(f"Tag extracted: {category}")
-
-                        # 如果分类成功
-                        if category:
-                            row['category'] = category  # 更新 category
-                        else:
-                            row['category'] = ""
-                    else:
-                        # 如果文章已经下载过，跳过此行
-                        print(f"Skipping {article_url}, already processed.")
-
-                    # 使用 LLM API 提取关键词
-                    if category and category != 'none' and not keywords:
-                        # 调用 LLM API 分类
-                        try:
-                            keywords = extract_by_llm(texified_content, keyword_count, llm_api)
-                        except Exception as e:
-                            print(f"An error occurred while extracting keywords from text: {e}")
-                            keywords = ""
-
-                        print(f"Keywords extracted: {keywords}")
-                        
-                        #如果提取关键字成功
-                        if keywords:
-                            row['keywords'] = f'"{keywords}"'  # 转义
-                        else:
-                            row['keywords'] = ""
-                    
+                writer = None
+                # 逐行读取 CSV 中的每一行（按调度顺序排列待处理的文章）
+                pending = (row for row in ingest.iter_rows(csv_path) if reprocess_stale or not is_completed(row))
+                for row in scheduler.order(pending):
+                    if scheduler.expired:
+                        print("Deadline reached, the remaining articles are left for the next run.")
+                        break
+                    if not scheduler.admit(row) or not handle_row(row):
+                        continue
+
                     # 写入更新后的行到结果文件
-                    writer.writerow(row)
-                    resultfile.flush()
-                    
-                     # 随机休眠 1 到 5 秒之间
-                    sleep_time = random.randint(1, 5)
-                    print(f"Sleeping for {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+                    with stage('write', 'disk'):
+                        if writer is None:
+                            fieldnames = list(row.keys()) + [field for field in RESULT_FIELDS if field not in row]
+                            writer = csv.DictWriter(resultfile, fieldnames=fieldnames)
+                            # 先写入 header
+                            writer.writeheader()
+                        writer.writerow(row)
+                        resultfile.flush()
 
-        except FileNotFoundError:
-            print(f"Error: The texified file '{csv_path}' does not exist. Skipping...")
         except Exception as e:
             print(f"An error occurred while reading '{csv_path}': {e}")
 
-    # 合并结果文件
-    merge_results(csv_path, result_path)
+        # 合并结果文件
+        merge_results(csv_path, result_path)
+    finally:
+        # 本次运行的用量汇总
+        usage_log.close()
+
+        # 级联分类的路由统计
+        if isinstance(classify_api, CascadeApi):
+            print(classify_api.report())
+
+# 流式处理文章列表
+def process_stream(input_path: str, handle_row, result_path: str = None, input_format: str = None, chunk_size: int = 1000,
+                   scheduler: BudgetScheduler = None, reprocess_stale: bool = False) -> None:
+    """
+    以恒定内存处理文章列表（支持标准输入、gzip 压缩的 CSV/JSONL 文件）。
+    文章列表不会被改写，处理结果追加到结果文件中；结果文件中已处理完成的文章通过紧凑的
+    ID 集合过滤，因此可以多次执行。
+    重新处理过期结果时，结果文件中已保存的分类、关键词和指纹（每篇文章最后一次的结果）读入内存，
+    合并到对应的行中，由 handle_row 根据指纹判断是否需要重新处理。
+
+    参数：
+    input_path (str): 文章列表路径，'-' 表示标准输入。
+    handle_row (Callable[[dict], bool]): 处理单篇文章的函数，返回是否调用过 LLM API。
+    result_path (str, 可选): 结果文件路径，从标准输入读取时必须指定。
+    input_format (str, 可选): 输入格式（'csv' 或 'jsonl'），默认根据扩展名判断。
+    chunk_size (int, 可选): 每次读取的行数。
+    scheduler (BudgetScheduler, 可选): 按预算调度文章（流式输入只在每个分块内排序）。
+    reprocess_stale (bool, 可选): 是否将已处理完成的文章也交给 handle_row（用于重新处理指纹已过期的文章）。
+    """
+    if result_path is None:
+        if input_path == ingest.STDIN:
+            raise ValueError("A result file is required when reading the article list from stdin.")
+        result_path = get_result_path(input_path)
+
+    # 结果文件中已处理完成的文章；重新处理过期结果时保存每篇文章的结果
+    completed = ingest.CompletedSet()
+    stored = {}
+    if os.path.exists(result_path) and os.path.getsize(result_path) > 0:
+        if reprocess_stale:
+            for row in ingest.iter_rows(result_path):
+                stored[row['article_url']] = {field: row.get(field) or '' for field in RESULT_FIELDS}
+        else:
+            completed = ingest.CompletedSet.from_ids(
+                row['article_url'] for row in ingest.iter_rows(result_path) if is_completed(row))
+    print(f"Found {len(stored) if reprocess_stale else len(completed)} processed articles in '{result_path}'.")
+
+    # 判断一行是否需要交给 handle_row
+    def is_pending(row: dict) -> bool:
+        article_url = row.get('article_url', '')
+        if not article_url:
+            return False
+        if reprocess_stale:
+            result = stored.get(article_url)
+            if result is not None:
+                row.update(result)
+            return True
+        return article_url not in completed and not is_completed(row)
+
+    write_header = not os.path.exists(result_path) or os.path.getsize(result_path) == 0
+    with open(result_path, 'a', newline='', encoding='utf-8') as resultfile:
+        writer = csv.DictWriter(resultfile, fieldnames=['article_url'] + RESULT_FIELDS, extrasaction='ignore')
+        if write_header:
+            writer.writeheader()
+
+        processed = 0
+        for chunk in ingest.iter_chunks(ingest.iter_rows(input_path, input_format), chunk_size):
+            pending = [row for row in chunk if is_pending(row)]
+            if scheduler is not None:
+                pending = scheduler.order(pending)
+            for row in pending:
+                if scheduler is not None:
+                    if scheduler.expired:
+                        print("Deadline reached, the remaining articles are left for the next run.")
+                        return
+                    if not scheduler.admit(row):
+                        continue
+
+                article_url = row['article_url']
+                if handle_row(row):
+                    with stage('write', 'disk'):
+                        writer.writerow(row)
+                        resultfile.flush()
+                    if reprocess_stale:
+                        stored[article_url] = {field: row.get(field) or '' for field in RESULT_FIELDS}
+                    elif is_completed(row):
+                        completed.add(article_url)
+            processed += len(chunk)
+            print(f"Processed {processed} rows of the article list.")
 
 # 主程序入口
 def main():
@@ -187,18 +427,63 @@ def main():
     
     #添加命令参数
     parser.add_argument('--base_path', type=str, required=True, help="Base path of csv file.")
-    parser.add_argument('--csv_file_name', type=str, required=True, help="Csv file name.")
-    parser.add_argument('--api_type', type=str, required=True, choices=['openai', 'ollama'], help="LLM API type to use.")
+    parser.add_argument('--csv_file_name', type=str, required=True, help="Csv file name ('-' for stdin, '.gz' and '.jsonl' are streamed).")
+    parser.add_argument('--input_format', type=str, required=False, choices=ingest.INPUT_FORMATS, help="Format of the article list (default: detected from the file extension).")
+    parser.add_argument('--result_file', type=str, required=False, help="Path to the result CSV file (required when reading from stdin).")
+    parser.add_argument('--api_type', type=str, required=True, choices=list(API_TYPES), help="LLM API type to use.")
     parser.add_argument('--api_url', type=str, required=True, help="URL of the LLM API.")
     parser.add_argument('--api_key', type=str, required=True, help="API key for the LLM API.")
     parser.add_argument('--llm_model', type=str, required=True, help="Model to use with the LLM API.")
     parser.add_argument('--keyword_count', type=int, required=False, default=3, help="Number of keywords to extract (default: 3).")
+    parser.add_argument('--reprocess_stale', '--reprocess-stale', action='store_true', help="Reprocess articles whose content, prompts, tags or model changed since they were processed (results without a fingerprint are treated as stale).")
+    parser.add_argument('--cascade_models', type=str, required=False, help="Comma separated smaller models tried before --llm_model for classification, smallest first.")
+    parser.add_argument('--cascade_threshold', type=float, required=False, default=0.8, help="Confidence below which a cascade tier escalates to the next model (default: 0.8).")
+    parser.add_argument('--cascade_method', type=str, required=False, default='votes', choices=CONFIDENCE_METHODS, help="Confidence from agreement of sampled answers or from token logprobs (default: votes).")
+    parser.add_argument('--cascade_samples', type=int, required=False, default=3, help="Maximum samples per tier for the votes method (default: 3).")
+    parser.add_argument('--schedule', type=str, required=False, default='input', choices=SCHEDULES, help="Order of pending articles: input order, shortest first, or by the 'priority' column (default: input).")
+    parser.add_argument('--max_tokens_per_hour', '--max-tokens-per-hour', type=int, required=False, help="Token budget per hour, processing waits when it is reached.")
+    parser.add_argument('--deadline', type=str, required=False, help="Stop before this time, e.g. '2h', '90m' or '2025-01-01 18:00'.")
+    parser.add_argument('--profile', action='store_true', help="Profile the run: cProfile stats, per-stage network/CPU/disk time and the slowest articles.")
+    parser.add_argument('--profile_dir', '--profile-dir', type=str, required=False, help="Directory of the profile output (default: <base_path>/profile).")
+    parser.add_argument('--profile_sample_ms', '--profile-sample-ms', type=float, required=False, default=10, help="Interval of the stack sampler writing collapsed stacks for flame graphs, 0 disables it (default: 10).")
+    parser.add_argument('--profile_top', '--profile-top', type=int, required=False, default=20, help="Number of slowest articles to report (default: 20).")
+    parser.add_argument('--corpus_dir', type=str, required=False, help="Columnar corpus directory to read texified content from.")
+    parser.add_argument('--export_dir', type=str, required=False, help="Export the processed corpus to this directory after processing.")
+    parser.add_argument('--export_format', type=str, required=False, default='parquet', choices=['parquet', 'arrow'], help="Columnar export format (default: parquet).")
     
     # 解析命令行参数
     args = parser.parse_args()
+    if args.csv_file_name == ingest.STDIN and not args.result_file:
+        parser.error("--result_file is required when reading the article list from stdin.")
+    # 流式处理的输入不会被改写，处理结果只保存在结果文件中，导出的文章库会缺少本次的结果
+    csv_path = args.csv_file_name if args.csv_file_name == ingest.STDIN else os.path.join(args.base_path, args.csv_file_name)
+    if args.export_dir and (not ingest.is_rewritable(csv_path) or args.input_format == 'jsonl'):
+        parser.error("--export_dir requires a plain CSV article list that is updated in place, merge the result file and run 'python -m columnar' instead.")
+    try:
+        deadline = parse_deadline(args.deadline) if args.deadline else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 性能分析（可选）
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile_dir or os.path.join(args.base_path, 'profile'), 'data_processor',
+                            args.profile_sample_ms / 1000, args.profile_top).start()
+
+    try:
+        # 调用数据处理函数
+        data_process(args.base_path, args.csv_file_name, args.api_type, args.api_url, args.api_key, args.llm_model, args.keyword_count,
+                     args.corpus_dir, args.reprocess_stale, args.result_file, args.input_format,
+                     [model.strip() for model in args.cascade_models.split(',') if model.strip()] if args.cascade_models else None,
+                     args.cascade_threshold, args.cascade_method, args.cascade_samples,
+                     args.schedule, args.max_tokens_per_hour, deadline)
 
-    # 调用数据处理函数
-    data_process(args.base_path, args.csv_file_name, args.api_type, args.api_url, args.api_key, args.llm_model, args.keyword_count)
+        # 导出列式文章库
+        if args.export_dir:
+            export_corpus(args.base_path, args.csv_file_name, args.export_dir, args.export_format)
+    finally:
+        if profiler is not None:
+            profiler.stop()
 
 # 程序执行入口
 if __name__ == "__main__":
@@ -0,0 +1,3 @@
+from .readers import iter_rows, iter_chunks, is_rewritable, strip_compression, INPUT_FORMATS, STDIN
+from .completed import CompletedSet
+from .merge import merge_results
@@ -0,0 +1,100 @@
+import csv
+import os
+from typing import Dict, Iterator, List, Optional
+from .readers import read_fieldnames
+
+# 将结果文件合并到原始 CSV 文件
+def merge_results(input_file: str, result_file: str, fields: List[str], key: str = 'article_url') -> None:
+    """
+    以流式方式将结果文件合并到原始 CSV 文件中，然后清空结果文件。
+
+    结果文件中的行按处理顺序写入，通常是原始文件的子序列，因此两个文件可以同步逐行推进，
+    内存占用与文件大小无关；顺序不一致的结果会在第二遍中按 key 合并。
+    合并结果先写入临时文件并 fsync，再原子替换原始文件；替换落盘后才清空结果文件。
+
+    :param input_file: 原始 CSV 文件
+    :param result_file: 结果 CSV 文件
+    :param fields: 需要保证存在的字段
+    :param key: 用于匹配两个文件中行的字段
+    """
+    # 检查结果文件是否存在且不为空
+    if not os.path.exists(result_file) or os.path.getsize(result_file) == 0:
+        return
+
+    fieldnames = read_fieldnames(input_file)
+    # 如果原始文件中没有某些字段，添加到 fieldnames 中
+    for field in fields + read_fieldnames(result_file):
+        if field not in fieldnames:
+            fieldnames.append(field)
+
+    tmp_file = input_file + '.merging'
+    with open(result_file, 'r', newline='', encoding='utf-8') as resultfile:
+        results = _iter_results(csv.DictReader(resultfile), fieldnames, key)
+        pending = next(results, None)
+
+        with open(input_file, 'r', newline='', encoding='utf-8') as infile, \
+                open(tmp_file, 'w', newline='', encoding='utf-8') as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in csv.DictReader(infile):
+                # 同步推进：结果文件的当前行与原始文件的当前行匹配时更新
+                if pending is not None and row.get(key) == pending.get(key):
+                    row.update(pending)
+                    pending = next(results, None)
+                writer.writerow(row)
+            _fsync(outfile)
+
+        # 没有按顺序匹配上的结果（只保留这部分在内存中）
+        leftovers: Dict[str, dict] = {}
+        while pending is not None:
+            leftovers[pending.get(key)] = pending
+            pending = next(results, None)
+
+    if leftovers:
+        _apply_leftovers(tmp_file, fieldnames, leftovers, key)
+
+    os.replace(tmp_file, input_file)
+    _fsync_dir(os.path.dirname(os.path.abspath(input_file)))
+
+    # 清空结果文件
+    open(result_file, 'w').close()
+
+# 将文件内容写入磁盘
+def _fsync(file) -> None:
+    file.flush()
+    os.fsync(file.fileno())
+
+# 对目录执行 fsync，保证 rename 落盘
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+# 逐行读取结果文件，跳过重复写入的表头
+def _iter_results(reader: csv.DictReader, fieldnames: List[str], key: str) -> Iterator[dict]:
+    for row in reader:
+        if row.get(key) == key:
+            continue
+        yield {field: value for field, value in row.items() if field in fieldnames}
+
+# 第二遍合并顺序不一致的结果
+def _apply_leftovers(merged_file: str, fieldnames: List[str], leftovers: Dict[str, dict], key: str) -> None:
+    tmp_file = merged_file + '.2'
+    with open(merged_file, 'r', newline='', encoding='utf-8') as infile, \
+            open(tmp_file, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in csv.DictReader(infile):
+            result: Optional[dict] = leftovers.get(row.get(key))
+            if result is not None:
+                row.update(result)
+            writer.writerow(row)
+        _fsync(outfile)
+    os.replace(tmp_file, merged_file)
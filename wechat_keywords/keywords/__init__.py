@@ -1,2 +1,4 @@
-from .classify_article import classify_by_llm
-from .extract_keywords import extract_by_llm
\ No newline at end of file
+from .classify_article import classify_by_llm, parse_tag
+from .cascade import CascadeApi, CONFIDENCE_METHODS
+from .extract_keywords import extract_by_llm, parse_keywords
+from .fingerprint import compute_fingerprint, format_fingerprint, parse_fingerprint, stale_stages
\ No newline at end of file
@@ -0,0 +1,172 @@
+import math
+import threading
+import time
+from collections import Counter
+from typing import Callable, List, Tuple
+from api import LLMApi
+from api.base import same
+
+# 置信度的计算方式：多次采样结果的一致性（votes）或输出 token 的概率（logprobs）
+CONFIDENCE_METHODS = ['votes', 'logprobs']
+
+# 答案的置信度：输出中组成答案（解析后的结果，如分类标签）的 token 的概率之积，不包括 JSON、代码块等格式部分，
+# 因此不随输出的长度和格式变化；输出中找不到答案时，使用每个 token 的平均对数概率
+def answer_confidence(token_logprobs: List[Tuple[str, float]], answer: str) -> float:
+    text = ''.join(token for token, _ in token_logprobs)
+    start = text.rfind(answer) if answer else -1
+    if start < 0:
+        return math.exp(sum(logprob for _, logprob in token_logprobs) / len(token_logprobs))
+
+    end = start + len(answer)
+    offset, total = 0, 0.0
+    for token, logprob in token_logprobs:
+        if offset < end and offset + len(token) > start:
+            total += logprob
+        offset += len(token)
+    return math.exp(total)
+
+# 级联分类的模型描述（记录在指纹中，修改级联配置后分类结果视为过期）
+def cascade_model_name(models: List[str], threshold: float, method: str, samples: int) -> str:
+    confidence = f"votes{samples}" if method == 'votes' else method
+    return f"cascade({'>'.join(models)}@{threshold:g},{confidence})"
+
+class CascadeApi(LLMApi):
+    """
+    级联分类：先用小模型分类，置信度低于阈值时再交给更大的模型，最后一级模型的结果直接采用。
+
+    方法：
+    - generate(prompt: str, handle_output: Callable[[str], str], options: dict) -> str: 按级联顺序生成并返回被采用的结果。
+    - report() -> str: 各级模型的路由比例和吞吐量提升的统计。
+    """
+
+    def __init__(self, tiers: List[LLMApi], threshold: float = 0.8, method: str = 'votes', samples: int = 3,
+                 temperature: float = 0.7):
+        """
+        初始化级联分类。
+
+        参数：
+        tiers (List[LLMApi]): 从小到大排列的模型，最后一个为最终模型。
+        threshold (float): 置信度阈值（0 到 1），低于阈值时交给下一级模型。
+        method (str): 置信度的计算方式（'votes' 或 'logprobs'）。
+        samples (int): votes 方式下每级模型的最大采样次数。
+        temperature (float): votes 方式下采样使用的温度。
+        """
+        if method not in CONFIDENCE_METHODS:
+            raise ValueError(f"Unsupported confidence method: {method}")
+        final = tiers[-1]
+        super().__init__(api_url=final.api_url, api_key=final.api_key,
+                         model=cascade_model_name([tier.model for tier in tiers], threshold, method, samples))
+        self.tiers = tiers
+        self.threshold = threshold
+        self.method = method
+        self.samples = samples
+        self.temperature = temperature
+        self._lock = threading.Lock()
+        self._articles = 0
+        self._stats = [{'calls': 0, 'accepted': 0, 'escalated': 0, 'seconds': 0.0} for _ in tiers]
+        self._logprobs_unsupported = set()
+
+    # 多次采样，按结果的一致性计算置信度；已经达到或不可能达到阈值时提前停止。
+    # 第 i 次采样使用固定的 seed=i，同一个提示的投票结果是确定的（重复运行时分类和是否升级保持一致），
+    # 但不同文章使用的 seed 序列相同
+    def _vote(self, tier: LLMApi, prompt: str, handle_output: Callable[[str], str]) -> Tuple[str, float, int]:
+        votes = Counter()
+        needed = math.ceil(self.threshold * self.samples)
+        calls = 0
+        for sample in range(self.samples):
+            output = tier.generate(prompt, handle_output, {'temperature': self.temperature, 'seed': sample})
+            calls += 1
+            if output:
+                votes[output] += 1
+            count = votes.most_common(1)[0][1] if votes else 0
+            if count >= needed or count + (self.samples - calls) < needed:
+                break
+
+        if not votes:
+            return '', 0.0, calls
+        output, count = votes.most_common(1)[0]
+        return output, count / self.samples, calls
+
+    # 根据答案 token 的概率计算置信度，服务器不返回 logprobs 时改用 votes
+    def _logprob(self, tier: LLMApi, prompt: str, handle_output: Callable[[str], str]) -> Tuple[str, float, int]:
+        if tier.model not in self._logprobs_unsupported:
+            output = tier.generate(prompt, handle_output, {'logprobs': True})
+            token_logprobs = tier.last_response.get('token_logprobs')
+            if token_logprobs:
+                return output, answer_confidence(token_logprobs, str(output)) if output else 0.0, 1
+            print(f"Warning: {tier.model} does not return logprobs, using votes instead.")
+            self._logprobs_unsupported.add(tier.model)
+        return self._vote(tier, prompt, handle_output)
+
+    def generate(self, prompt: str, handle_output: Callable[[str], str] = same, options: dict = None) -> str:
+        """
+        按级联顺序生成结果。`handle_output` 应将响应解析为可比较的结果（如分类标签），解析失败时返回空值。
+
+        参数：
+        prompt (str): 向模型发送的提示文本。
+        handle_output (Callable[[str], str], 可选): 用于处理 API 输出的回调函数。
+        options (dict, 可选): 传给最后一级模型的采样参数。
+
+        返回：
+        str: 被采用的结果。
+        """
+        with self._lock:
+            self._articles += 1
+
+        for index, tier in enumerate(self.tiers):
+            is_final = index == len(self.tiers) - 1
+            start = time.perf_counter()
+            try:
+                if is_final:
+                    output, confidence, calls = tier.generate(prompt, handle_output, options), 1.0, 1
+                elif self.method == 'votes':
+                    output, confidence, calls = self._vote(tier, prompt, handle_output)
+                else:
+                    output, confidence, calls = self._logprob(tier, prompt, handle_output)
+            except Exception as e:
+                if is_final:
+                    raise
+                print(f"Error: {tier.model} failed, escalating: {e}")
+                output, confidence, calls = '', 0.0, 1
+            elapsed = time.perf_counter() - start
+
+            accepted = is_final or (bool(output) and confidence >= self.threshold)
+            with self._lock:
+                stats = self._stats[index]
+                stats['calls'] += calls
+                stats['seconds'] += elapsed
+                stats['accepted' if accepted else 'escalated'] += 1
+
+            if accepted:
+                self._record_response(model=tier.model, tier=index, confidence=confidence)
+                return output
+            print(f"{tier.model} answered {output!r} with confidence {confidence:.2f}, escalating to {self.tiers[index + 1].model}...")
+
+    def report(self) -> str:
+        """
+        各级模型的路由比例、平均耗时，以及相对于全部使用最后一级模型的吞吐量提升（按最后一级模型的平均耗时估算）。
+        """
+        with self._lock:
+            articles = self._articles
+            stats = [dict(tier_stats) for tier_stats in self._stats]
+        if not articles:
+            return "Cascade: no articles classified."
+
+        lines = [f"Cascade: {articles} articles classified."]
+        for tier, tier_stats in zip(self.tiers, stats):
+            seen = tier_stats['accepted'] + tier_stats['escalated']
+            average = tier_stats['seconds'] / seen if seen else 0.0
+            lines.append(f"  {tier.model}: accepted {tier_stats['accepted']} ({tier_stats['accepted'] / articles:.1%}), "
+                         f"escalated {tier_stats['escalated']}, {tier_stats['calls']} calls, {average:.2f} s/article")
+
+        total_seconds = sum(tier_stats['seconds'] for tier_stats in stats)
+        final = stats[-1]
+        final_seen = final['accepted'] + final['escalated']
+        if final_seen and total_seconds > 0:
+            baseline_seconds = articles * final['seconds'] / final_seen
+            lines.append(f"  throughput: {articles / total_seconds:.2f} articles/s, "
+                         f"estimated {baseline_seconds / total_seconds:.2f}x of using {self.tiers[-1].model} only")
+        else:
+            lines.append(f"  throughput: {articles / total_seconds if total_seconds else 0.0:.2f} articles/s "
+                         f"(no article reached {self.tiers[-1].model}, speedup unknown)")
+        return '\n'.join(lines)
@@ -89,9 +89,19 @@ def classify_by_llm(content: str, api: LLMApi, handle_response: Callable[[str],
     # 组装 prompt
     prompt = _CLASSIFY_PROMPT_TEMPLATE.replace('{tags}', tags_str).replace('{article}', escaped_content)
     
-    # 获取 API 响应
-    response = api.generate(prompt, handle_response)
-    
+    # 获取 API 响应，并在回调中解析出分类标签（级联分类时按标签比较多次采样的结果）
+    return api.generate(prompt, lambda response: parse_tag(handle_response(response)))
+
+def parse_tag(response: str) -> str:
+    """
+    从 LLM 的响应中解析分类标签。
+
+    参数:
+        response (str): LLM 的响应（JSON 格式，可以包含在 ```json 代码块中）。
+
+    返回:
+        str: 分类标签。如果解析失败，则返回空字符串。
+    """
     try:
         # 尝试将响应解析为 JSON 格式
         result = json.loads(re.sub(r'```json\n|\n```', '', response).strip())
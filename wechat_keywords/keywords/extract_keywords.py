@@ -61,4 +61,31 @@ def extract_by_llm(content: str, count: int, api: LLMApi, handle_response: Calla
     except TypeError as e:
         # 如果响应数据类型不正确，打印错误并返回空列表
         print(f"TypeError decoding json string: {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+def parse_keywords(value: str) -> List[str]:
+    """
+    解析 CSV 中 `keywords` 列的值（形如 `"["关键词1", "关键词2"]"` 的带引号 JSON 数组字符串）。
+
+    参数：
+    value (str): `keywords` 列的原始值。
+
+    返回：
+    List[str]: 关键词列表。如果为空或解析失败，则返回空列表。
+    """
+    if not value:
+        return []
+
+    # 去掉写入时添加的外层引号
+    value = value.strip()
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+
+    try:
+        keywords = json.loads(value)
+    except JSONDecodeError:
+        return []
+
+    if not isinstance(keywords, list):
+        return []
+    return [str(keyword).strip() for keyword in keywords if str(keyword).strip()]
\ No newline at end of file
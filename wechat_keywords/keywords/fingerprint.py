@@ -0,0 +1,75 @@
+import hashlib
+import json
+from json import JSONDecodeError
+from typing import Dict, Tuple
+from .classify_article import _CLASSIFY_PROMPT_TEMPLATE, _TAGS
+from .extract_keywords import _KEYWORD_PROMPT_TEMPLATE
+
+# 计算字符串的短哈希
+def short_hash(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]
+
+# 分类提示模板、关键词提示模板和标签列表的版本（内容哈希），修改后对应的结果即视为过期
+CLASSIFY_PROMPT_VERSION = short_hash(_CLASSIFY_PROMPT_TEMPLATE)
+KEYWORD_PROMPT_VERSION = short_hash(_KEYWORD_PROMPT_TEMPLATE)
+TAGS_VERSION = short_hash(json.dumps(json.loads(_TAGS), ensure_ascii=False, sort_keys=True))
+
+# 影响分类结果的输入
+_CLASSIFY_INPUTS = ['content', 'classify_prompt', 'tags', 'model']
+
+# 影响关键词结果的输入
+_KEYWORD_INPUTS = ['content', 'keyword_prompt', 'keyword_count', 'model']
+
+def compute_fingerprint(content: str, model: str, keyword_count: int) -> Dict[str, str]:
+    """
+    计算文章处理结果的指纹（文章内容哈希、提示模板版本、标签列表版本、模型名称等）。
+
+    参数：
+    content (str): texified 文章内容。
+    model (str): 使用的 LLM 模型名称。
+    keyword_count (int): 提取的关键词数量。
+
+    返回：
+    Dict[str, str]: 指纹。
+    """
+    return {
+        'content': short_hash(content),
+        'classify_prompt': CLASSIFY_PROMPT_VERSION,
+        'keyword_prompt': KEYWORD_PROMPT_VERSION,
+        'tags': TAGS_VERSION,
+        'model': model,
+        'keyword_count': str(keyword_count),
+    }
+
+def format_fingerprint(fingerprint: Dict[str, str]) -> str:
+    """
+    将指纹序列化为 CSV 中 `fingerprint` 列的值。
+    """
+    return json.dumps(fingerprint, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def parse_fingerprint(value: str) -> Dict[str, str]:
+    """
+    解析 CSV 中 `fingerprint` 列的值，为空或解析失败时返回空字典。
+    """
+    if not value:
+        return {}
+    try:
+        fingerprint = json.loads(value)
+    except JSONDecodeError:
+        return {}
+    return fingerprint if isinstance(fingerprint, dict) else {}
+
+def stale_stages(old: Dict[str, str], new: Dict[str, str]) -> Tuple[bool, bool]:
+    """
+    比较已保存的指纹和当前输入的指纹，判断哪些处理步骤需要重新执行。
+
+    参数：
+    old (Dict[str, str]): 已保存的指纹（没有指纹的旧结果视为全部过期）。
+    new (Dict[str, str]): 当前输入的指纹。
+
+    返回：
+    Tuple[bool, bool]: （分类是否过期，关键词是否过期）。分类过期时关键词也随之过期。
+    """
+    classify_stale = any(old.get(key) != new.get(key) for key in _CLASSIFY_INPUTS)
+    keywords_stale = classify_stale or any(old.get(key) != new.get(key) for key in _KEYWORD_INPUTS)
+    return classify_stale, keywords_stale
\ No newline at end of file
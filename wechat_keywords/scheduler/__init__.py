@@ -0,0 +1,2 @@
+from .budget_scheduler import BudgetScheduler, SCHEDULES, parse_deadline
+from .usage_log import UsageLog
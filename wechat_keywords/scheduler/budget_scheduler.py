@@ -0,0 +1,254 @@
+import datetime
+import itertools
+import re
+import time
+from collections import deque
+from typing import Callable, Iterable, Optional
+
+# 处理顺序：输入顺序、短文章优先、按 `priority` 列（越大越先，相同时短文章优先）
+SCHEDULES = ['input', 'shortest', 'priority']
+
+# 还没有实际用量时，每字节文章内容估算的 token 数和耗时（秒）
+_DEFAULT_TOKENS_PER_BYTE = 0.5
+_DEFAULT_SECONDS_PER_BYTE = 0.0005
+
+# token 预算的统计窗口（秒）
+_WINDOW_SECONDS = 3600
+
+# 按大小或优先级排序时一次读入内存的待处理行数：每行连同缓存的文章大小约占 1KB，
+# 1 万行约 10MB；超过窗口的文章列表只在每个窗口内排序
+SORT_WINDOW = 10000
+
+_DURATION_PATTERN = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$')
+
+def parse_deadline(value: str, now: Optional[float] = None) -> float:
+    """
+    解析截止时间：绝对时间（如 `2025-01-01 18:00`）或从现在开始的时长（如 `90m`、`2h`、`1h30m`）。
+
+    参数：
+    value (str): 截止时间。
+    now (float, 可选): 当前时间戳，默认使用 time.time()。
+
+    返回：
+    float: 截止时间的时间戳。
+    """
+    now = time.time() if now is None else now
+    match = _DURATION_PATTERN.match(value.strip())
+    if match and any(match.groups()):
+        hours, minutes, seconds = (int(group or 0) for group in match.groups())
+        return now + hours * 3600 + minutes * 60 + seconds
+    try:
+        return datetime.datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid deadline: {value!r}, use e.g. '2h', '90m' or '2025-01-01 18:00'.")
+
+# 读取行中的优先级（没有或无法解析时为 0）
+def row_priority(row: dict) -> int:
+    try:
+        return int(row.get('priority') or 0)
+    except ValueError:
+        return 0
+
+# 格式化时间戳
+def format_time(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+class BudgetScheduler(object):
+    """
+    按 token 预算和截止时间调度待处理的文章。
+
+    - 按处理顺序排列待处理的文章（短文章优先可以在预算内完成更多文章），每次最多读入 `sort_window` 行排序，内存占用有上限。
+    - 最近一小时的 token 用量将超过预算时等待；预计无法在截止时间前完成的文章不再处理。
+    - 根据已处理文章的实际用量（每字节的 token 数和耗时）估算剩余文章的完成时间。
+
+    方法：
+    - order(rows: Iterable[dict]) -> Iterable[dict]: 排列待处理的文章。
+    - admit(row: dict) -> bool: 处理文章前调用，按预算等待，返回是否处理该文章。
+    - record(row: dict, usage: dict, pause: float = 0) -> None: 处理文章后调用，记录实际用量（不含处理后的休眠）。
+    - done(row: dict) -> None: 已放行但没有调用 LLM 的文章（例如：文件不存在、结果仍然有效）处理后调用。
+    """
+
+    def __init__(self, size_of: Callable[[dict], int], schedule: str = 'input', max_tokens_per_hour: int = None,
+                 deadline: float = None, sort_window: int = SORT_WINDOW):
+        """
+        参数：
+        size_of (Callable[[dict], int]): 返回文章内容大小（字节）的函数，未知时返回 0。
+        schedule (str): 处理顺序（'input'、'shortest' 或 'priority'）。
+        max_tokens_per_hour (int, 可选): 每小时的 token 预算。
+        deadline (float, 可选): 截止时间的时间戳。
+        sort_window (int, 可选): 按大小或优先级排序时一次读入内存的行数。
+        """
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unsupported schedule: {schedule}")
+        if sort_window < 1:
+            raise ValueError(f"Invalid sort window: {sort_window}")
+        self.size_of = size_of
+        self.schedule = schedule
+        self.max_tokens_per_hour = max_tokens_per_hour
+        self.deadline = deadline
+        self.sort_window = sort_window
+
+        self._sizes = {}
+        self._window = deque()
+        self._window_tokens = 0
+        self._pending = 0
+        self._pending_bytes = 0
+        # 待处理的文章是否已全部读入（否则剩余文章数量未知）
+        self._loaded_all = True
+        self._started = time.time()
+        self._admitted_at = None
+        self.processed = 0
+        self.skipped = 0
+        # 已处理文章的累计大小、token 数和耗时，用于估算
+        self._bytes = 0
+        self._tokens = 0
+        self._seconds = 0.0
+        # 处理文章后的累计休眠时间，只用于估算完成时间
+        self._pauses = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.schedule != 'input' or bool(self.max_tokens_per_hour) or self.deadline is not None
+
+    # 文章大小（缓存，避免重复访问文件系统）
+    def size(self, row: dict) -> int:
+        article_url = row.get('article_url', '')
+        size = self._sizes.get(article_url)
+        if size is None:
+            size = self.size_of(row)
+            self._sizes[article_url] = size
+        return size
+
+    def order(self, rows: Iterable[dict]) -> Iterable[dict]:
+        """
+        排列待处理的文章。按输入顺序处理时原样返回；否则每次读入 `sort_window` 行，
+        在窗口内排序后依次返回（不会读取全部文章）。
+        """
+        if self.schedule == 'input':
+            return rows
+        return self._order_windows(iter(rows))
+
+    def _order_windows(self, rows: Iterable[dict]) -> Iterable[dict]:
+        window = list(itertools.islice(rows, self.sort_window))
+        while window:
+            # 多读一行，判断窗口之后是否还有待处理的文章
+            following = list(itertools.islice(rows, 1))
+            self._loaded_all = not following
+            if self.schedule == 'shortest':
+                window.sort(key=self.size)
+            else:
+                window.sort(key=lambda row: (-row_priority(row), self.size(row)))
+            self._pending += len(window)
+            self._pending_bytes += sum(self.size(row) for row in window)
+            yield from window
+            window = following + list(itertools.islice(rows, self.sort_window - 1))
+
+    # 每字节的 token 数和耗时（没有实际用量时使用默认值）
+    def _rates(self):
+        if self._bytes and self._tokens:
+            return self._tokens / self._bytes, self._seconds / self._bytes
+        return _DEFAULT_TOKENS_PER_BYTE, _DEFAULT_SECONDS_PER_BYTE
+
+    # 移出统计窗口之外的用量
+    def _expire(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - _WINDOW_SECONDS:
+            self._window_tokens -= self._window.popleft()[1]
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def admit(self, row: dict) -> bool:
+        """
+        处理文章前调用：最近一小时的用量加上本文章的估算用量超过预算时等待，
+        预计无法在截止时间前完成时返回 False（文章保持待处理状态，下次运行时继续）。
+        """
+        size = self.size(row)
+        tokens_per_byte, seconds_per_byte = self._rates()
+        estimated_tokens = size * tokens_per_byte
+        estimated_seconds = size * seconds_per_byte
+
+        if self.max_tokens_per_hour:
+            now = time.time()
+            self._expire(now)
+            while self._window and self._window_tokens + estimated_tokens > self.max_tokens_per_hour:
+                wait = self._window[0][0] + _WINDOW_SECONDS - now
+                if self.deadline is not None and now + wait >= self.deadline:
+                    self._skip(row, size)
+                    print(f"Token budget exhausted until the deadline, skipping {row.get('article_url', '')}.")
+                    return False
+                print(f"Token budget of {self.max_tokens_per_hour}/h reached, waiting {wait:.0f} seconds...")
+                time.sleep(max(wait, 0))
+                now = time.time()
+                self._expire(now)
+
+        if self.deadline is not None and time.time() + estimated_seconds > self.deadline:
+            self._skip(row, size)
+            print(f"{row.get('article_url', '')} is not expected to finish before the deadline, skipping.")
+            return False
+
+        self._admitted_at = time.time()
+        return True
+
+    def _skip(self, row: dict, size: int) -> None:
+        self.skipped += 1
+        self._release(row, size)
+
+    # 文章不再待处理（order 中计入的数量和大小）
+    def _release(self, row: dict, size: int) -> None:
+        if self.schedule != 'input':
+            self._pending -= 1
+            self._pending_bytes -= size
+        self._sizes.pop(row.get('article_url', ''), None)
+
+    def done(self, row: dict) -> None:
+        """
+        已放行但没有调用 LLM 的文章处理后调用，不计入用量。
+        """
+        self._release(row, self.size(row))
+
+    def record(self, row: dict, usage: dict, pause: float = 0) -> None:
+        """
+        处理文章后调用，记录实际用量（`track_usage` 的统计结果）并输出进度和预计完成时间。
+        `pause` 为处理后的休眠时间（秒），不计入文章的处理耗时，只用于估算完成时间。
+        """
+        now = time.time()
+        tokens = usage['prompt_tokens'] + usage['completion_tokens']
+        size = self.size(row)
+        self._window.append((now, tokens))
+        self._window_tokens += tokens
+        self.processed += 1
+        if size:
+            self._bytes += size
+            self._tokens += tokens
+            self._seconds += max(now - (self._admitted_at or now) - pause, 0)
+        self._pauses += pause
+        self._release(row, size)
+
+        projection = self.projection()
+        if projection:
+            print(projection)
+
+    def projection(self) -> str:
+        """
+        根据剩余文章的大小估算完成时间（同时考虑 token 预算和处理后的休眠）。按输入顺序处理、
+        或待处理的文章还没有全部读入排序窗口时，剩余文章数量未知，只输出进度。
+        """
+        elapsed = time.time() - self._started
+        progress = f"Progress: {self.processed} processed, {self.skipped} skipped in {elapsed:.0f} s"
+        if self.schedule == 'input':
+            return progress
+        if not self._loaded_all:
+            return f"{progress}, more than {self._pending} pending"
+
+        tokens_per_byte, seconds_per_byte = self._rates()
+        remaining_seconds = self._pending_bytes * seconds_per_byte
+        if self.processed:
+            remaining_seconds += self._pending * self._pauses / self.processed
+        if self.max_tokens_per_hour:
+            remaining_seconds = max(remaining_seconds, self._pending_bytes * tokens_per_byte / self.max_tokens_per_hour * 3600)
+        eta = time.time() + remaining_seconds
+        line = f"{progress}, {self._pending} pending, estimated completion {format_time(eta)}"
+        if self.deadline is not None and eta > self.deadline:
+            line += f" (after the deadline {format_time(self.deadline)})"
+        return line
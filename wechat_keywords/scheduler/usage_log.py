@@ -0,0 +1,58 @@
+import datetime
+import json
+import time
+from api import new_usage, add_usage
+
+class UsageLog(object):
+    """
+    将每篇文章和整次运行的 LLM 用量追加写入 JSONL 文件（`<文章列表>_usage.jsonl`）。
+
+    每篇文章一行（`"type": "article"`），运行结束时写入一行汇总（`"type": "run"`）。
+    """
+
+    def __init__(self, path: str):
+        """
+        参数：
+        path (str): 用量文件路径。
+        """
+        self.path = path
+        self.run = new_usage()
+        self.articles = 0
+        self._started = time.time()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def write_article(self, article_url: str, usage: dict, size: int) -> None:
+        """
+        记录单篇文章的用量。
+
+        参数：
+        article_url (str): 文章 URL。
+        usage (dict): `track_usage` 的统计结果。
+        size (int): 文章内容大小（字节）。
+        """
+        add_usage(self.run, usage)
+        self.articles += 1
+        self._write(dict(usage, type='article', article_url=article_url, size=size,
+                         time=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    def summary(self) -> str:
+        run = self.run
+        tokens = run['prompt_tokens'] + run['completion_tokens']
+        per_article = tokens / self.articles if self.articles else 0
+        return (f"LLM usage: {self.articles} articles, {run['calls']} calls, {run['prompt_tokens']} prompt + "
+                f"{run['completion_tokens']} completion tokens ({per_article:.0f} per article), {run['seconds']:.1f} s in requests.")
+
+    def close(self) -> None:
+        """
+        写入本次运行的汇总并关闭文件。
+        """
+        now = time.time()
+        self._write(dict(self.run, type='run', articles=self.articles, wall_seconds=now - self._started,
+                         started=datetime.datetime.fromtimestamp(self._started).strftime("%Y-%m-%d %H:%M:%S"),
+                         finished=datetime.datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")))
+        self._file.close()
+        print(self.summary())
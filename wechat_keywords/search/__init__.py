@@ -0,0 +1,3 @@
+from .build_index import build_index, merge_segments, DEFAULT_MAX_SEGMENTS
+from .search_index import SearchIndex
+from .tokenizer import tokenize, load_tokenizer, TOKENIZERS
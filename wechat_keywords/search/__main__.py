@@ -0,0 +1,52 @@
+# __main__.py
+import argparse
+import time
+from search import build_index, load_tokenizer, SearchIndex, TOKENIZERS, DEFAULT_MAX_SEGMENTS
+
+# 主程序入口
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the BM25 index of processed articles.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Index new or changed articles.")
+    build_parser.add_argument('--base_path', type=str, required=True, help="Base path of csv file and article files.")
+    build_parser.add_argument('--csv_file_name', type=str, required=True, help="Csv file name.")
+    build_parser.add_argument('--index_dir', type=str, required=True, help="Directory of the index.")
+    build_parser.add_argument('--segment_size', type=int, default=50000, help="Maximum number of articles per segment (default: 50000).")
+    build_parser.add_argument('--tokenizer', type=str, choices=TOKENIZERS, help="Tokenizer (default: the one of the existing index, or jieba if installed).")
+    build_parser.add_argument('--max_segments', type=int, default=DEFAULT_MAX_SEGMENTS, help=f"Merge the smallest segments when there are more than this many (default: {DEFAULT_MAX_SEGMENTS}).")
+    build_parser.add_argument('--rebuild', action='store_true', help="Drop the existing segments and index all articles again.")
+
+    query_parser = subparsers.add_parser('query', help="Search the index.")
+    query_parser.add_argument('--index_dir', type=str, required=True, help="Directory of the index.")
+    query_parser.add_argument('--query', type=str, required=True, help="Query text.")
+    query_parser.add_argument('--category', type=str, help="Only return articles of this category.")
+    query_parser.add_argument('--top_k', type=int, default=10, help="Number of results (default: 10).")
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        try:
+            build_index(args.base_path, args.csv_file_name, args.index_dir, args.segment_size, args.rebuild, args.tokenizer, args.max_segments)
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
+        return
+
+    start = time.perf_counter()
+    index = SearchIndex(args.index_dir)
+    try:
+        load_tokenizer(index.tokenizer)
+        print(f"Opened the index in {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+        start = time.perf_counter()
+        results = index.search(args.query, args.category, args.top_k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for rank, result in enumerate(results, 1):
+            print(f"{rank}\t{result['score']:.4f}\t{result['article_id']}\t{result['category']}")
+        print(f"{len(results)} results from {len(index)} articles in {elapsed:.1f} ms.")
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
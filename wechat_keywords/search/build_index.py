@@ -0,0 +1,250 @@
+import os
+import re
+import shutil
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+from ingest.completed import id_hash
+from keywords import parse_keywords
+from storage import ArticleStore
+import ingest
+from .segment import Segment, SegmentWriter
+from .tokenizer import default_tokenizer, tokenize
+
+# 段目录名（编号越大越新）
+_SEGMENT_PATTERN = re.compile(r'^seg-(\d{6})$')
+
+# 段数超过该值时合并文章最少的段
+DEFAULT_MAX_SEGMENTS = 10
+
+# 提取文章 URL 中的文章 ID（例如：https://mp.weixin.qq.com/s/kXAQdC0xxVQqfljamNPTQQ 最后一部分）
+def get_article_id(article_url: str) -> str:
+    match = re.search(r"s/([^/]+)", article_url)
+    return match.group(1) if match else ''
+
+# 按编号从旧到新打开索引目录中的所有段
+def open_segments(index_dir: str) -> List[Segment]:
+    segments = []
+    if os.path.isdir(index_dir):
+        for name in sorted(os.listdir(index_dir)):
+            match = _SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append(Segment(os.path.join(index_dir, name), int(match.group(1))))
+    return segments
+
+# 索引使用的分词器（所有段必须一致）
+def segments_tokenizer(segments: List[Segment]) -> Optional[str]:
+    tokenizers = {segment.tokenizer for segment in segments}
+    if len(tokenizers) > 1:
+        raise ValueError(f"Index segments use different tokenizers: {sorted(tokenizers)}")
+    return tokenizers.pop() if tokenizers else None
+
+# 被删除的文章（段编号 -> 文档号集合）
+def deleted_docs(segments: List[Segment]) -> Dict[int, Set[int]]:
+    deleted: Dict[int, Set[int]] = {segment.number: set() for segment in segments}
+    for segment in segments:
+        for i in range(0, len(segment.deletes), 2):
+            number, doc = segment.deletes[i], segment.deletes[i + 1]
+            if number in deleted:
+                deleted[number].add(doc)
+    return deleted
+
+# 文章的签名：分类、关键词、指纹（包含内容哈希）或标题变化时重新索引
+def article_signature(article_id: str, row: dict) -> int:
+    fields = [article_id] + [row.get(field) or '' for field in ('category', 'keywords', 'fingerprint', 'article_name')]
+    return id_hash('\t'.join(fields))
+
+# 将一组段合并为编号为 number 的新段
+def _merge(index_dir: str, group: List[Segment], existing: Set[int], deleted: Dict[int, Set[int]], number: int) -> Segment:
+    writer = SegmentWriter(group[0].tokenizer)
+    numbers = {segment.number for segment in group}
+
+    # 先为未删除的文章分配新的文档号，再按段依次追加倒排表（同一个词的文档号保持递增）
+    mappings = []
+    for segment in group:
+        mapping = {}
+        for doc in range(segment.doc_count):
+            if doc not in deleted[segment.number]:
+                mapping[doc] = writer.add_document(segment.article_id(doc), segment.doclens[doc],
+                                                   segment.categories[segment.category_codes[doc]], segment.signatures[doc])
+        mappings.append(mapping)
+
+    for segment, mapping in zip(group, mappings):
+        for term, docs, tfs in segment.terms():
+            for doc, tf in zip(docs, tfs):
+                new_doc = mapping.get(doc)
+                if new_doc is not None:
+                    writer.add_posting(term, new_doc, tf)
+        # 保留指向未参与合并的段的删除标记
+        for i in range(0, len(segment.deletes), 2):
+            if segment.deletes[i] in existing and segment.deletes[i] not in numbers:
+                writer.delete(segment.deletes[i], segment.deletes[i + 1])
+        # 新段删除被合并段中的所有文章：删除旧段目录之前中断时，旧段中的文章不会重复出现
+        for doc in range(segment.doc_count):
+            writer.delete(segment.number, doc)
+
+    segment_dir = os.path.join(index_dir, f"seg-{number:06d}")
+    writer.write(segment_dir)
+    return Segment(segment_dir, number)
+
+def merge_segments(index_dir: str, segments: List[Segment], segment_size: int = 50000,
+                   max_segments: int = DEFAULT_MAX_SEGMENTS) -> List[Segment]:
+    """
+    分层合并索引的段，合并时去掉已删除的文章：
+
+    - 段数超过 max_segments 时，合并有效文章最少的若干个段（最多 max_segments 个，合并后不超过 segment_size 篇文章），
+      小段先合并为较大的段，每篇文章被重写的次数与段数的对数成正比；
+    - 一半以上的文章已被删除的段单独重写。
+
+    合并后的段使用新的编号，写入后再删除被合并的段。
+
+    参数：
+    index_dir (str): 索引目录。
+    segments (List[Segment]): 已打开的段（按编号从旧到新），被合并的段会被关闭。
+    segment_size (int): 合并后的段最多包含的文章数量。
+    max_segments (int): 段数超过该值时合并。
+
+    返回：
+    List[Segment]: 合并后的段（按编号从旧到新）。
+    """
+    segments = list(segments)
+    while True:
+        deleted = deleted_docs(segments)
+        live = {segment.number: segment.doc_count - len(deleted[segment.number]) for segment in segments}
+
+        group, total = [], 0
+        if len(segments) > max_segments:
+            for segment in sorted(segments, key=lambda segment: (live[segment.number], segment.number)):
+                if len(group) == max_segments or (group and total + live[segment.number] > segment_size):
+                    break
+                group.append(segment)
+                total += live[segment.number]
+        if len(group) < 2:
+            group = [segment for segment in segments if len(deleted[segment.number]) * 2 > segment.doc_count][:1]
+        if not group:
+            return segments
+
+        group.sort(key=lambda segment: segment.number)
+        merged = _merge(index_dir, group, {segment.number for segment in segments}, deleted, segments[-1].number + 1)
+        print(f"Merged {len(group)} segments into '{merged.segment_dir}' with {merged.doc_count} articles.")
+        for segment in group:
+            segment.close()
+            shutil.rmtree(segment.segment_dir)
+        segments = [segment for segment in segments if segment not in group] + [merged]
+
+# 构建或增量更新 BM25 倒排索引
+def build_index(base_path: str, csv_file_name: str, index_dir: str, segment_size: int = 50000,
+                rebuild: bool = False, tokenizer: Optional[str] = None, max_segments: int = DEFAULT_MAX_SEGMENTS) -> int:
+    """
+    为已分类的文章（Purified 内容、标题、分类和关键词）构建倒排索引。
+
+    每次运行只索引新增或签名发生变化的文章，写入新的段，并在新段中标记删除被替换的旧版本，
+    以及已不在文章列表中或不再有分类的文章。段数过多时分层合并（见 `merge_segments`）。
+
+    参数：
+    base_path (str): 文章文件和 CSV 文件所在的目录。
+    csv_file_name (str): CSV 文件名。
+    index_dir (str): 索引目录。
+    segment_size (int): 每个段最多包含的文章数量，限制构建时的内存占用。
+    rebuild (bool): 删除已有的段并重新索引全部文章。
+    tokenizer (str, 可选): 分词器，默认沿用已有索引的分词器。
+    max_segments (int): 段数超过该值时合并。
+
+    返回：
+    int: 本次索引的文章数量。
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    if rebuild:
+        for segment in open_segments(index_dir):
+            segment.close()
+            shutil.rmtree(segment.segment_dir)
+
+    segments = open_segments(index_dir)
+    try:
+        existing_tokenizer = segments_tokenizer(segments)
+        if existing_tokenizer and tokenizer and tokenizer != existing_tokenizer:
+            raise ValueError(f"The index uses the {existing_tokenizer} tokenizer, rebuild it to switch to {tokenizer}.")
+        tokenizer = existing_tokenizer or tokenizer or default_tokenizer()
+
+        # 已索引且未被替换的文章的签名（有序数组，二分查找）；被替换的旧版本不计入，
+        # 否则文章改回旧版本（A -> B -> A）时会被跳过，而 A 所在的文档已被删除
+        deleted = deleted_docs(segments)
+        indexed = array('Q', sorted(value for segment in segments for doc, value in enumerate(segment.signatures)
+                                    if doc not in deleted[segment.number]))
+        added = set()
+        # 文章列表中已分类的文章 ID 的哈希，不在其中的已索引文章被删除
+        listed = array('Q')
+
+        store = ArticleStore.open(base_path)
+        writer = SegmentWriter(tokenizer)
+        next_number = segments[-1].number + 1 if segments else 1
+        count = 0
+
+        # 写出当前段
+        def flush() -> None:
+            nonlocal writer, next_number
+            if not len(writer) and not writer.delete_count:
+                return
+            segment_dir = os.path.join(index_dir, f"seg-{next_number:06d}")
+            writer.write(segment_dir)
+            segments.append(Segment(segment_dir, next_number))
+            print(f"Wrote segment '{segment_dir}' with {len(writer)} articles and {writer.delete_count} deletes.")
+            writer = SegmentWriter(tokenizer)
+            next_number += 1
+
+        for row in ingest.iter_rows(os.path.join(base_path, csv_file_name)):
+            category = row.get('category') or ''
+            article_id = get_article_id(row.get('article_url', ''))
+            # 只索引已分类的文章
+            if not category or not article_id:
+                continue
+            listed.append(id_hash(article_id))
+            if article_id in writer:
+                continue
+
+            signature = article_signature(article_id, row)
+            position = bisect_left(indexed, signature)
+            if (position < len(indexed) and indexed[position] == signature) or signature in added:
+                continue
+
+            purified_file = f"{article_id}_purified.txt"
+            if not store.exists(purified_file):
+                continue
+            text = '\n'.join([row.get('article_name') or '', category,
+                              ' '.join(parse_keywords(row.get('keywords', ''))), store.read(purified_file)])
+
+            # 旧段中的同一篇文章被新版本替换
+            for segment in segments:
+                doc = segment.find(article_id)
+                if doc is not None:
+                    writer.delete(segment.number, doc)
+
+            writer.add(article_id, tokenize(text, tokenizer), category, signature)
+            added.add(signature)
+            count += 1
+
+            if len(writer) >= segment_size:
+                flush()
+
+        # 删除已不在文章列表中（或不再有分类）的文章
+        listed = array('Q', sorted(listed))
+        removed = 0
+        for segment in segments:
+            for value, doc in segment.id_hashes():
+                if doc in deleted.get(segment.number, ()):
+                    continue
+                position = bisect_left(listed, value)
+                if position == len(listed) or listed[position] != value:
+                    writer.delete(segment.number, doc)
+                    removed += 1
+        if removed:
+            print(f"Removing {removed} articles that are no longer listed.")
+
+        flush()
+        segments = merge_segments(index_dir, segments, segment_size, max_segments)
+    finally:
+        for segment in segments:
+            segment.close()
+
+    print(f"Indexed {count} articles into '{index_dir}'.")
+    return count
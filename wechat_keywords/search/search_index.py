@@ -0,0 +1,108 @@
+import heapq
+import math
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, List, Optional, Set
+from .build_index import deleted_docs, open_segments, segments_tokenizer
+from .tokenizer import tokenize
+
+class SearchIndex(object):
+    """
+    以内存映射方式打开 `build_index` 构建的索引，按 BM25 对文章排序。
+
+    方法：
+    - search(query: str, category: str, top_k: int) -> List[dict]: 返回得分最高的文章。
+    """
+
+    def __init__(self, index_dir: str, k1: float = 1.2, b: float = 0.75):
+        """
+        参数：
+        index_dir (str): 索引目录。
+        k1 (float): BM25 的词频饱和参数。
+        b (float): BM25 的文档长度归一化参数。
+        """
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self._segments = open_segments(index_dir)
+        self.tokenizer = segments_tokenizer(self._segments)
+
+        # 被新段替换的旧文章（段编号 -> 文档号集合）
+        self._deleted: Dict[int, Set[int]] = deleted_docs(self._segments)
+
+        # 全局统计：有效文章数量和平均长度
+        self.doc_count, total_length = 0, 0
+        for segment in self._segments:
+            deleted = self._deleted[segment.number]
+            self.doc_count += segment.doc_count - len(deleted)
+            total_length += segment.total_length - sum(segment.doclens[doc] for doc in deleted)
+        self.average_length = total_length / self.doc_count if self.doc_count else 0.0
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def search(self, query: str, category: Optional[str] = None, top_k: int = 10) -> List[dict]:
+        """
+        按 BM25 得分检索文章。
+
+        参数：
+        query (str): 查询文本（使用与索引相同的分词器）。
+        category (str, 可选): 只返回该分类的文章。
+        top_k (int): 返回的文章数量。
+
+        返回：
+        List[dict]: 按得分从高到低排列的 `{'article_id', 'category', 'score'}`。
+        """
+        if not self.doc_count:
+            return []
+        terms = Counter(tokenize(query, self.tokenizer))
+
+        # 先在各段中查找倒排表，文档频率按所有段合计（不包括已被替换的旧文章，与 doc_count 一致）
+        postings = []
+        document_frequency = Counter()
+        for segment in self._segments:
+            deleted = self._deleted[segment.number]
+            for term in terms:
+                posting = segment.lookup(term)
+                if posting is not None:
+                    postings.append((segment, term, posting))
+                    document_frequency[term] += len(posting[0])
+                    if deleted:
+                        document_frequency[term] -= sum(1 for doc in accumulate(posting[0]) if doc in deleted)
+
+        k1, b, average_length = self.k1, self.b, self.average_length
+        scores: Dict[tuple, float] = {}
+        for segment, term, (deltas, tfs) in postings:
+            category_code = None
+            if category is not None:
+                if category not in segment.categories:
+                    continue
+                category_code = segment.categories.index(category)
+
+            df = document_frequency[term]
+            weight = terms[term] * math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5)) * (k1 + 1)
+            deleted = self._deleted[segment.number]
+            doclens, category_codes, number = segment.doclens, segment.category_codes, segment.number
+            for doc, tf in zip(accumulate(deltas), tfs):
+                if category_code is not None and category_codes[doc] != category_code:
+                    continue
+                if doc in deleted:
+                    continue
+                key = (number, doc)
+                scores[key] = scores.get(key, 0.0) + weight * tf / (tf + k1 * (1 - b + b * doclens[doc] / average_length))
+
+        segments = {segment.number: segment for segment in self._segments}
+        results = []
+        for (number, doc), score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+            segment = segments[number]
+            results.append({
+                'article_id': segment.article_id(doc),
+                'category': segment.categories[segment.category_codes[doc]],
+                'score': score,
+            })
+        return results
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
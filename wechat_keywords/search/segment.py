@@ -0,0 +1,292 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+from ingest.completed import id_hash
+
+# 段的描述文件
+META_FILE_NAME = 'meta.json'
+
+# 词典中每个词的记录：词在 terms.bin 中的偏移、倒排表在 postings.bin 中的偏移、文档频率、文档号差值的字节宽度
+_LEXICON_ENTRY = struct.Struct('=QQII')
+
+# 文档号差值的字节宽度对应的 array 类型
+_WIDTH_TYPECODES = {1: 'B', 2: 'H', 4: 'I'}
+
+# 词频的上限（词频按 16 位保存，BM25 对高词频本身就会饱和）
+_MAX_TF = 0xFFFF
+
+# 将文档号列表编码为差值，并选择能容纳最大差值的最小宽度
+def encode_deltas(docs: array) -> Tuple[int, bytes]:
+    deltas = array('I', docs)
+    for i in range(len(deltas) - 1, 0, -1):
+        deltas[i] -= deltas[i - 1]
+    largest = max(deltas)
+    width = 1 if largest <= 0xFF else 2 if largest <= 0xFFFF else 4
+    return width, array(_WIDTH_TYPECODES[width], deltas).tobytes()
+
+class SegmentWriter(object):
+    """
+    在内存中累积一个段的倒排表，然后一次性写入磁盘。段写入后不再修改。
+    """
+
+    def __init__(self, tokenizer: str):
+        self.tokenizer = tokenizer
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        self._doclens = array('I')
+        self._categories = array('H')
+        self._category_codes: Dict[str, int] = {}
+        self._signatures = array('Q')
+        self._deletes = array('I')
+        self.total_length = 0
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self._doc_index
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    @property
+    def delete_count(self) -> int:
+        return len(self._deletes) // 2
+
+    def add(self, article_id: str, tokens: List[str], category: str, signature: int) -> int:
+        """
+        添加一篇文章。
+
+        :param article_id: 文章 ID
+        :param tokens: 文章的词列表
+        :param category: 文章分类
+        :param signature: 文章内容的签名（用于增量更新时判断文章是否变化）
+        :return: 文章在段内的文档号
+        """
+        doc = self.add_document(article_id, len(tokens), category, signature)
+        for term, tf in Counter(tokens).items():
+            self.add_posting(term, doc, tf)
+        return doc
+
+    def add_document(self, article_id: str, length: int, category: str, signature: int) -> int:
+        """
+        添加一篇文章的元数据（不包括倒排表，合并段时与 `add_posting` 一起使用）。
+
+        :return: 文章在段内的文档号
+        """
+        doc = len(self._doc_ids)
+        self._doc_ids.append(article_id)
+        self._doc_index[article_id] = doc
+        self._doclens.append(length)
+        self.total_length += length
+        self._signatures.append(signature)
+
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self._category_codes)
+            self._category_codes[category] = code
+        self._categories.append(code)
+        return doc
+
+    def add_posting(self, term: str, doc: int, tf: int) -> None:
+        """
+        添加词在文章中的词频。同一个词的文档号必须递增。
+        """
+        posting = self._postings.get(term)
+        if posting is None:
+            posting = (array('I'), array('H'))
+            self._postings[term] = posting
+        posting[0].append(doc)
+        posting[1].append(min(tf, _MAX_TF))
+
+    def delete(self, segment_number: int, doc: int) -> None:
+        """
+        标记旧段中的文章已被删除（被本段中的新版本替换，或已不在文章列表中）。
+        """
+        self._deletes.extend((segment_number, doc))
+
+    def write(self, segment_dir: str) -> None:
+        """
+        将段写入目录（先写入临时目录，再原子重命名）。
+        """
+        tmp_dir = os.path.join(os.path.dirname(segment_dir), f".{os.path.basename(segment_dir)}.tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        def write_file(name: str, data: bytes) -> None:
+            with open(os.path.join(tmp_dir, name), 'wb') as f_data:
+                f_data.write(data)
+
+        # 词典按 UTF-8 字节序排序，查询时在内存映射的文件上二分查找
+        terms = sorted((term.encode('utf-8'), term) for term in self._postings)
+        lexicon, term_bytes, postings = bytearray(), bytearray(), bytearray()
+        for encoded, term in terms:
+            docs, tfs = self._postings[term]
+            width, deltas = encode_deltas(docs)
+            lexicon += _LEXICON_ENTRY.pack(len(term_bytes), len(postings), len(docs), width)
+            term_bytes += encoded
+            postings += deltas
+            postings += tfs.tobytes()
+        # 结尾的哨兵记录，用于计算最后一个词的长度
+        lexicon += _LEXICON_ENTRY.pack(len(term_bytes), len(postings), 0, 0)
+
+        write_file('lexicon.bin', bytes(lexicon))
+        write_file('terms.bin', bytes(term_bytes))
+        write_file('postings.bin', bytes(postings))
+
+        # 文章 ID：拼接后的字符串及其偏移
+        id_bytes, id_offsets = bytearray(), array('Q', [0])
+        for article_id in self._doc_ids:
+            id_bytes += article_id.encode('utf-8')
+            id_offsets.append(len(id_bytes))
+        write_file('ids.bin', bytes(id_bytes))
+        write_file('ids.idx', id_offsets.tobytes())
+
+        # 文章 ID 的哈希（有序）及对应的文档号，用于在新段中查找被替换的旧文章
+        hashed = sorted((id_hash(article_id), doc) for doc, article_id in enumerate(self._doc_ids))
+        write_file('idhash.bin', array('Q', (value for value, _ in hashed)).tobytes())
+        write_file('idhash_docs.bin', array('I', (doc for _, doc in hashed)).tobytes())
+
+        write_file('doclens.bin', self._doclens.tobytes())
+        write_file('categories.bin', self._categories.tobytes())
+        write_file('signatures.bin', self._signatures.tobytes())
+        write_file('deletes.bin', self._deletes.tobytes())
+
+        meta = {
+            'tokenizer': self.tokenizer,
+            'byteorder': sys.byteorder,
+            'doc_count': len(self._doc_ids),
+            'term_count': len(terms),
+            'total_length': self.total_length,
+            'categories': list(self._category_codes),
+        }
+        with open(os.path.join(tmp_dir, META_FILE_NAME), 'w', encoding='utf-8') as meta_file:
+            json.dump(meta, meta_file, ensure_ascii=False)
+
+        os.rename(tmp_dir, segment_dir)
+
+class Segment(object):
+    """
+    以内存映射方式读取一个段。
+    """
+
+    def __init__(self, segment_dir: str, number: int):
+        """
+        :param segment_dir: 段目录
+        :param number: 段编号（越大越新）
+        """
+        self.segment_dir = segment_dir
+        self.number = number
+        with open(os.path.join(segment_dir, META_FILE_NAME), 'r', encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        if meta['byteorder'] != sys.byteorder:
+            raise ValueError(f"Segment '{segment_dir}' was written with {meta['byteorder']}-endian byte order.")
+
+        self.tokenizer = meta['tokenizer']
+        self.doc_count = meta['doc_count']
+        self.term_count = meta['term_count']
+        self.total_length = meta['total_length']
+        self.categories: List[str] = meta['categories']
+
+        self._maps: List[mmap.mmap] = []
+        self._views: List[memoryview] = []
+        self._lexicon = self._map('lexicon.bin')
+        self._terms = self._map('terms.bin')
+        self._postings = self._map('postings.bin')
+        self._ids = self._map('ids.bin')
+        self._id_offsets = self._view('ids.idx', 'Q')
+        self._idhashes = self._view('idhash.bin', 'Q')
+        self._idhash_docs = self._view('idhash_docs.bin', 'I')
+        self.doclens = self._view('doclens.bin', 'I')
+        self.category_codes = self._view('categories.bin', 'H')
+        self.signatures = self._view('signatures.bin', 'Q')
+        self.deletes = self._view('deletes.bin', 'I')
+
+    # 内存映射文件（空文件无法映射，返回空字节串）
+    def _map(self, name: str):
+        path = os.path.join(self.segment_dir, name)
+        if os.path.getsize(path) == 0:
+            return b''
+        with open(path, 'rb') as f_data:
+            mapped = mmap.mmap(f_data.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    # 将内存映射的文件视为指定类型的数组（不复制数据）
+    def _view(self, name: str, typecode: str) -> memoryview:
+        view = memoryview(self._map(name))
+        typed = view.cast(typecode)
+        self._views.extend((typed, view))
+        return typed
+
+    def article_id(self, doc: int) -> str:
+        return self._ids[self._id_offsets[doc]:self._id_offsets[doc + 1]].decode('utf-8')
+
+    def find(self, article_id: str) -> Optional[int]:
+        """
+        查找文章在本段中的文档号，不存在时返回 None。
+        """
+        value = id_hash(article_id)
+        position = bisect_left(self._idhashes, value)
+        if position < len(self._idhashes) and self._idhashes[position] == value:
+            return self._idhash_docs[position]
+        return None
+
+    def id_hashes(self) -> Iterator[Tuple[int, int]]:
+        """
+        按哈希值升序返回（文章 ID 的哈希，文档号）。
+        """
+        return zip(self._idhashes, self._idhash_docs)
+
+    def terms(self) -> Iterator[Tuple[str, Iterator[int], array]]:
+        """
+        按词典顺序返回每个词及其倒排表（文档号、词频）。
+        """
+        for index in range(self.term_count):
+            deltas, tfs = self._posting(index)
+            yield self._term(index).decode('utf-8'), accumulate(deltas), tfs
+
+    # 读取第 index 个词的记录
+    def _entry(self, index: int) -> Tuple[int, int, int, int]:
+        return _LEXICON_ENTRY.unpack_from(self._lexicon, index * _LEXICON_ENTRY.size)
+
+    def _term(self, index: int) -> bytes:
+        start = self._entry(index)[0]
+        end = self._entry(index + 1)[0]
+        return self._terms[start:end]
+
+    def lookup(self, term: str) -> Optional[Tuple[array, array]]:
+        """
+        在词典中二分查找词，返回其倒排表（文档号差值、词频），不存在时返回 None。
+        """
+        encoded = term.encode('utf-8')
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.term_count or self._term(low) != encoded:
+            return None
+        return self._posting(low)
+
+    # 读取第 index 个词的倒排表（文档号差值、词频）
+    def _posting(self, index: int) -> Tuple[array, array]:
+        _, offset, df, width = self._entry(index)
+        deltas = array(_WIDTH_TYPECODES[width])
+        deltas.frombytes(self._postings[offset:offset + df * width])
+        tfs = array('H')
+        tfs.frombytes(self._postings[offset + df * width:offset + df * (width + 2)])
+        return deltas, tfs
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views, self._maps = [], []
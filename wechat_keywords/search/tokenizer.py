@@ -0,0 +1,66 @@
+import importlib.util
+import re
+from typing import List, Optional
+
+# 支持的分词器：jieba（需要安装 jieba）和 bigram（中文按相邻两个字切分，无需额外依赖）
+TOKENIZERS = ['jieba', 'bigram']
+
+# 中文字符连续片段或由字母数字组成的词
+_TOKEN_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[0-9a-z]+(?:[._-][0-9a-z]+)*[+#]*')
+
+# 中文字符
+_CJK_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+# 导入 jieba（只有使用 jieba 分词时才需要）
+def _import_jieba():
+    try:
+        import jieba
+        jieba.setLogLevel(60)
+        return jieba
+    except ImportError:
+        raise RuntimeError("The jieba tokenizer requires 'jieba', please install it first (pip install jieba).")
+
+# 默认分词器：安装了 jieba 时使用 jieba，否则使用 bigram
+def default_tokenizer() -> str:
+    return 'jieba' if importlib.util.find_spec('jieba') is not None else 'bigram'
+
+# 预先加载分词器（jieba 首次分词时需要加载词典，耗时较长）
+def load_tokenizer(tokenizer: str) -> None:
+    if tokenizer == 'jieba':
+        _import_jieba().initialize()
+
+# 将中文片段切分为相邻两个字组成的词（单个字的片段保留原样）
+def _bigrams(text: str) -> List[str]:
+    if len(text) == 1:
+        return [text]
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+def tokenize(text: str, tokenizer: Optional[str] = None) -> List[str]:
+    """
+    将文本切分为索引使用的词（英文转换为小写，忽略标点和空白）。
+
+    :param text: 文本
+    :param tokenizer: 分词器（'jieba' 或 'bigram'），默认见 `default_tokenizer`
+    :return: 词列表（保留重复的词，用于统计词频）
+    """
+    tokenizer = tokenizer or default_tokenizer()
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(f"Unsupported tokenizer: {tokenizer}")
+    text = text.lower()
+
+    if tokenizer == 'jieba':
+        jieba = _import_jieba()
+        tokens = []
+        for word in jieba.cut_for_search(text):
+            # jieba 会将标点和空白作为单独的词返回
+            tokens.extend(match.group(0) for match in _TOKEN_PATTERN.finditer(word))
+        return tokens
+
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        if _CJK_PATTERN.match(token):
+            tokens.extend(_bigrams(token))
+        else:
+            tokens.append(token)
+    return tokens
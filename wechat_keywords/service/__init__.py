@@ -0,0 +1,2 @@
+from .job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED, FINISHED_STATES, DEFAULT_RETENTION
+from .http_api import serve
@@ -0,0 +1,45 @@
+# __main__.py
+import argparse
+import os
+from api import create_llm_api, API_TYPES
+from columnar import ColumnarCorpus
+from storage import ArticleStore
+from service import JobQueue, DEFAULT_RETENTION, serve
+from service.keyword_jobs import KeywordJobs
+
+# 主程序入口
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local HTTP/JSON API that classifies and extracts keywords from submitted articles.")
+
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument('--port', type=int, default=8701, help="Port to listen on (default: 8701).")
+    parser.add_argument('--base_path', type=str, required=True, help="Base path of article files.")
+    parser.add_argument('--api_type', type=str, required=True, choices=list(API_TYPES), help="LLM API type to use.")
+    parser.add_argument('--api_url', type=str, required=True, help="URL of the LLM API.")
+    parser.add_argument('--api_key', type=str, required=True, help="API key for the LLM API.")
+    parser.add_argument('--llm_model', type=str, required=True, help="Model to use with the LLM API.")
+    parser.add_argument('--keyword_count', type=int, default=3, help="Number of keywords to extract (default: 3).")
+    parser.add_argument('--keep_alive', type=str, default='30m', help="How long ollama keeps the model loaded between requests (default: 30m, -1 keeps it forever).")
+    parser.add_argument('--corpus_dir', type=str, required=False, help="Columnar corpus directory to read texified content from.")
+    parser.add_argument('--result_file', type=str, required=False, help="Append results to this CSV file (same format as the streaming result file).")
+    parser.add_argument('--journal', type=str, required=False, help="Job journal used to resume pending jobs (default: <base_path>/.keyword_jobs.jsonl).")
+    parser.add_argument('--workers', type=int, default=1, help="Number of concurrent LLM workers (default: 1).")
+    parser.add_argument('--job_retention', type=int, default=DEFAULT_RETENTION, help=f"Number of finished jobs kept in memory and in the journal (default: {DEFAULT_RETENTION}).")
+
+    args = parser.parse_args()
+
+    llm_api = create_llm_api(args.api_type, args.api_url, args.api_key, args.llm_model, args.keep_alive)
+    # 启动时加载模型，避免第一篇文章承担模型加载的耗时
+    try:
+        llm_api.warm_up()
+    except Exception as e:
+        print(f"Warning: Failed to warm up model {args.llm_model}: {e}")
+
+    store = ArticleStore.open(args.base_path)
+    corpus = ColumnarCorpus(args.corpus_dir) if args.corpus_dir else None
+    jobs = KeywordJobs(llm_api, store, args.keyword_count, corpus, args.result_file)
+    job_queue = JobQueue(jobs, args.journal or os.path.join(args.base_path, '.keyword_jobs.jsonl'), args.workers, args.job_retention)
+    serve(job_queue, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
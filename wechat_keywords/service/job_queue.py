@@ -0,0 +1,229 @@
+import itertools
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, FAILED)
+
+# 订阅者队列的容量，消费过慢的订阅者会被移除
+_SUBSCRIBER_CAPACITY = 10000
+
+# 默认保留的已结束任务数量，更早结束的任务不再能查询
+DEFAULT_RETENTION = 10000
+
+# 日志行数超过保留任务数量的两倍再加上该值时压缩日志
+_COMPACT_SLACK = 1000
+
+class JobQueue(object):
+    """
+    带优先级的任务队列。任务由后台工作线程按优先级（数值越大越先处理）和提交顺序处理，
+    每次状态变化都追加写入 JSONL 日志，服务重启后未完成的任务重新入队。
+    只保留最近结束的 retention 个任务；日志在重启时以及行数过多时压缩为保留任务的最新状态。
+
+    方法：
+    - submit(article_url: str, priority: int, options: dict) -> dict: 提交任务（同一篇文章未完成时返回已有任务）。
+    - get(job_id: str) -> dict: 查询任务状态。
+    - subscribe() -> queue.Queue: 订阅任务状态变化。
+    """
+
+    def __init__(self, handle_job: Callable[[dict], dict], journal_path: str, workers: int = 1,
+                 retention: int = DEFAULT_RETENTION):
+        """
+        :param handle_job: 处理任务的函数，返回结果字典，失败时抛出异常
+        :param journal_path: 任务日志（JSONL）路径
+        :param workers: 工作线程数量
+        :param retention: 保留的已结束任务数量
+        """
+        self._handle_job = handle_job
+        self._journal_path = journal_path
+        self._retention = retention
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, dict] = {}
+        self._active: Dict[str, str] = {}
+        # 已结束的任务（按结束顺序），超过保留数量时移除最早的
+        self._finished: 'OrderedDict[str, None]' = OrderedDict()
+        self._journal = None
+        self._journal_lines = 0
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+
+        self._replay()
+        self._compact()
+
+    # 读取任务日志中每个任务的最新状态，并将未完成的任务重新入队
+    def _replay(self) -> None:
+        if not os.path.exists(self._journal_path):
+            return
+        with open(self._journal_path, 'r', encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    job = json.loads(line)
+                except json.JSONDecodeError:
+                    # 服务中断时最后一行可能不完整
+                    continue
+                self._jobs[job['id']] = job
+
+        requeued = 0
+        for job in sorted(self._jobs.values(), key=lambda job: job['submitted']):
+            if job['status'] not in FINISHED_STATES:
+                job['status'] = QUEUED
+                job['started'] = None
+                self._active[job['article_url']] = job['id']
+                self._queue.put((-job['priority'], next(self._sequence), job['id']))
+                requeued += 1
+
+        loaded = len(self._jobs)
+        for job in sorted((job for job in self._jobs.values() if job['status'] in FINISHED_STATES),
+                          key=lambda job: job['finished'] or 0):
+            self._finish(job['id'])
+        print(f"Loaded {loaded} jobs from '{self._journal_path}', {requeued} requeued, {len(self._finished)} finished jobs kept.")
+
+    # 记录已结束的任务，移除超出保留数量的最早结束的任务（调用时需持有锁）
+    def _finish(self, job_id: str) -> None:
+        self._finished[job_id] = None
+        while len(self._finished) > self._retention:
+            evicted, _ = self._finished.popitem(last=False)
+            self._jobs.pop(evicted, None)
+
+    # 将日志压缩为保留任务的最新状态（先写临时文件，再原子替换），并重新打开日志（调用时需持有锁）
+    def _compact(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=os.path.dirname(os.path.abspath(self._journal_path)))
+        with os.fdopen(fd, 'w', encoding='utf-8') as journal:
+            for job in self._jobs.values():
+                journal.write(json.dumps(job, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self._journal_path)
+        self._journal = open(self._journal_path, 'a', encoding='utf-8')
+        self._journal_lines = len(self._jobs)
+
+    # 更新任务状态：写入日志并通知订阅者（调用时需持有锁）
+    def _update(self, job: dict, **changes) -> dict:
+        job.update(changes)
+        if job['status'] in FINISHED_STATES:
+            self._finish(job['id'])
+        self._journal.write(json.dumps(job, ensure_ascii=False) + '\n')
+        self._journal.flush()
+        self._journal_lines += 1
+        if self._journal_lines > 2 * len(self._jobs) + _COMPACT_SLACK:
+            self._compact()
+
+        snapshot = dict(job)
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(snapshot)
+            except queue.Full:
+                self._subscribers.remove(subscriber)
+        return snapshot
+
+    def start(self) -> None:
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self) -> None:
+        """
+        停止工作线程（等待正在处理的任务完成），未处理的任务保留在日志中。
+        """
+        for _ in self._workers:
+            self._queue.put((float('-inf'), next(self._sequence), None))
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.join()
+        self._journal.close()
+
+    def submit(self, article_url: str, priority: int = 0, options: Optional[dict] = None) -> dict:
+        """
+        提交任务。
+
+        :param article_url: 文章 URL
+        :param priority: 优先级，数值越大越先处理
+        :param options: 传给处理函数的其他参数
+        :return: 任务状态
+        """
+        with self._lock:
+            job_id = self._active.get(article_url)
+            if job_id is not None:
+                return dict(self._jobs[job_id])
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'article_url': article_url,
+                'priority': priority,
+                'options': options or {},
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'error': None,
+            }
+            self._jobs[job['id']] = job
+            self._active[article_url] = job['id']
+            snapshot = self._update(job, status=QUEUED)
+        self._queue.put((-priority, next(self._sequence), job['id']))
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {state: 0 for state in (QUEUED, RUNNING, DONE, FAILED)}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+        return counts
+
+    def subscribe(self) -> queue.Queue:
+        """
+        订阅任务状态变化，返回的队列中依次放入每次变化后的任务状态。
+        """
+        subscriber = queue.Queue(maxsize=_SUBSCRIBER_CAPACITY)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def is_subscribed(self, subscriber: queue.Queue) -> bool:
+        """
+        订阅是否仍然有效（消费过慢的订阅者会被移除）。
+        """
+        with self._lock:
+            return subscriber in self._subscribers
+
+    def _work(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+
+            with self._lock:
+                job = self._jobs[job_id]
+                self._update(job, status=RUNNING, started=time.time())
+
+            try:
+                result, error, status = self._handle_job(dict(job)), None, DONE
+            except Exception as e:
+                print(f"Error: Job {job_id} ({job['article_url']}) failed: {e}")
+                result, error, status = None, str(e), FAILED
+
+            with self._lock:
+                self._active.pop(job['article_url'], None)
+                self._update(job, status=status, finished=time.time(), result=result, error=error)
@@ -0,0 +1,60 @@
+import csv
+import os
+import threading
+from columnar import ColumnarCorpus
+from columnar.export_corpus import get_article_id
+from data_processor import process_article, RESULT_FIELDS
+from storage import ArticleStore
+
+class KeywordJobs(object):
+    """
+    服务模式下处理分类任务：复用同一个 LLM API 实例（以及其中的 HTTP 连接），
+    处理结果追加到结果文件中（格式与批量模式的流式结果文件相同）。
+    """
+
+    def __init__(self, llm_api, store: ArticleStore, keyword_count: int, corpus: ColumnarCorpus = None,
+                 result_path: str = None):
+        """
+        参数：
+        llm_api (LLMApi): LLM API 实例。
+        store (ArticleStore): 文章存储后端。
+        keyword_count (int): 需要提取的关键词数量。
+        corpus (ColumnarCorpus): 列式文章库（可以为 None）。
+        result_path (str): 结果 CSV 文件路径（可以为 None）。
+        """
+        self.llm_api = llm_api
+        self.store = store
+        self.keyword_count = keyword_count
+        self.corpus = corpus
+        self.result_path = result_path
+        self._result_lock = threading.Lock()
+
+    # 追加一行到结果文件
+    def _append_result(self, row: dict) -> None:
+        with self._result_lock:
+            write_header = not os.path.exists(self.result_path) or os.path.getsize(self.result_path) == 0
+            with open(self.result_path, 'a', newline='', encoding='utf-8') as resultfile:
+                writer = csv.DictWriter(resultfile, fieldnames=['article_url'] + RESULT_FIELDS, extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(row)
+
+    def __call__(self, job: dict) -> dict:
+        article_url = job['article_url']
+        article_id = get_article_id(article_url)
+        if not article_id:
+            raise ValueError(f"Invalid article URL: {article_url}")
+
+        # 已有的分类和关键词可以随任务一起提交，此时只补全缺少的部分
+        options = job.get('options') or {}
+        row = {'article_url': article_url}
+        row.update({field: options[field] for field in RESULT_FIELDS if options.get(field)})
+
+        process_article(row, article_id, self.llm_api, self.store, self.corpus, self.keyword_count,
+                        bool(options.get('reprocess_stale')))
+        if not row.get('category'):
+            raise RuntimeError(f"Failed to classify article: {article_url}")
+
+        if self.result_path:
+            self._append_result(row)
+        return {field: row.get(field, '') for field in ['article_url'] + RESULT_FIELDS}
@@ -0,0 +1 @@
+from .article_store import ArticleStore
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试以应用目录为 PYTHONPATH 导入模块（与 Dockerfile 中的 PYTHONPATH=/app 一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
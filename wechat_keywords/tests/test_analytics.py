@@ -0,0 +1,83 @@
+import csv
+import pytest
+from analytics import cluster_keywords, KeywordAnalytics, load_synonyms
+from analytics.vocabulary import _load_csv_with_arrow, _load_rows
+import ingest
+
+def clusters(keywords, counts=None, synonyms=None):
+    mapping, names = cluster_keywords(keywords, counts or [1] * len(keywords), synonyms)
+    return [names[cluster] for cluster in mapping]
+
+def test_normalized_forms_and_plurals_are_merged():
+    assert clusters(['GPT-4', 'gpt4', 'ＧＰＴ 4'], [1, 3, 1]) == ['gpt4'] * 3
+    assert clusters(['LLMs', 'LLM'], [1, 2]) == ['LLM', 'LLM']
+    assert clusters(['人工智能领域', '人工智能'], [1, 5]) == ['人工智能', '人工智能']
+    assert clusters(['高血压病', '高血压', '阿尔茨海默症', '阿尔茨海默'], [1, 2, 1, 1]) == ['高血压', '高血压', '阿尔茨海默', '阿尔茨海默']
+
+def test_suffixes_that_change_the_meaning_are_not_merged():
+    keywords = ['心脏病', '心脏', '操作系统', '操作', '人工智能技术', '人工智能', '强迫症', '强迫']
+    assert clusters(keywords) == keywords
+
+def test_stem_must_be_at_least_as_common():
+    # news 比 new 常见：不合并
+    assert clusters(['news', 'new'], [10, 1]) == ['news', 'new']
+    assert clusters(['互联网行业', '互联网'], [10, 1]) == ['互联网行业', '互联网']
+    assert clusters(['高血压病', '高血压'], [10, 1]) == ['高血压病', '高血压']
+
+def test_synonyms(tmp_path):
+    path = tmp_path / 'synonyms.txt'
+    path.write_text('# 注释\n高血压, 高血压病\n\n', encoding='utf-8')
+    synonyms = load_synonyms(str(path))
+    assert synonyms == {'高血压': '高血压', '高血压病': '高血压'}
+    assert clusters(['高血压病', '高血压', '心脏病'], [5, 1, 1], synonyms) == ['高血压', '高血压', '心脏病']
+
+ROWS = [
+    ('["a","b","a"]', 'x', '2025-01-02 10:00:00'),
+    ('["b", "c"]', 'y', '2025-02-01'),
+    ('["带\\"引号", " d "]', 'x', ''),
+    ('[1, "a"]', '', 'unknown'),
+    ('', 'x', '2025-01-05'),
+    ('not json', 'y', '2025-01-05'),
+    ('[]', 'y', '2025-03-01'),
+    ('["e"]', ' y ', None),
+]
+
+@pytest.fixture
+def article_list(tmp_path):
+    path = tmp_path / 'list.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=['article_url', 'keywords', 'category', 'download_time'])
+        writer.writeheader()
+        for index, (keywords, category, download_time) in enumerate(ROWS):
+            writer.writerow({'article_url': f"u{index}", 'keywords': f'"{keywords}"' if keywords else '',
+                             'category': category, 'download_time': download_time})
+    return str(path)
+
+# 与编号和文章顺序无关的表示
+def decode(table):
+    articles = []
+    for i in range(len(table)):
+        keywords = sorted(table.keywords[k] for k in table.indices[table.indptr[i]:table.indptr[i + 1]])
+        month = table.month_names[table.months[i]] if table.months[i] >= 0 else None
+        articles.append((tuple(keywords), table.category_names[table.categories[i]], month))
+    return sorted(articles)
+
+def test_arrow_and_row_loaders_agree(article_list):
+    pytest.importorskip('pyarrow')
+    rows = decode(_load_rows(ingest.iter_rows(article_list)))
+    assert rows == sorted([(('a', 'b'), 'x', '2025-01'), (('b', 'c'), 'y', '2025-02'), (('d', '带"引号'), 'x', None),
+                           (('1', 'a'), '', None), (('e',), 'y', None)])
+    assert decode(_load_csv_with_arrow(article_list)) == rows
+
+def test_matrices(article_list):
+    pytest.importorskip('scipy')
+    analytics = KeywordAnalytics(_load_rows(ingest.iter_rows(article_list)))
+    counts = dict(zip(analytics.keywords, analytics.counts.tolist()))
+    assert counts['a'] == 2 and counts['b'] == 2
+    top = {(row['category'], row['keyword']): row['count'] for row in analytics.top_by_category(10)}
+    assert top[('x', 'a')] == 1 and top[('y', 'b')] == 1
+    pairs = {(row['keyword_a'], row['keyword_b']): row['count'] for row in analytics.top_pairs(10)}
+    assert pairs.get(('a', 'b'), pairs.get(('b', 'a'))) == 1
+    trends = {row['keyword']: row for row in analytics.trends(10)}
+    assert analytics.months == ['2025-01', '2025-02']
+    assert trends['b']['2025-01'] == 1 and trends['b']['2025-02'] == 1
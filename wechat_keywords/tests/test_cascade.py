@@ -0,0 +1,103 @@
+import math
+import pytest
+from api import LLMApi
+from keywords import CascadeApi
+from keywords.cascade import answer_confidence
+from keywords.classify_article import parse_tag
+
+class ScriptedApi(LLMApi):
+    """
+    依次返回预设输出的模型，可以附带每个 token 的对数概率（输出为这些 token 拼接而成的文本）。
+    """
+
+    def __init__(self, model, outputs, token_logprobs=None):
+        super().__init__('http://llm', 'key', model)
+        self.outputs = list(outputs)
+        self.token_logprobs = token_logprobs
+        self.calls = []
+
+    def generate(self, prompt, handle_output, options=None):
+        self.calls.append(options)
+        output = self.outputs.pop(0) if len(self.outputs) > 1 else self.outputs[0]
+        if isinstance(output, Exception):
+            raise output
+        if self.token_logprobs is not None:
+            output = ''.join(token for token, _ in self.token_logprobs)
+        self._record_response(token_logprobs=self.token_logprobs if (options or {}).get('logprobs') else None)
+        return handle_output(output)
+
+def classify(cascade):
+    return cascade.generate('prompt', lambda output: output)
+
+def test_unanimous_votes_stop_early_and_accept():
+    small, large = ScriptedApi('small', ['a']), ScriptedApi('large', ['b'])
+    cascade = CascadeApi([small, large], threshold=0.6, samples=3)
+    # 3 次采样中需要 2 票，前两次一致后不再采样
+    assert classify(cascade) == 'a'
+    assert len(small.calls) == 2 and not large.calls
+    assert [call['seed'] for call in small.calls] == [0, 1]
+    assert cascade.last_response['tier'] == 0
+
+@pytest.mark.parametrize('outputs, threshold, expected, calls', [
+    # 阈值 0.8 需要 3 票：前两次不一致后已经不可能达到，提前停止并交给下一级
+    (['a', 'b', 'a'], 0.8, 'final', 2),
+    # 2/3 票达到阈值 0.6
+    (['a', 'b', 'a'], 0.6, 'a', 3),
+    # 阈值 0.5 需要 2 票：第三次采样后达到
+    (['a', 'b', 'b'], 0.5, 'b', 3),
+    # 解析失败的输出不计票
+    (['', '', 'a'], 0.3, 'a', 3),
+    (['', '', ''], 0.3, 'final', 3),
+])
+def test_vote_thresholds(outputs, threshold, expected, calls):
+    small, large = ScriptedApi('small', outputs), ScriptedApi('large', ['final'])
+    cascade = CascadeApi([small, large], threshold=threshold, samples=3)
+    assert classify(cascade) == expected
+    assert len(small.calls) == calls
+    assert len(large.calls) == (expected == 'final')
+
+# 代码块中的 JSON 输出，格式部分的 token 概率较低（不影响置信度），标签由两个 token 组成
+def tagged(tag, probabilities, scaffolding=0.5):
+    tokens = [('```', scaffolding), ('json', scaffolding), ('\n{"', scaffolding), ('tag', scaffolding), ('": "', scaffolding)]
+    tokens += [(tag[:1], probabilities[0]), (tag[1:], probabilities[1]), ('"}\n```', scaffolding)]
+    return [(token, math.log(probability)) for token, probability in tokens]
+
+def test_answer_confidence_ignores_the_format():
+    assert answer_confidence(tagged('心内', (0.9, 1.0)), '心内') == pytest.approx(0.9)
+    assert answer_confidence(tagged('心内', (0.9, 0.5), scaffolding=0.01), '心内') == pytest.approx(0.45)
+    # 输出中找不到答案时使用每个 token 的平均对数概率
+    assert answer_confidence([('a', math.log(0.25)), ('b', math.log(1.0))], 'x') == pytest.approx(0.5)
+
+def test_logprobs_and_fallback_to_votes():
+    confident = ScriptedApi('confident', [''], tagged('ab', (0.95, 0.99), scaffolding=0.3))
+    unsure = ScriptedApi('unsure', [''], tagged('cd', (0.6, 0.99)))
+    no_logprobs = ScriptedApi('plain', ['c'])
+    large = ScriptedApi('large', ['final'])
+    cascade = CascadeApi([unsure, confident, large], threshold=0.8, method='logprobs')
+    assert cascade.generate('prompt', parse_tag) == 'ab'
+    assert cascade.last_response['confidence'] == pytest.approx(0.95 * 0.99)
+
+    cascade = CascadeApi([no_logprobs, large], threshold=0.8, method='logprobs', samples=3)
+    assert classify(cascade) == 'c'
+    # 第一次请求 logprobs 失败后改用 votes（3 次采样一致）
+    assert len(no_logprobs.calls) == 4
+    assert classify(cascade) == 'c' and len(no_logprobs.calls) == 7
+
+def test_failing_tier_escalates_and_final_errors_raise():
+    failing, large = ScriptedApi('small', [RuntimeError('down')]), ScriptedApi('large', ['final'])
+    cascade = CascadeApi([failing, large])
+    assert classify(cascade) == 'final'
+    assert 'escalated 1' in cascade.report()
+
+    with pytest.raises(RuntimeError):
+        classify(CascadeApi([ScriptedApi('small', ['']), ScriptedApi('large', [RuntimeError('down')])]))
+
+def test_model_name_and_report():
+    cascade = CascadeApi([ScriptedApi('s', ['a']), ScriptedApi('l', ['b'])], threshold=0.8, samples=5)
+    assert cascade.model == 'cascade(s>l@0.8,votes5)'
+    assert CascadeApi([ScriptedApi('s', ['a']), ScriptedApi('l', ['b'])], method='logprobs').model == 'cascade(s>l@0.8,logprobs)'
+    assert cascade.report() == 'Cascade: no articles classified.'
+    classify(cascade)
+    assert 'accepted 1 (100.0%)' in cascade.report()
+    with pytest.raises(ValueError):
+        CascadeApi([ScriptedApi('l', ['b'])], method='other')
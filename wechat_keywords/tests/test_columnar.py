@@ -0,0 +1,79 @@
+import csv
+import json
+import pytest
+from columnar import ColumnarCorpus, export_corpus
+from columnar.export_corpus import partition_name
+
+pytest.importorskip('pyarrow')
+
+def write_list(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=['article_url', 'article_name', 'category', 'keywords'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+def test_partition_names_do_not_collide():
+    names = {partition_name(category) for category in ['a/b', 'a b', 'a_b', 'a:b', 'a%2Fb']}
+    assert len(names) == 5
+    assert partition_name('') == partition_name('  ')
+
+@pytest.mark.parametrize('export_format', ['parquet', 'arrow'])
+def test_export_and_read_back(tmp_path, export_format):
+    rows = []
+    for index, category in enumerate(['a/b', 'a b', 'a_b', '', 'a/b']):
+        article_id = f"id{index}"
+        (tmp_path / f"{article_id}_texified.md").write_text(f"texified {index}", encoding='utf-8')
+        rows.append({'article_url': f"https://mp.weixin.qq.com/s/{article_id}", 'article_name': f"t{index}",
+                     'category': category, 'keywords': '"' + json.dumps([f"k{index}"]) + '"'})
+    write_list(tmp_path / 'list.csv', rows)
+
+    output_dir = str(tmp_path / 'corpus')
+    assert export_corpus(str(tmp_path), 'list.csv', output_dir, export_format, row_group_size=1) == 5
+
+    corpus = ColumnarCorpus(output_dir)
+    for index, row in enumerate(rows):
+        article = corpus.get_article(f"id{index}", ['category', 'keywords', 'texified'])
+        assert article['category'] == (row['category'] or None)
+        assert article['keywords'] == [f"k{index}"]
+        assert article['texified'] == f"texified {index}"
+
+    # 按分类读取时只返回该分类的文章
+    categories = [value for batch in corpus.iter_batches(['category'], 'a/b')
+                  for value in batch.column('category').to_pylist()]
+    assert categories == ['a/b', 'a/b']
+
+def export(tmp_path, categories, **kwargs):
+    rows = []
+    for index, category in enumerate(categories):
+        (tmp_path / f"id{index}_texified.md").write_text(f"texified {index}", encoding='utf-8')
+        rows.append({'article_url': f"https://mp.weixin.qq.com/s/id{index}", 'article_name': f"t{index}",
+                     'category': category, 'keywords': ''})
+    write_list(tmp_path / 'list.csv', rows)
+    return export_corpus(str(tmp_path), 'list.csv', str(tmp_path / 'corpus'), **kwargs)
+
+def test_point_lookups_reuse_the_decoded_row_group(tmp_path, monkeypatch):
+    export(tmp_path, ['a'] * 6, row_group_size=3)
+    corpus = ColumnarCorpus(str(tmp_path / 'corpus'))
+    reads = []
+    read_row_group = ColumnarCorpus._read_row_group
+    monkeypatch.setattr(ColumnarCorpus, '_read_row_group',
+                        lambda self, *args: reads.append(args[:2]) or read_row_group(self, *args))
+    texts = [corpus.get_article(f"id{index}", ['texified'])['texified'] for index in range(6)]
+    assert texts == [f"texified {index}" for index in range(6)]
+    assert reads == [(0, 0), (0, 1)]
+
+def test_reexport_replaces_the_index_and_removes_stale_partitions(tmp_path):
+    export(tmp_path, ['a', 'b'])
+    first = ColumnarCorpus(str(tmp_path / 'corpus'))
+    export(tmp_path, ['a', 'a'])
+
+    # 新索引只引用新版本中的文件，已不存在的分类不再出现
+    corpus = ColumnarCorpus(str(tmp_path / 'corpus'))
+    assert all(path.startswith('v000002/') for path in corpus.files)
+    assert corpus.get_article('id1', ['category'])['category'] == 'a'
+    assert list(corpus.iter_batches(['category'], 'b')) == []
+    # 上一个版本保留给仍在读取的进程
+    assert first.get_article('id1', ['category'])['category'] == 'b'
+
+    export(tmp_path, ['a', 'a'])
+    assert sorted(path.name for path in (tmp_path / 'corpus').iterdir()) == ['_index.json', 'v000002', 'v000003']
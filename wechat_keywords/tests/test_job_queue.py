@@ -0,0 +1,144 @@
+import json
+import socket
+import time
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+from service import JobQueue, DONE, FAILED
+from service.http_api import _Handler
+import service.http_api
+
+# 在后台线程中等待指定数量的任务结束
+def run_jobs(job_queue, jobs):
+    subscriber = job_queue.subscribe()
+
+    def wait():
+        finished = 0
+        while finished < jobs:
+            if subscriber.get(timeout=5)['status'] in (DONE, FAILED):
+                finished += 1
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    return thread
+
+def handle(job):
+    if 'bad' in job['article_url']:
+        raise ValueError('boom')
+    return {'url': job['article_url']}
+
+def test_jobs_are_processed_by_priority(tmp_path):
+    order = []
+    job_queue = JobQueue(lambda job: order.append(job['article_url']) or {}, str(tmp_path / 'jobs.jsonl'))
+    low = job_queue.submit('u-low', 0)
+    job_queue.submit('u-high', 5)
+    # 同一篇文章尚未完成时返回已有的任务
+    assert job_queue.submit('u-low', 9)['id'] == low['id']
+    waiter = run_jobs(job_queue, 2)
+    job_queue.start()
+    waiter.join()
+    job_queue.stop()
+    assert order == ['u-high', 'u-low']
+    assert job_queue.get(low['id'])['status'] == DONE
+
+def test_pending_jobs_resume_after_restart(tmp_path):
+    journal = str(tmp_path / 'jobs.jsonl')
+    job_queue = JobQueue(handle, journal)
+    job = job_queue.submit('u1')
+    job_queue.stop()
+
+    job_queue = JobQueue(handle, journal)
+    assert job_queue.stats()['queued'] == 1
+    waiter = run_jobs(job_queue, 1)
+    job_queue.start()
+    waiter.join()
+    job_queue.stop()
+    assert job_queue.get(job['id'])['result'] == {'url': 'u1'}
+
+def test_finished_jobs_are_evicted_and_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr('service.job_queue._COMPACT_SLACK', 5)
+    journal = tmp_path / 'jobs.jsonl'
+    job_queue = JobQueue(handle, str(journal), retention=3)
+    jobs = [job_queue.submit(f"u{index}" if index % 4 else f"bad{index}") for index in range(20)]
+    waiter = run_jobs(job_queue, 20)
+    job_queue.start()
+    waiter.join()
+    job_queue.stop()
+
+    # 只保留最近结束的 3 个任务，日志在运行过程中被压缩
+    assert [job_queue.get(job['id']) is not None for job in jobs] == [False] * 17 + [True] * 3
+    assert sum(job_queue.stats().values()) == 3
+    assert len(journal.read_text().splitlines()) <= 2 * 3 + 5 + 1
+
+    job_queue = JobQueue(handle, str(journal), retention=2)
+    job_queue.stop()
+    assert [json.loads(line)['id'] for line in journal.read_text().splitlines()] == [job['id'] for job in jobs[-2:]]
+
+@pytest.fixture
+def server(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.job_queue = JobQueue(handle, str(tmp_path / 'jobs.jsonl'))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.job_queue.stop()
+
+def post(server, body):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/jobs", json.dumps(body).encode('utf-8'),
+                                     {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.mark.parametrize('body', [{'article_urls': 'u1'}, {'article_urls': {'u1': 1}}, {'article_urls': ['u1', '']},
+                                  {'article_url': 'u1', 'options': 'x'}, {}])
+def test_invalid_submissions_are_rejected(server, body):
+    assert post(server, body)[0] == 400
+
+def test_submit_batch(server):
+    status, body = post(server, {'article_urls': ['u1', 'u2'], 'priority': 3})
+    assert status == 202 and [job['article_url'] for job in body['jobs']] == ['u1', 'u2']
+
+# 打开 /stream 流式接口，读取响应头
+def open_stream(server):
+    client = socket.create_connection(server.server_address, timeout=5)
+    client.sendall(b'GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    response = b''
+    while b'\r\n\r\n' not in response:
+        response += client.recv(1024)
+    return client, response.split(b'\r\n\r\n', 1)[1]
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_idle_stream_sends_heartbeats_and_ends_when_the_client_leaves(server, monkeypatch):
+    monkeypatch.setattr(service.http_api, '_STREAM_POLL_SECONDS', 0.02)
+    client, body = open_stream(server)
+    while b'\n' not in body:
+        body += client.recv(1024)
+    assert body.startswith(b'\n')
+    assert len(server.job_queue._subscribers) == 1
+
+    client.close()
+    # 心跳写入失败后处理线程退出并取消订阅
+    assert wait_for(lambda: not server.job_queue._subscribers)
+
+def test_stream_ends_when_the_subscriber_is_dropped(server, monkeypatch):
+    monkeypatch.setattr(service.http_api, '_STREAM_POLL_SECONDS', 0.02)
+    client, _ = open_stream(server)
+    assert wait_for(lambda: len(server.job_queue._subscribers) == 1)
+    # 模拟消费过慢的订阅者被移除
+    server.job_queue.unsubscribe(server.job_queue._subscribers[0])
+    client.settimeout(5)
+    while client.recv(1024):
+        pass
+    client.close()
@@ -0,0 +1,95 @@
+import json
+import pytest
+from keywords import compute_fingerprint, format_fingerprint, parse_fingerprint, stale_stages
+from storage import ArticleStore
+from data_processor import process_article
+
+class FakeLLM(object):
+    """
+    按提示类型返回固定分类和关键词的 LLM，记录调用次数。
+    """
+
+    def __init__(self, tag='技术', keywords=('k1', 'k2'), model='fake'):
+        self.tag = tag
+        self.keywords = keywords
+        self.model = model
+        self.calls = []
+
+    def generate(self, prompt, handle_response):
+        if 'tags_reference' in prompt:
+            self.calls.append('classify')
+            if self.tag is None:
+                raise RuntimeError('classification failed')
+            return handle_response(json.dumps({'tag': self.tag}, ensure_ascii=False))
+        self.calls.append('extract')
+        if self.keywords is None:
+            raise RuntimeError('extraction failed')
+        return handle_response(json.dumps(list(self.keywords), ensure_ascii=False))
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    store.write('id1_texified.md', 'content')
+    return store
+
+def processed_row(store, llm):
+    row = {'article_url': 'https://mp.weixin.qq.com/s/id1'}
+    assert process_article(row, 'id1', llm, store, None, 2)
+    return row
+
+def test_fingerprint_round_trip_and_stale_stages():
+    fingerprint = compute_fingerprint('content', 'm', 3)
+    assert parse_fingerprint(format_fingerprint(fingerprint)) == fingerprint
+    assert parse_fingerprint('') == {} and parse_fingerprint('not json') == {} and parse_fingerprint('[1]') == {}
+
+    assert stale_stages(fingerprint, dict(fingerprint)) == (False, False)
+    assert stale_stages({}, fingerprint) == (True, True)
+    assert stale_stages(fingerprint, compute_fingerprint('changed', 'm', 3)) == (True, True)
+    assert stale_stages(fingerprint, compute_fingerprint('content', 'other', 3)) == (True, True)
+    assert stale_stages(fingerprint, compute_fingerprint('content', 'm', 5)) == (False, True)
+
+def test_process_records_fingerprint_and_skips_fresh_rows(store):
+    llm = FakeLLM()
+    row = processed_row(store, llm)
+    assert row['category'] == '技术' and json.loads(row['keywords'].strip('"')) == ['k1', 'k2']
+    assert parse_fingerprint(row['fingerprint']) == compute_fingerprint('content', 'fake', 2)
+    assert llm.calls == ['classify', 'extract']
+
+    # 输入没有变化时不调用 LLM
+    assert not process_article(row, 'id1', llm, store, None, 2, reprocess_stale=True)
+    assert len(llm.calls) == 2
+
+def test_stale_keywords_are_reextracted_only(store):
+    llm = FakeLLM(keywords=('k1', 'k2', 'k3'))
+    row = processed_row(store, llm)
+    assert process_article(row, 'id1', llm, store, None, 3, reprocess_stale=True)
+    assert llm.calls == ['classify', 'extract', 'extract']
+    assert parse_fingerprint(row['fingerprint'])['keyword_count'] == '3'
+
+def test_failed_reclassification_clears_keywords(store):
+    row = processed_row(store, FakeLLM())
+    store.write('id1_texified.md', 'changed content')
+    assert process_article(row, 'id1', FakeLLM(tag=None), store, None, 2, reprocess_stale=True)
+    assert row['category'] == '' and row['keywords'] == '' and row['fingerprint'] == ''
+
+def test_changed_category_replaces_keywords(store):
+    row = processed_row(store, FakeLLM())
+    store.write('id1_texified.md', 'changed content')
+    llm = FakeLLM(tag='健康', keywords=('k3',))
+    assert process_article(row, 'id1', llm, store, None, 2, reprocess_stale=True)
+    assert row['category'] == '健康' and json.loads(row['keywords'].strip('"')) == ['k3']
+    assert parse_fingerprint(row['fingerprint'])['content'] == compute_fingerprint('changed content', 'fake', 2)['content']
+
+def test_changed_category_with_failed_extraction_keeps_no_old_keywords(store):
+    row = processed_row(store, FakeLLM())
+    store.write('id1_texified.md', 'changed content')
+    assert process_article(row, 'id1', FakeLLM(tag='健康', keywords=None), store, None, 2, reprocess_stale=True)
+    assert row['category'] == '健康' and row['keywords'] == '' and row['fingerprint'] == ''
+
+def test_reclassified_as_none_clears_keywords(store):
+    row = processed_row(store, FakeLLM())
+    store.write('id1_texified.md', 'changed content')
+    llm = FakeLLM(tag='none')
+    assert process_article(row, 'id1', llm, store, None, 2, reprocess_stale=True)
+    assert row['category'] == 'none' and row['keywords'] == '' and llm.calls == ['classify']
+    assert row['fingerprint']
@@ -0,0 +1,66 @@
+import csv
+import json
+import pytest
+import data_processor
+from data_processor import process_article, process_stream
+from storage import ArticleStore
+from test_process_article import FakeLLM
+
+def read_results(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+@pytest.fixture
+def setup(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    for article_id in ('a', 'b'):
+        store.write(f"{article_id}_texified.md", f"content {article_id}")
+    input_path = tmp_path / 'list.jsonl'
+    input_path.write_text(''.join(json.dumps({'article_url': f"https://mp.weixin.qq.com/s/{article_id}"}) + '\n'
+                                  for article_id in ('a', 'b')), encoding='utf-8')
+    return store, str(input_path), str(tmp_path / 'list_result.csv')
+
+def run(store, input_path, result_path, llm, keyword_count=2, reprocess_stale=False):
+    def handle_row(row):
+        article_id = row['article_url'].rsplit('/', 1)[-1]
+        return process_article(row, article_id, llm, store, None, keyword_count, reprocess_stale)
+    process_stream(input_path, handle_row, result_path, reprocess_stale=reprocess_stale)
+
+def test_completed_articles_are_skipped(setup):
+    store, input_path, result_path = setup
+    llm = FakeLLM()
+    run(store, input_path, result_path, llm)
+    assert llm.calls == ['classify', 'extract'] * 2
+    run(store, input_path, result_path, llm)
+    assert len(llm.calls) == 4
+    assert len(read_results(result_path)) == 2
+
+def test_reprocess_stale_uses_stored_results(setup):
+    store, input_path, result_path = setup
+    run(store, input_path, result_path, FakeLLM())
+
+    # 输入没有变化：结果文件中的指纹仍然有效，不调用 LLM
+    llm = FakeLLM()
+    run(store, input_path, result_path, llm, reprocess_stale=True)
+    assert llm.calls == []
+
+    # 关键词数量变化：只重新提取关键词
+    llm = FakeLLM(keywords=('k1', 'k2', 'k3'))
+    run(store, input_path, result_path, llm, keyword_count=3, reprocess_stale=True)
+    assert llm.calls == ['extract', 'extract']
+
+    # 文章内容变化：只重新处理变化的文章，结果文件中最后的结果生效
+    store.write('b_texified.md', 'changed')
+    llm = FakeLLM(tag='健康')
+    run(store, input_path, result_path, llm, keyword_count=3, reprocess_stale=True)
+    assert llm.calls == ['classify', 'extract']
+    results = read_results(result_path)
+    assert [row['category'] for row in results if row['article_url'].endswith('/b')][-1] == '健康'
+
+def test_export_dir_rejected_for_streamed_input(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr('sys.argv', ['data_processor', '--base_path', str(tmp_path), '--csv_file_name', 'list.jsonl',
+                                     '--api_type', 'ollama', '--api_url', 'x', '--api_key', 'x', '--llm_model', 'm',
+                                     '--export_dir', str(tmp_path / 'corpus')])
+    with pytest.raises(SystemExit):
+        data_processor.main()
+    assert '--export_dir' in capsys.readouterr().err
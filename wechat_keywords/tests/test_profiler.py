@@ -0,0 +1,55 @@
+import os
+import time
+import profiling
+from profiling import Profiler, stage, profile_article, record_size
+
+def test_disabled_profiler_is_a_no_op():
+    with profile_article('u'), stage('fetch', 'network'):
+        record_size('abc')
+    assert profiling.profiler._profiler is None
+
+def test_nested_stages_count_only_their_own_time(tmp_path):
+    profiler = Profiler(str(tmp_path), 'run', sample_interval=0).start()
+    try:
+        with stage('outer', 'cpu'):
+            with stage('sleep', 'sleep'):
+                time.sleep(0.05)
+            with stage('sleep', 'sleep'):
+                time.sleep(0.05)
+    finally:
+        profiler.stop()
+
+    kind, calls, wall, cpu = profiler._stages['sleep']
+    assert (kind, calls) == ('sleep', 2) and wall >= 0.1 and cpu < wall
+    kind, calls, wall, cpu = profiler._stages['outer']
+    assert (kind, calls) == ('cpu', 1) and wall < 0.05
+    assert all(os.path.exists(profiler.prefix + suffix) for suffix in ('.pstats', '.txt'))
+
+def test_slowest_articles_and_sizes_in_bytes(tmp_path):
+    profiler = Profiler(str(tmp_path), 'run', sample_interval=0, top_n=2).start()
+    try:
+        for url, delay in [('fast', 0), ('slow', 0.03), ('medium', 0.01)]:
+            with profile_article(url):
+                record_size('中文' * 10)
+                record_size(b'x' * 5)
+                time.sleep(delay)
+    finally:
+        profiler.stop()
+
+    assert profiler._articles_seen == 3
+    assert [(url, size) for _, _, url, size in sorted(profiler._articles, reverse=True)] == [('slow', 60), ('medium', 60)]
+    report = profiler.report()
+    assert 'Slowest 2 of 3 articles:' in report and 'bytes' in report
+    assert report.index('slow') < report.index('medium')
+
+def test_sampled_stacks_are_rooted_at_the_stage(tmp_path):
+    profiler = Profiler(str(tmp_path), 'run', sample_interval=0.001).start()
+    try:
+        with stage('wait', 'sleep'):
+            time.sleep(0.1)
+    finally:
+        profiler.stop()
+
+    with open(profiler.prefix + '.collapsed', encoding='utf-8') as file:
+        stacks = file.read().splitlines()
+    assert any(line.startswith('[wait];') for line in stacks)
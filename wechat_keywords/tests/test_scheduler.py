@@ -0,0 +1,108 @@
+import pytest
+from scheduler import BudgetScheduler, parse_deadline
+from scheduler import budget_scheduler
+
+SIZES = {'a': 300, 'b': 100, 'c': 200}
+
+def rows(*names, **priorities):
+    return [{'article_url': name, 'priority': str(priorities.get(name, ''))} for name in names]
+
+def make(schedule='shortest', **kwargs):
+    return BudgetScheduler(lambda row: SIZES[row['article_url']], schedule, **kwargs)
+
+class FakeClock(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(budget_scheduler.time, 'time', clock.time)
+    monkeypatch.setattr(budget_scheduler.time, 'sleep', clock.sleep)
+    return clock
+
+def test_parse_deadline():
+    assert parse_deadline('90m', now=0) == 5400
+    assert parse_deadline('1h30m', now=0) == 5400
+    assert parse_deadline('2025-01-01 18:00') > 0
+    with pytest.raises(ValueError):
+        parse_deadline('soon')
+
+def test_order():
+    assert [row['article_url'] for row in make('shortest').order(rows('a', 'b', 'c'))] == ['b', 'c', 'a']
+    ordered = make('priority').order(rows('a', 'b', 'c', a=5, c=5))
+    assert [row['article_url'] for row in ordered] == ['c', 'a', 'b']
+    # 按输入顺序时不读取全部文章
+    generator = iter(rows('a'))
+    assert make('input').order(generator) is generator
+
+def test_pending_is_released_on_every_exit_path(clock):
+    scheduler = make(deadline=clock.now + 1000)
+    pending = list(scheduler.order(rows('a', 'b', 'c')))
+    assert (scheduler._pending, scheduler._pending_bytes) == (3, 600)
+
+    b, c, a = pending
+    assert scheduler.admit(b)
+    clock.now += 10
+    scheduler.record(b, {'prompt_tokens': 40, 'completion_tokens': 10})
+    assert scheduler.admit(c)
+    scheduler.done(c)
+    # 按已处理文章的耗时（每字节 0.1 秒）估算，a 需要 30 秒，预计无法在截止时间前完成
+    clock.now += 980
+    assert not scheduler.admit(a)
+    assert (scheduler._pending, scheduler._pending_bytes) == (0, 0)
+    assert (scheduler.processed, scheduler.skipped) == (1, 1)
+    assert scheduler._sizes == {}
+
+def test_token_budget_waits_for_the_window(clock):
+    scheduler = make('input', max_tokens_per_hour=100)
+    a, b = rows('b', 'b')
+    assert scheduler.admit(a)
+    scheduler.record(a, {'prompt_tokens': 80, 'completion_tokens': 0})
+    # 每字节 0.8 个 token：估算 80 个 token，加上窗口中的 80 超过预算，等待窗口过期
+    assert scheduler.admit(b)
+    assert clock.sleeps == [3600]
+    assert 'Progress: 1 processed' in scheduler.projection()
+
+def test_token_budget_skips_past_the_deadline(clock):
+    scheduler = make(max_tokens_per_hour=100, deadline=clock.now + 60)
+    a, b = scheduler.order(rows('b', 'c'))
+    assert scheduler.admit(a)
+    scheduler.record(a, {'prompt_tokens': 100, 'completion_tokens': 0})
+    assert not scheduler.admit(b)
+    assert clock.sleeps == [] and scheduler._pending == 0
+
+def test_order_sorts_within_bounded_windows(clock):
+    scheduler = make(sort_window=2)
+    sized = []
+    scheduler.size_of = lambda row: sized.append(row['article_url']) or SIZES[row['article_url']]
+    ordered = scheduler.order(rows('a', 'b', 'c'))
+    # 只读入第一个窗口（和判断是否还有剩余文章的一行）
+    assert next(ordered)['article_url'] == 'b'
+    assert sized == ['a', 'b'] and scheduler._pending == 2
+    assert 'more than 2 pending' in scheduler.projection()
+    assert [row['article_url'] for row in ordered] == ['a', 'c']
+    assert scheduler._pending == 3 and 'estimated completion' in scheduler.projection()
+    with pytest.raises(ValueError):
+        make(sort_window=0)
+
+def test_pause_is_excluded_from_the_article_time(clock):
+    scheduler = make(deadline=clock.now + 100)
+    b, c = scheduler.order(rows('b', 'c'))
+    assert scheduler.admit(b)
+    clock.now += 10 + 5
+    scheduler.record(b, {'prompt_tokens': 50, 'completion_tokens': 0}, pause=5)
+    # 每字节 0.1 秒（不含休眠），c 需要 20 秒，另外估算 5 秒的休眠
+    assert scheduler._seconds == 10
+    assert budget_scheduler.format_time(clock.now + 25) in scheduler.projection()
+    # 计入休眠时 c 需要 30 秒，超过截止时间
+    clock.now += 60
+    assert scheduler.admit(c)
@@ -0,0 +1,135 @@
+import csv
+import math
+import os
+import shutil
+from collections import Counter
+import pytest
+from search import build_index, SearchIndex, tokenize
+from storage import ArticleStore
+
+TEXTS = {
+    'a': 'apple banana apple',
+    'b': 'banana cherry',
+    'c': 'cherry cherry durian banana',
+    'd': 'elderberry fig',
+}
+
+def write_list(base_path, categories):
+    with open(base_path / 'list.csv', 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=['article_url', 'article_name', 'category', 'keywords'])
+        writer.writeheader()
+        for article_id, category in categories.items():
+            writer.writerow({'article_url': f"https://mp.weixin.qq.com/s/{article_id}", 'article_name': '',
+                             'category': category, 'keywords': ''})
+
+@pytest.fixture
+def base_path(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    for article_id, text in TEXTS.items():
+        store.write(f"{article_id}_purified.txt", text)
+    return tmp_path
+
+def build(base_path, categories, segment_size=2, max_segments=10):
+    write_list(base_path, categories)
+    return build_index(str(base_path), 'list.csv', str(base_path / 'index'), segment_size, tokenizer='bigram',
+                       max_segments=max_segments)
+
+def segment_dirs(base_path):
+    return sorted(name for name in os.listdir(base_path / 'index') if name.startswith('seg-'))
+
+# 只基于当前有效文章的 BM25 得分
+def expected_scores(query, categories, k1=1.2, b=0.75):
+    docs = {article_id: Counter(tokenize('\n'.join(['', category, '', TEXTS[article_id]]), 'bigram'))
+            for article_id, category in categories.items()}
+    average_length = sum(sum(tf.values()) for tf in docs.values()) / len(docs)
+    scores = {}
+    for term in set(tokenize(query, 'bigram')):
+        df = sum(1 for tf in docs.values() if term in tf)
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for article_id, tf in docs.items():
+            if term in tf:
+                length = sum(tf.values())
+                scores[article_id] = scores.get(article_id, 0.0) + idf * tf[term] * (k1 + 1) / (
+                    tf[term] + k1 * (1 - b + b * length / average_length))
+    return scores
+
+def search(base_path, query, category=None):
+    index = SearchIndex(str(base_path / 'index'))
+    try:
+        return index.search(query, category, 10), len(index)
+    finally:
+        index.close()
+
+def test_incremental_updates_keep_scores_consistent(base_path):
+    categories = {'a': 'x', 'b': 'x', 'c': 'y', 'd': 'y'}
+    assert build(base_path, categories) == 4
+    assert build(base_path, categories) == 0
+
+    # 修改分类后重新索引（旧版本被删除，但仍在旧段的倒排表中）
+    categories.update({'b': 'y', 'c': 'x'})
+    assert build(base_path, categories) == 2
+    categories.update({'b': 'x'})
+    assert build(base_path, categories) == 1
+
+    results, count = search(base_path, 'banana cherry')
+    assert count == 4
+    assert all(result['score'] >= 0 for result in results)
+    assert [result['score'] for result in results] == sorted((result['score'] for result in results), reverse=True)
+    expected = expected_scores('banana cherry', categories)
+    assert {result['article_id']: result['category'] for result in results} == {article_id: categories[article_id] for article_id in expected}
+    for result in results:
+        assert result['score'] == pytest.approx(expected[result['article_id']])
+
+    results, _ = search(base_path, 'cherry', 'x')
+    assert [result['article_id'] for result in results] == ['c', 'b']
+
+def test_article_changed_back_is_reindexed(base_path):
+    build(base_path, {'a': 'x', 'b': 'x'})
+    build(base_path, {'a': 'y', 'b': 'x'})
+    # A -> B -> A：旧签名所在的文档已被删除，需要重新索引
+    assert build(base_path, {'a': 'x', 'b': 'x'}) == 1
+    results, count = search(base_path, 'apple')
+    assert count == 2
+    assert [(result['article_id'], result['category']) for result in results] == [('a', 'x')]
+    assert build(base_path, {'a': 'x', 'b': 'x'}) == 0
+
+def test_unlisted_and_uncategorized_articles_are_removed(base_path):
+    build(base_path, {'a': 'x', 'b': 'x', 'c': 'y', 'd': 'y'})
+    # d 不在文章列表中，b 不再有分类
+    assert build(base_path, {'a': 'x', 'b': '', 'c': 'y'}) == 0
+    results, count = search(base_path, 'banana cherry fig')
+    assert count == 2
+    assert sorted(result['article_id'] for result in results) == ['a', 'c']
+
+    # 重新出现的文章再次被索引
+    assert build(base_path, {'a': 'x', 'b': 'x', 'c': 'y'}) == 1
+    assert search(base_path, 'banana')[1] == 3
+
+def test_segments_are_merged(base_path):
+    categories = {'a': 'x', 'b': 'x', 'c': 'y', 'd': 'y'}
+    build(base_path, categories, segment_size=100, max_segments=3)
+    for step in range(12):
+        article_id = 'abcd'[step % 4]
+        categories[article_id] = 'y' if categories[article_id] == 'x' else 'x'
+        assert build(base_path, categories, segment_size=100, max_segments=3) == 1
+        assert len(segment_dirs(base_path)) <= 3
+
+    results, count = search(base_path, 'banana cherry')
+    assert count == 4
+    expected = expected_scores('banana cherry', categories)
+    assert {result['article_id']: result['category'] for result in results} == {article_id: categories[article_id] for article_id in expected}
+    for result in results:
+        assert result['score'] == pytest.approx(expected[result['article_id']])
+    assert build(base_path, categories, segment_size=100, max_segments=3) == 0
+
+def test_interrupted_merge_does_not_duplicate_articles(base_path, monkeypatch):
+    categories = {'a': 'x', 'b': 'x', 'c': 'y', 'd': 'y'}
+    for article_id in categories:
+        build(base_path, {key: value for key, value in categories.items() if key <= article_id}, max_segments=10)
+    # 合并后的段已写入，被合并的段目录尚未删除
+    monkeypatch.setattr(shutil, 'rmtree', lambda path: None)
+    build(base_path, categories, max_segments=2)
+    assert len(segment_dirs(base_path)) == 6
+    results, count = search(base_path, 'banana')
+    assert count == 4
+    assert sorted(result['article_id'] for result in results) == ['a', 'b', 'c']
@@ -0,0 +1,28 @@
+import filecmp
+import os
+import pytest
+
+# 两个应用分别构建镜像（构建上下文为应用目录），以下模块在两个应用中各保存一份，必须保持一致
+SHARED_MODULES = [
+    'ingest/__init__.py',
+    'ingest/completed.py',
+    'ingest/merge.py',
+    'ingest/readers.py',
+    'profiling/__init__.py',
+    'profiling/profiler.py',
+    'service/__init__.py',
+    'service/http_api.py',
+    'service/job_queue.py',
+    'storage/article_store.py',
+]
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SIBLING = {'wechat_downloader': 'wechat_keywords', 'wechat_keywords': 'wechat_downloader'}
+
+@pytest.mark.parametrize('module', SHARED_MODULES)
+def test_shared_module_is_in_sync(module):
+    sibling_dir = os.path.join(os.path.dirname(_APP_DIR), _SIBLING.get(os.path.basename(_APP_DIR), ''))
+    if not os.path.isfile(os.path.join(sibling_dir, module)):
+        pytest.skip('the other application is not available (e.g. inside the image)')
+    assert filecmp.cmp(os.path.join(_APP_DIR, module), os.path.join(sibling_dir, module), shallow=False), \
+        f"'{module}' differs between the two applications, copy the change to both"
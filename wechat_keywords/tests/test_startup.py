@@ -0,0 +1,8 @@
+from bench.startup import DEFAULT_MODULE, FORBIDDEN_MODULES, measure_import_time
+
+def test_entry_point_does_not_import_heavy_modules():
+    # 只检查导入的模块（导入时间受机器负载影响，由 `python -m bench.startup` 检查）
+    _, imports = measure_import_time(DEFAULT_MODULE)
+    imported = {name for name, _, _ in imports}
+    assert DEFAULT_MODULE in imported
+    assert not imported & set(FORBIDDEN_MODULES)